@@ -1,9 +1,13 @@
+from typing import List, Optional
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from src.db.session import get_db
 from src.db.models import Job
+from src.api.metrics import job_transition, jobs_total
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
@@ -14,30 +18,75 @@ class MigrateReq(BaseModel):
     object_id: str
 
 
+class BulkReq(BaseModel):
+    src_node: str
+    dst_node: str
+    # omit to move every object on src_node (drain)
+    object_ids: Optional[List[str]] = None
+
+
+def _job_out(j: Job) -> dict:
+    return {
+        "id": j.id,
+        "kind": j.kind,
+        "src_node": j.src_node,
+        "dst_node": j.dst_node,
+        "object_id": j.object_id,
+        "status": j.status,
+        "retries": j.retries,
+        "next_attempt_at": j.next_attempt_at,
+        "last_error": j.last_error,
+        "lease_owner": j.lease_owner,
+        "lease_expires_at": j.lease_expires_at,
+        "total_chunks": j.total_chunks,
+        "chunks_done": j.chunks_done,
+        "bytes_done": j.bytes_done,
+        "objects_total": j.objects_total,
+        "objects_done": j.objects_done,
+        "created_at": j.created_at,
+        "updated_at": j.updated_at,
+    }
+
+
 @router.post("/migrate")
 def migrate(req: MigrateReq, db: Session = Depends(get_db)):
-    job = Job.create_migrate(db, req.src_node, req.dst_node, req.object_id)
+    # one migrate per object and destination at a time, enforced by a unique
+    # index: a repeat of a pending job is answered with that job, a
+    # conflicting source is refused. (Bulk jobs may still overlap; the node's
+    # manifest install is atomic, last wins.)
+    try:
+        job = Job.create_migrate(db, req.src_node, req.dst_node, req.object_id)
+    except IntegrityError:
+        active = Job.active_migrate(db, req.dst_node, req.object_id)
+        if active is None or active.src_node != req.src_node:
+            where = f" from {active.src_node} (job {active.id})" if active is not None else ""
+            raise HTTPException(
+                status_code=409,
+                detail=f"a job is already migrating {req.object_id} to {req.dst_node}{where}",
+            )
+        return {"job_id": active.id, "status": active.status}
+
+    jobs_total.inc()
+    job_transition(None, "queued")
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.post("/bulk")
+def migrate_bulk(req: BulkReq, db: Session = Depends(get_db)):
+    if req.object_ids is not None and not req.object_ids:
+        raise HTTPException(status_code=400, detail="object_ids is empty")
+    if req.src_node == req.dst_node:
+        raise HTTPException(status_code=400, detail="src_node and dst_node are the same")
+    job = Job.create_bulk(db, req.src_node, req.dst_node, req.object_ids)
+    jobs_total.inc()
+    job_transition(None, "queued")
     return {"job_id": job.id, "status": job.status}
 
 
 @router.get("")
 def list_jobs(limit: int = 50, db: Session = Depends(get_db)):
     jobs = db.query(Job).order_by(Job.id.desc()).limit(limit).all()
-    return [
-        {
-            "id": j.id,
-            "kind": j.kind,
-            "src_node": j.src_node,
-            "dst_node": j.dst_node,
-            "object_id": j.object_id,
-            "status": j.status,
-            "retries": j.retries,
-            "last_error": j.last_error,
-            "created_at": j.created_at,
-            "updated_at": j.updated_at,
-        }
-        for j in jobs
-    ]
+    return [_job_out(j) for j in jobs]
 
 
 @router.get("/{job_id}")
@@ -46,15 +95,4 @@ def get_job(job_id: int, db: Session = Depends(get_db)):
     if not j:
         raise HTTPException(status_code=404, detail="job not found")
 
-    return {
-        "id": j.id,
-        "kind": j.kind,
-        "src_node": j.src_node,
-        "dst_node": j.dst_node,
-        "object_id": j.object_id,
-        "status": j.status,
-        "retries": j.retries,
-        "last_error": j.last_error,
-        "created_at": j.created_at,
-        "updated_at": j.updated_at,
-    }
+    return _job_out(j)
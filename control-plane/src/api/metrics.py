@@ -1,34 +1,94 @@
-from fastapi import APIRouter, Response, Depends
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from src.db.session import get_db
+from src.core.http_client import http_client
 from src.db.models import Job, Node
 
 router = APIRouter(tags=["metrics"])
 
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+# Job counts are kept in memory: seeded from the DB once at startup
+# (load_from_db) and moved on every state transition this process makes, so
+# a scrape never queries the jobs table. With several control-plane replicas
+# each one counts its own transitions on top of its startup snapshot.
+jobs_total = Counter("replicator_jobs", "Jobs created")
+jobs_by_status = Gauge("replicator_jobs_by_status", "Jobs by status", ["status"])
+nodes_total = Gauge("replicator_nodes_total", "Total registered nodes")
+
+job_retries_total = Counter("replicator_job_retries_total", "Failed job attempts requeued for retry", ["src", "dst"])
+
+job_queue_wait_seconds = Histogram(
+    "replicator_job_queue_wait_seconds",
+    "Time from a job becoming runnable (created, or its retry due) to being claimed",
+    ["src", "dst"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+migration_duration_seconds = Histogram(
+    "replicator_migration_duration_seconds",
+    "Wall time of one migration attempt, by outcome (succeeded, failed, retry)",
+    ["src", "dst", "status"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600, 10800),
+)
+migration_bytes = Histogram(
+    "replicator_migration_bytes",
+    "Chunk bytes moved per successful migration (rate of _sum is replication throughput)",
+    ["src", "dst"],
+    buckets=tuple(64 * 1024 * 4**i for i in range(11)),  # 64 KiB .. 64 GiB
+)
+migration_chunks_skipped = Histogram(
+    "replicator_migration_chunks_skipped",
+    "Distinct chunks per successful migration the destination already had (dedup)",
+    ["src", "dst"],
+    buckets=(0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000),
+)
+
+
+def job_transition(old: Optional[str], new: str) -> None:
+    if old == new:
+        return
+    if old is not None:
+        jobs_by_status.labels(old).dec()
+    jobs_by_status.labels(new).inc()
+
+
+def load_from_db(db: Session) -> None:
+    """
+    Seed the job and node gauges; runs once, at startup.
+    """
+    counts = dict(db.query(Job.status, func.count()).group_by(Job.status).all())
+    for status in JOB_STATUSES:
+        jobs_by_status.labels(status).set(counts.get(status, 0))
+    jobs_total.inc(sum(counts.values()))
+    nodes_total.set(db.query(func.count(Node.id)).scalar() or 0)
+
+
+class _HttpClientCollector:
+    # http_client keeps plain counters; they are read at scrape time
+    def collect(self):
+        for key, doc in (
+            ("requests", "Requests sent to data-plane nodes"),
+            ("connections_created", "New connections opened to data-plane nodes"),
+            ("connections_reused", "Requests served on a pooled keep-alive connection"),
+        ):
+            yield CounterMetricFamily(f"replicator_http_{key}", doc, value=http_client.stats[key])
+
+
+def register_collectors() -> None:
+    """
+    Expose http_client's counters; called from app startup. A no-op if they
+    are already registered (a second startup, or this module imported again).
+    """
+    if REGISTRY.get_sample_value("replicator_http_requests_total") is None:
+        REGISTRY.register(_HttpClientCollector())
+
 
 @router.get("/metrics")
-def metrics(db: Session = Depends(get_db)):
-    jobs_total = db.query(Job).count()
-    nodes_total = db.query(Node).count()
-
-    jobs_failed = db.query(Job).filter(Job.status == "failed").count()
-    jobs_succeeded = db.query(Job).filter(Job.status == "succeeded").count()
-    jobs_running = db.query(Job).filter(Job.status == "running").count()
-    jobs_queued = db.query(Job).filter(Job.status == "queued").count()
-
-    lines = [
-        "# HELP replicator_jobs_total Total jobs",
-        "# TYPE replicator_jobs_total counter",
-        f"replicator_jobs_total {jobs_total}",
-        "# HELP replicator_nodes_total Total registered nodes",
-        "# TYPE replicator_nodes_total gauge",
-        f"replicator_nodes_total {nodes_total}",
-        "# HELP replicator_jobs_by_status Jobs by status",
-        "# TYPE replicator_jobs_by_status gauge",
-        f'replicator_jobs_by_status{{status="queued"}} {jobs_queued}',
-        f'replicator_jobs_by_status{{status="running"}} {jobs_running}',
-        f'replicator_jobs_by_status{{status="succeeded"}} {jobs_succeeded}',
-        f'replicator_jobs_by_status{{status="failed"}} {jobs_failed}',
-    ]
-    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
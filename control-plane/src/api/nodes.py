@@ -5,6 +5,7 @@ from datetime import datetime
 
 from src.db.session import get_db
 from src.db.models import Node
+from src.api.metrics import nodes_total
 
 router = APIRouter(prefix="/nodes", tags=["nodes"])
 
@@ -27,6 +28,7 @@ def register_node(payload: NodeRegister, db: Session = Depends(get_db)):
     node = Node(name=payload.name, base_url=str(payload.base_url))
     db.add(node)
     db.commit()
+    nodes_total.inc()
     return {"message": "registered", "node": {"name": node.name, "base_url": node.base_url}}
 
 
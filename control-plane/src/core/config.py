@@ -6,7 +6,37 @@ class Settings(BaseModel):
     control_plane_host: str = os.getenv("CONTROL_PLANE_HOST", "0.0.0.0")
     control_plane_port: int = int(os.getenv("CONTROL_PLANE_PORT", "8000"))
     database_url: str = os.getenv("DATABASE_URL", "sqlite:////app/data/control_plane.db")
+    # threads for the job runner's DB calls; SQLite takes one writer at a
+    # time, and a writer waits up to DB_BUSY_TIMEOUT_MS for the lock
+    db_workers: int = int(os.getenv("DB_WORKERS", "2"))
+    db_busy_timeout_ms: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
     log_level: str = os.getenv("LOG_LEVEL", "info")
+    # direct: dst node pulls from src node itself; relay: bytes flow through the control plane
+    migration_mode: str = os.getenv("MIGRATION_MODE", "direct")
+    # concurrent migrations per control-plane process, and how long a claimed
+    # job stays owned without a heartbeat before another runner may take it
+    job_workers: int = int(os.getenv("JOB_WORKERS", "4"))
+    job_lease_s: float = float(os.getenv("JOB_LEASE_S", "30"))
+    # idle runners back off from JOB_POLL_MIN_S to JOB_POLL_MAX_S between DB polls;
+    # jobs queued through this process wake them immediately regardless
+    job_poll_min_s: float = float(os.getenv("JOB_POLL_MIN_S", "1"))
+    job_poll_max_s: float = float(os.getenv("JOB_POLL_MAX_S", "30"))
+    # a failed job is requeued up to JOB_MAX_RETRIES times, after an exponential
+    # backoff from JOB_RETRY_BASE_S up to JOB_RETRY_MAX_S
+    job_max_retries: int = int(os.getenv("JOB_MAX_RETRIES", "5"))
+    job_retry_base_s: float = float(os.getenv("JOB_RETRY_BASE_S", "5"))
+    job_retry_max_s: float = float(os.getenv("JOB_RETRY_MAX_S", "300"))
+    # a relay retry resumes from its checkpoint only if it is younger than this;
+    # keep it below the nodes' GC_GRACE_S, which protects the copied but not
+    # yet referenced chunks on the destination
+    migration_checkpoint_ttl_s: float = float(os.getenv("MIGRATION_CHECKPOINT_TTL_S", "1800"))
+    # attempts per node request (transient errors) before the job attempt fails
+    http_retries: int = int(os.getenv("HTTP_RETRIES", "3"))
+    # pooled control-plane -> node HTTP connections
+    http_pool_limit: int = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    http_limit_per_host: int = int(os.getenv("HTTP_LIMIT_PER_HOST", "16"))
+    http_keepalive_s: float = float(os.getenv("HTTP_KEEPALIVE_S", "30"))
+    pull_poll_interval_s: float = float(os.getenv("PULL_POLL_INTERVAL_S", "0.5"))
 
 
 settings = Settings()
@@ -1,36 +1,84 @@
 import aiohttp
-from typing import Any, Dict, Optional
+from typing import Dict, Optional
+
+from src.core.config import settings
 
 
 class HttpClient:
-    def __init__(self, timeout_s: float = 30.0):
+    """
+    Long-lived, pooled HTTP client for control-plane -> node traffic.
+
+    One aiohttp session (and connector) is shared by every call, so requests
+    reuse keep-alive connections instead of paying a new TCP handshake and DNS
+    lookup each time. limit_per_host bounds concurrent connections, and thus
+    in-flight requests, per destination node. Open with start() at startup and
+    close() at shutdown; the session is also created lazily on first use.
+    Callers issue requests on `session` directly, so each can handle status
+    codes and stream bodies its own way.
+    """
+
+    def __init__(
+        self,
+        timeout_s: float = 30.0,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        keepalive_s: Optional[float] = None,
+    ):
         self.timeout = aiohttp.ClientTimeout(total=timeout_s)
+        self.limit = limit or settings.http_pool_limit
+        self.limit_per_host = limit_per_host or settings.http_limit_per_host
+        self.keepalive_s = keepalive_s or settings.http_keepalive_s
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.stats["requests"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.stats["connections_reused"] += 1
+
+        tc.on_request_start.append(on_request_start)
+        tc.on_connection_create_end.append(on_connection_create_end)
+        tc.on_connection_reuseconn.append(on_connection_reuseconn)
+        return tc
+
+    async def start(self) -> None:
+        self._ensure_session()
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self._ensure_session()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_s,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                trace_configs=[self._trace_config()],
+            )
+        return self._session
+
 
-    async def get_json(self, url: str) -> Dict[str, Any]:
-        async with aiohttp.ClientSession(timeout=self.timeout) as s:
-            async with s.get(url) as r:
-                r.raise_for_status()
-                return await r.json()
-
-    async def put_json(self, url: str, body: Dict[str, Any]) -> Dict[str, Any]:
-        async with aiohttp.ClientSession(timeout=self.timeout) as s:
-            async with s.put(url, json=body) as r:
-                r.raise_for_status()
-                return await r.json()
-
-    async def get_bytes(self, url: str) -> bytes:
-        async with aiohttp.ClientSession(timeout=self.timeout) as s:
-            async with s.get(url) as r:
-                r.raise_for_status()
-                return await r.read()
-
-    async def put_bytes(self, url: str, data: bytes) -> None:
-        async with aiohttp.ClientSession(timeout=self.timeout) as s:
-            async with s.put(url, data=data) as r:
-                r.raise_for_status()
-                return None
-
-    async def head_status(self, url: str) -> int:
-        async with aiohttp.ClientSession(timeout=self.timeout) as s:
-            async with s.head(url) as r:
-                return r.status
+# shared by every MigrationService; opened/closed with the app (see main.py)
+http_client = HttpClient()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Awaitable, Callable, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class PermanentError(RuntimeError):
+    """
+    A failure that retrying can't fix (unknown node, object not found);
+    retry_async re-raises it at once and the job runner fails the job.
+    """
+
+
+def backoff_delay(attempt: int, base_s: float, max_s: float, jitter: bool = True) -> float:
+    """
+    Delay before retry number `attempt` (1-based): base_s * 2^(attempt-1),
+    capped at max_s. With jitter the delay is drawn from [d/2, d] so retries
+    of jobs that failed together don't stay in lockstep.
+    """
+    d = min(max_s, base_s * (2 ** max(attempt - 1, 0)))
+    if jitter:
+        d = random.uniform(d / 2, d)
+    return d
+
+
+async def retry_async(
+    fn: Callable[[], Awaitable[T]],
+    attempts: int = 3,
+    base_s: float = 0.2,
+    max_s: float = 5.0,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+) -> T:
+    """
+    Await fn() up to `attempts` times, sleeping backoff_delay() between
+    tries. PermanentError and exceptions outside `retry_on` propagate
+    immediately; the last error propagates once attempts run out.
+    """
+    attempts = max(attempts, 1)
+    for attempt in range(1, attempts + 1):
+        try:
+            return await fn()
+        except PermanentError:
+            raise
+        except retry_on:
+            if attempt >= attempts:
+                raise
+        await asyncio.sleep(backoff_delay(attempt, base_s, max_s))
+    raise AssertionError("unreachable")
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+
+class JobNotifier:
+    """
+    In-process wakeup for idle JobRunner workers: queuing a job calls notify()
+    and the runner starts it immediately instead of on its next poll.
+    Polling remains as a slow fallback for jobs queued by other processes.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def notify(self) -> None:
+        # safe from any thread: sync FastAPI handlers run in a threadpool
+        loop, event = self._loop, self._event
+        if loop is None or event is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            event.set()
+        else:
+            loop.call_soon_threadsafe(event.set)
+
+    def clear(self) -> None:
+        # workers clear *before* looking for work, so a notify that lands
+        # between an empty claim and wait() is never lost
+        if self._event is not None:
+            self._event.clear()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait for a notify() or until timeout; returns True if notified.
+        """
+        if self._event is None:
+            await asyncio.sleep(timeout)
+            return False
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+job_notifier = JobNotifier()
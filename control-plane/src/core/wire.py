@@ -0,0 +1,8 @@
+# Data-plane wire contract used when the control plane relays chunks between
+# nodes. Mirrors data-plane/src/core/framing.py (the two planes ship as
+# separate packages); tests/test_wire.py fails if they drift apart.
+
+# body type of /chunks/batch/get responses and /chunks/batch/put requests
+FRAMES_MEDIA_TYPE = "application/x-replicator-frames"
+# request header listing the compression codecs the receiver can decode
+CODECS_HEADER = "x-chunk-codecs"
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import json
+import time
 from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Integer, Text
+from sqlalchemy import Index, String, Integer, Text, Float, LargeBinary, and_, delete, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from src.core.scheduler import job_notifier
+
 
 class Base(DeclarativeBase):
     pass
@@ -25,16 +31,46 @@ class Node(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # at most one pending migrate per object and destination; concurrent
+        # POST /jobs/migrate requests race on this, not on a prior SELECT
+        Index(
+            "uq_jobs_active_migrate",
+            "dst_node",
+            "object_id",
+            unique=True,
+            sqlite_where=text("kind = 'migrate' AND status IN ('queued', 'running')"),
+            postgresql_where=text("kind = 'migrate' AND status IN ('queued', 'running')"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    kind: Mapped[str] = mapped_column(String(32), nullable=False)  # migrate/sync
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)  # migrate/bulk
     src_node: Mapped[str] = mapped_column(String(128), nullable=False)
     dst_node: Mapped[str] = mapped_column(String(128), nullable=False)
+    # bulk jobs: "*", with the ids in object_ids (JSON list), or every object
+    # on src_node (drain) when object_ids is null
     object_id: Mapped[str] = mapped_column(String(256), nullable=False)
+    object_ids: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
-    status: Mapped[str] = mapped_column(String(32), default="queued")  # queued/running/succeeded/failed
+    status: Mapped[str] = mapped_column(String(32), default="queued", index=True)  # queued/running/succeeded/failed
     retries: Mapped[int] = mapped_column(Integer, default=0)
     last_error: Mapped[str] = mapped_column(Text, default="")
+    # a requeued (retrying) job isn't claimable before this unix time
+    next_attempt_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    # set while a runner owns the job; a running job whose lease has expired
+    # (worker crashed) can be claimed again
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # unix time
+
+    # progress of the current attempt, in distinct chunks of the object
+    total_chunks: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    chunks_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    bytes_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # bulk jobs: objects found so far, and objects whose manifest is installed
+    objects_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    objects_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     created_at: Mapped[str] = mapped_column(
         String(64),
@@ -52,7 +88,8 @@ class Job(Base):
     @classmethod
     def create_migrate(cls, db: Session, src_node: str, dst_node: str, object_id: str) -> "Job":
         """
-        Create a migration job in queued state.
+        Create a migration job in queued state. Raises IntegrityError (session
+        rolled back) if a migrate of object_id to dst_node is already pending.
         """
         now = cls._now_iso()
         job = cls(
@@ -67,25 +104,218 @@ class Job(Base):
             updated_at=now,
         )
         db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise
+        db.refresh(job)
+        # wake an idle runner now rather than on its next poll
+        job_notifier.notify()
+        return job
+
+    @classmethod
+    def active_migrate(cls, db: Session, dst_node: str, object_id: str) -> Optional["Job"]:
+        """
+        The queued or running migrate job installing object_id on dst_node,
+        if there is one.
+        """
+        return (
+            db.query(cls)
+            .filter(
+                cls.kind == "migrate",
+                cls.status.in_(("queued", "running")),
+                cls.dst_node == dst_node,
+                cls.object_id == object_id,
+            )
+            .order_by(cls.id)
+            .first()
+        )
+
+    @classmethod
+    def create_bulk(
+        cls, db: Session, src_node: str, dst_node: str, object_ids: Optional[List[str]] = None
+    ) -> "Job":
+        """
+        Create a bulk migration job in queued state: the listed objects, or
+        with object_ids=None every object on src_node.
+        """
+        now = cls._now_iso()
+        job = cls(
+            kind="bulk",
+            src_node=src_node,
+            dst_node=dst_node,
+            object_id="*",
+            object_ids=json.dumps(object_ids) if object_ids is not None else None,
+            status="queued",
+            retries=0,
+            last_error="",
+            created_at=now,
+            updated_at=now,
+        )
+        db.add(job)
         db.commit()
         db.refresh(job)
+        job_notifier.notify()
         return job
 
-    def mark_running(self) -> None:
-        self.status = "running"
-        self.updated_at = self._now_iso()
+    @classmethod
+    def _claimable(cls, now: float):
+        expired = or_(cls.lease_expires_at.is_(None), cls.lease_expires_at < now)
+        due = or_(cls.next_attempt_at.is_(None), cls.next_attempt_at <= now)
+        return or_(and_(cls.status == "queued", due), and_(cls.status == "running", expired))
 
-    def mark_succeeded(self) -> None:
-        self.status = "succeeded"
-        self.last_error = ""
-        self.updated_at = self._now_iso()
+    @classmethod
+    def claim(
+        cls, db: Session, owner: str, lease_s: float, kinds: Sequence[str] = ("migrate",)
+    ) -> Optional[Tuple[int, str]]:
+        """
+        Atomically claim the oldest runnable job of `kinds` (queued and due, or
+        running with an expired lease) for `owner`. The claim is a conditional
+        UPDATE, so concurrent runners in this or other processes never get the
+        same job. Returns (job id, status it was claimed from), or None if
+        nothing is runnable.
+        """
+        now = time.time()
+        candidates = db.execute(
+            select(cls.id, cls.status).where(cls.kind.in_(kinds), cls._claimable(now)).order_by(cls.id.asc()).limit(8)
+        ).all()
 
-    def mark_failed(self, err: str) -> None:
-        self.status = "failed"
-        self.last_error = err
-        self.updated_at = self._now_iso()
+        for job_id, status in candidates:
+            res = db.execute(
+                update(cls)
+                .where(cls.id == job_id, cls.status == status, cls._claimable(now))
+                .values(
+                    status="running",
+                    lease_owner=owner,
+                    lease_expires_at=now + lease_s,
+                    updated_at=cls._now_iso(),
+                )
+            )
+            if res.rowcount == 1:
+                db.commit()
+                return job_id, status
+        db.rollback()
+        return None
 
-    def bump_retry(self, err: str) -> None:
-        self.retries = (self.retries or 0) + 1
-        self.last_error = err
-        self.updated_at = self._now_iso()
+    @classmethod
+    def renew_lease(cls, db: Session, job_id: int, owner: str, lease_s: float) -> bool:
+        res = db.execute(
+            update(cls)
+            .where(cls.id == job_id, cls.status == "running", cls.lease_owner == owner)
+            .values(lease_expires_at=time.time() + lease_s)
+        )
+        db.commit()
+        return res.rowcount == 1
+
+    @classmethod
+    def update_progress(
+        cls,
+        db: Session,
+        job_id: int,
+        owner: Optional[str],
+        total_chunks: int,
+        chunks_done: int,
+        bytes_done: int,
+        objects_total: int = 0,
+        objects_done: int = 0,
+    ) -> bool:
+        """
+        Record migration progress; fenced on the lease owner like release().
+        """
+        res = db.execute(
+            update(cls)
+            .where(cls.id == job_id, cls.status == "running", cls.lease_owner == owner)
+            .values(
+                total_chunks=total_chunks,
+                chunks_done=chunks_done,
+                bytes_done=bytes_done,
+                objects_total=objects_total,
+                objects_done=objects_done,
+            )
+        )
+        db.commit()
+        return res.rowcount == 1
+
+    @classmethod
+    def release(cls, db: Session, job_id: int, owner: str, status: str, err: str = "") -> bool:
+        """
+        Move a leased job to its final status. Fenced on the lease owner: a
+        runner that lost its lease can't overwrite the new owner's result.
+        """
+        res = db.execute(
+            update(cls)
+            .where(cls.id == job_id, cls.status == "running", cls.lease_owner == owner)
+            .values(
+                status=status,
+                last_error=err,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=cls._now_iso(),
+            )
+        )
+        db.commit()
+        return res.rowcount == 1
+
+    @classmethod
+    def bump_retry(cls, db: Session, job_id: int, owner: str, err: str, delay_s: float) -> bool:
+        """
+        Requeue a leased job that failed, to run again in delay_s seconds.
+        Fenced on the lease owner like release().
+        """
+        res = db.execute(
+            update(cls)
+            .where(cls.id == job_id, cls.status == "running", cls.lease_owner == owner)
+            .values(
+                status="queued",
+                retries=cls.retries + 1,
+                last_error=err,
+                next_attempt_at=time.time() + delay_s,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=cls._now_iso(),
+            )
+        )
+        db.commit()
+        return res.rowcount == 1
+
+
+class MigrationCheckpoint(Base):
+    """
+    How far a relay migration got, so a retry of the job resumes instead of
+    starting over. Positions index the distinct chunks of the manifest in
+    manifest order: every chunk before `cursor` is confirmed on the
+    destination, and bit i of `confirmed` (little-endian) marks chunk
+    cursor + i as confirmed.
+    """
+
+    __tablename__ = "migration_checkpoints"
+
+    job_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # sha256 over the manifest's chunk list; a different manifest (the object
+    # was re-ingested) invalidates the checkpoint
+    manifest_digest: Mapped[str] = mapped_column(String(64), nullable=False)
+    cursor: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    confirmed: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, default=b"")
+    bytes_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    saved_at: Mapped[float] = mapped_column(Float, nullable=False)  # unix time
+
+    @classmethod
+    def save(
+        cls, db: Session, job_id: int, manifest_digest: str, cursor: int, confirmed: bytes, bytes_done: int
+    ) -> None:
+        cp = db.get(cls, job_id)
+        if cp is None:
+            cp = cls(job_id=job_id)
+            db.add(cp)
+        cp.manifest_digest = manifest_digest
+        cp.cursor = cursor
+        cp.confirmed = confirmed
+        cp.bytes_done = bytes_done
+        cp.saved_at = time.time()
+        db.commit()
+
+    @classmethod
+    def discard(cls, db: Session, job_id: int) -> None:
+        db.execute(delete(cls).where(cls.job_id == job_id))
+        db.commit()
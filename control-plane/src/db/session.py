@@ -1,18 +1,110 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from sqlalchemy import MetaData, create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.elements import TextClause
 from src.core.config import settings
 from src.db.models import Base
 
+R = TypeVar("R")
+
+logger = logging.getLogger(__name__)
+
+_sqlite = settings.database_url.startswith("sqlite")
+
 _engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
+    connect_args={"check_same_thread": False} if _sqlite else {},
 )
 
+if _sqlite:
+
+    @event.listens_for(_engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        # WAL: readers (GET /jobs, /metrics) don't block the runner's writes
+        # and vice versa; a writer waits up to busy_timeout for the lock
+        # instead of failing with "database is locked"
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA busy_timeout={settings.db_busy_timeout_ms}")
+        cur.close()
+
+
 SessionLocal = sessionmaker(bind=_engine, autoflush=False, autocommit=False)
 
+# DB work of the async job path (claims, leases, progress) runs here, never
+# on the event loop; each call is one short session.
+_db_pool = ThreadPoolExecutor(max_workers=settings.db_workers, thread_name_prefix="db")
+
+
+async def run_db(fn: Callable[..., R], *args) -> R:
+    """
+    Run fn(db, *args) with a fresh session on the DB executor.
+    """
+
+    def call() -> R:
+        db: Session = SessionLocal()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    return await asyncio.get_running_loop().run_in_executor(_db_pool, call)
+
+
+def _add_missing_columns(engine: Engine = _engine, metadata: MetaData = Base.metadata) -> None:
+    # create_all() never alters existing tables, so columns added to a model
+    # after the DB was created are appended here (ALTER TABLE ADD COLUMN).
+    # SQLite can only add a NOT NULL column to a non-empty table with a
+    # default, so a new non-null column without server_default is added as
+    # nullable; give new columns a server_default to keep them NOT NULL.
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            present = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in present:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(engine.dialect)}"
+                if col.server_default is not None:
+                    default = col.server_default.arg
+                    ddl += f" DEFAULT {default.text}" if isinstance(default, TextClause) else f" DEFAULT '{default}'"
+                    if not col.nullable:
+                        ddl += " NOT NULL"
+                elif not col.nullable:
+                    logger.warning("column %s.%s has no server_default: added as nullable", table.name, col.name)
+                conn.execute(text(ddl))
+
+
+def _add_missing_indexes() -> None:
+    # likewise for indexes added to a model later (e.g. jobs.status)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=_engine, checkfirst=True)
+            except IntegrityError:
+                # a unique index the existing rows already violate (e.g. two
+                # pending migrates of one object from before it existed)
+                logger.warning("index %s not created: existing rows violate it", index.name)
+
 
 def init_db() -> None:
     Base.metadata.create_all(bind=_engine)
+    _add_missing_columns()
+    _add_missing_indexes()
+
+
+def shutdown_db() -> None:
+    _db_pool.shutdown(wait=True)
+    _engine.dispose()
 
 
 def get_db():
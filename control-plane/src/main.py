@@ -6,11 +6,14 @@ from fastapi import FastAPI
 from src.api.health import router as health_router
 from src.api.nodes import router as nodes_router
 from src.api.jobs import router as jobs_router
-from src.api.metrics import router as metrics_router
+from src.api.metrics import router as metrics_router, load_from_db, register_collectors
 
-from src.db.session import init_db
+from src.core.http_client import http_client
+from src.db.session import init_db, run_db, shutdown_db
 from src.services.job_runner import JobRunner
 
+# level and timestamp for the app's module loggers (uvicorn configures its own)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 logger = logging.getLogger("replicator")
 
 app = FastAPI(title="Replicator Control Plane", version="0.1.0")
@@ -20,6 +23,9 @@ runner = JobRunner()
 @app.on_event("startup")
 async def on_startup():
     init_db()
+    await run_db(load_from_db)
+    register_collectors()
+    await http_client.start()
     logger.info("Starting JobRunner background task...")
     asyncio.create_task(runner.run_forever())
 
@@ -27,6 +33,8 @@ async def on_startup():
 @app.on_event("shutdown")
 async def on_shutdown():
     runner.stop()
+    await http_client.close()
+    shutdown_db()
 
 
 app.include_router(health_router)
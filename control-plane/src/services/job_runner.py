@@ -1,67 +1,182 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
 from sqlalchemy.orm import Session
 
-from src.db.session import SessionLocal
-from src.db.models import Job
+from src.api.metrics import (
+    job_queue_wait_seconds,
+    job_retries_total,
+    job_transition,
+    migration_bytes,
+    migration_chunks_skipped,
+    migration_duration_seconds,
+)
+from src.core.config import settings
+from src.core.retry import PermanentError, backoff_delay
+from src.core.scheduler import job_notifier
+from src.db.session import run_db
+from src.db.models import Job, MigrationCheckpoint
 from src.services.migration_service import MigrationService
 
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("migrate", "bulk")
+
+
+def _utc_ts(iso: str) -> float:
+    # created_at is a naive utcnow().isoformat()
+    return datetime.fromisoformat(iso).replace(tzinfo=timezone.utc).timestamp()
+
 
 class JobRunner:
-    def __init__(self, poll_interval_s: float = 1.0):
-        self.poll_interval_s = poll_interval_s
+    """
+    Pool of `workers` concurrent job executors sharing the jobs table.
+    Each job is claimed with a lease (owner + expiry) that is heartbeated while
+    the migration runs, so several runners or control-plane replicas can share
+    the queue and jobs of a crashed worker are picked up once the lease expires.
+
+    Idle workers sleep on job_notifier, so a job queued in this process starts
+    right away; DB polling with exponential backoff (poll_interval_s up to
+    max_poll_interval_s) only covers jobs queued elsewhere and lease expiry.
+
+    A failed attempt is requeued with exponential backoff up to
+    settings.job_max_retries times (a relay migration resumes from its
+    checkpoint); PermanentError fails the job at once.
+    """
+
+    def __init__(
+        self,
+        poll_interval_s: Optional[float] = None,
+        workers: Optional[int] = None,
+        lease_s: Optional[float] = None,
+        max_poll_interval_s: Optional[float] = None,
+    ):
+        self.poll_interval_s = poll_interval_s or settings.job_poll_min_s
+        self.max_poll_interval_s = max(max_poll_interval_s or settings.job_poll_max_s, self.poll_interval_s)
+        self.workers = workers or settings.job_workers
+        self.lease_s = lease_s or settings.job_lease_s
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
         self._stop = asyncio.Event()
         self.migrator = MigrationService()
 
     async def run_forever(self):
+        job_notifier.bind(asyncio.get_running_loop())
+        await asyncio.gather(*(self._worker() for _ in range(self.workers)))
+
+    async def _worker(self):
+        idle_s = self.poll_interval_s
         while not self._stop.is_set():
+            job_notifier.clear()
+            ran = False
             try:
-                await self._run_once()
-            except Exception as e:
-                print("JobRunner error:", repr(e))
-            await asyncio.sleep(self.poll_interval_s)
+                ran = await self._run_once()
+            except Exception:
+                logger.exception("job runner error")
+            if ran:
+                idle_s = self.poll_interval_s
+                continue
 
-    async def _run_once(self):
-        db: Session = SessionLocal()
-        try:
-            job = (
-                db.query(Job)
-                .filter(Job.status == "queued", Job.kind == "migrate")
-                .order_by(Job.id.asc())
-                .first()
-            )
-            if not job:
-                return
+            # queue empty: sleep until notified, or poll again after backoff
+            if await job_notifier.wait(idle_s):
+                idle_s = self.poll_interval_s
+            else:
+                idle_s = min(idle_s * 2, self.max_poll_interval_s)
 
-            job.mark_running()
-            db.commit()
-            job_id = job.id
+    async def _run_once(self) -> bool:
+        claimed = await run_db(Job.claim, self.owner, self.lease_s, JOB_KINDS)
+        if claimed is None:
+            return False
+        job_id, claimed_from = claimed
+        job_transition(claimed_from, "running")
 
-        finally:
-            db.close()
+        # do the actual migration outside any DB session
+        await self._execute(job_id, claimed_from)
+        return True
 
-        # do the actual migration outside the DB session scope
-        await self._execute(job_id)
+    @staticmethod
+    def _load_job(db: Session, job_id: int) -> Optional[Job]:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if job is not None:
+            # detach: the migration only reads plain attributes
+            db.expunge(job)
+        return job
 
-    async def _execute(self, job_id: int):
-        # read everything you need from DB
-        db: Session = SessionLocal()
-        try:
-            job = db.query(Job).filter(Job.id == job_id).first()
-            if not job:
-                return
+    def _finish(self, db: Session, job_id: int, status: str, err: str, delay: float) -> bool:
+        if status == "retry":
+            return Job.bump_retry(db, job_id, self.owner, err, delay)
+        released = Job.release(db, job_id, self.owner, status, err)
+        if released and status == "failed":
+            MigrationCheckpoint.discard(db, job_id)
+        return released
 
-            # migrate does HTTP async, but DB reads are sync here
-            try:
-                await self.migrator.migrate_object(job)
-                job.mark_succeeded()
-            except Exception as e:
-                job.mark_failed(str(e))
+    async def _execute(self, job_id: int, claimed_from: str = "queued"):
+        job = await run_db(self._load_job, job_id)
+        if not job:
+            return
+        labels = {"src": job.src_node, "dst": job.dst_node}
+        if claimed_from == "queued":
+            # runnable since creation, or since its retry came due
+            runnable_at = job.next_attempt_at or _utc_ts(job.created_at)
+            job_queue_wait_seconds.labels(**labels).observe(max(time.time() - runnable_at, 0.0))
 
-            db.commit()
+        started = time.monotonic()
+        migration = asyncio.create_task(self.migrator.run(job))
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, migration, lease_lost))
+        try:
+            result = await migration
+            status, err = "succeeded", ""
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise
+            logger.warning("lost lease on job %s, abandoning it", job_id)
+            return
+        except PermanentError as e:
+            status, err = "failed", str(e)
+        except Exception as e:
+            status, err = ("retry" if job.retries < settings.job_max_retries else "failed"), str(e)
         finally:
-            db.close()
+            heartbeat.cancel()
+        migration_duration_seconds.labels(status=status, **labels).observe(time.monotonic() - started)
+
+        delay = backoff_delay(job.retries + 1, settings.job_retry_base_s, settings.job_retry_max_s)
+        if not await run_db(self._finish, job_id, status, err, delay):
+            logger.warning("job %s was reclaimed before it finished; result dropped", job_id)
+            return
+
+        if status == "retry":
+            job_transition("running", "queued")
+            job_retries_total.labels(**labels).inc()
+            # wake a worker when the retry is due instead of on a later poll
+            asyncio.get_running_loop().call_later(delay, job_notifier.notify)
+        else:
+            job_transition("running", status)
+        if status == "succeeded":
+            migration_bytes.labels(**labels).observe(result["bytes"])
+            migration_chunks_skipped.labels(**labels).observe(result["chunks_skipped"])
+
+    async def _heartbeat(self, job_id: int, migration: asyncio.Task, lease_lost: asyncio.Event):
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            try:
+                renewed = await run_db(Job.renew_lease, job_id, self.owner, self.lease_s)
+            except Exception:
+                # transient DB error: keep going, the next beat may succeed
+                logger.exception("heartbeat for job %s failed", job_id)
+                continue
+            if not renewed:
+                lease_lost.set()
+                migration.cancel()
+                return
 
     def stop(self):
         self._stop.set()
+        # let idle workers see the stop flag now
+        job_notifier.notify()
@@ -1,79 +1,594 @@
 from __future__ import annotations
 
-import aiohttp
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from itertools import repeat
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
 
-from src.db.session import SessionLocal
-from src.db.models import Node, Job
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.core.http_client import HttpClient, http_client
+from src.core.retry import PermanentError, retry_async
+from src.core.wire import CODECS_HEADER, FRAMES_MEDIA_TYPE
+from src.db.session import run_db
+from src.db.models import Node, Job, MigrationCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# hashes per POST /chunks/missing request
+MISSING_BATCH = 1000
+
+# multi-chunk copies: up to COPY_BATCH_BYTES / COPY_BATCH_MAX_CHUNKS per request,
+# COPY_CONCURRENCY requests in flight, COPY_INFLIGHT_BYTES of chunks in flight in total
+COPY_BATCH_BYTES = 16 * 1024 * 1024
+COPY_BATCH_MAX_CHUNKS = 256
+COPY_CONCURRENCY = 4
+COPY_INFLIGHT_BYTES = 64 * 1024 * 1024
+RELAY_READ_BYTES = 256 * 1024
+
+# how often a running job's progress is written to its row
+PROGRESS_INTERVAL_S = 1.0
+
+# bulk jobs: objects are migrated in groups of up to BULK_GROUP_OBJECTS
+# objects / BULK_GROUP_CHUNKS chunk references; each distinct chunk of a group
+# is checked and copied once, however many of its objects share it
+BULK_GROUP_OBJECTS = 256
+BULK_GROUP_CHUNKS = 200_000
+# chunks confirmed by earlier groups are remembered (and skipped) up to this many
+BULK_SEEN_MAX = 1_000_000
+# concurrent manifest GETs (listed objects) and PUTs
+MANIFEST_CONCURRENCY = 8
+
+
+def _copy_batches(hashes: list[str], size_of: Callable[[str], int]) -> Iterator[list[str]]:
+    batch: list[str] = []
+    nbytes = 0
+    for h in hashes:
+        n = size_of(h)
+        if batch and (nbytes + n > COPY_BATCH_BYTES or len(batch) >= COPY_BATCH_MAX_CHUNKS):
+            yield batch
+            batch, nbytes = [], 0
+        batch.append(h)
+        nbytes += n
+    if batch:
+        yield batch
+
+
+class _ByteBudget:
+    """
+    Caps the bytes of chunk data in flight across a job's copy workers; a
+    worker waits for budget before starting a batch (backpressure).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, n: int):
+        # a batch larger than the whole budget still runs, alone
+        n = min(n, self.limit)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.used + n <= self.limit)
+            self.used += n
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.used -= n
+                self._cond.notify_all()
+
+
+class _Checkpoint:
+    """
+    Which distinct chunks of a relay migration are confirmed on the
+    destination (found there or copied), as a bitmap over their positions
+    plus the cursor below which every chunk is confirmed.
+    """
+
+    def __init__(self, manifest_digest: str, n: int):
+        self.manifest_digest = manifest_digest
+        self.n = n
+        self.bits = bytearray((n + 7) // 8)
+        self.cursor = 0
+        self.count = 0
+
+    def has(self, i: int) -> bool:
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def confirm(self, i: int) -> None:
+        if not self.has(i):
+            self.bits[i >> 3] |= 1 << (i & 7)
+            self.count += 1
+            while self.cursor < self.n and self.has(self.cursor):
+                self.cursor += 1
+
+    def restore(self, cursor: int, confirmed: bytes) -> None:
+        cursor = min(cursor, self.n)
+        bits = (int.from_bytes(confirmed, "little") << cursor | ((1 << cursor) - 1)) & ((1 << self.n) - 1)
+        self.bits = bytearray(bits.to_bytes(len(self.bits), "little"))
+        self.count = bits.bit_count()
+        self.cursor = 0
+        while self.cursor < self.n and self.has(self.cursor):
+            self.cursor += 1
+
+    def dump(self) -> tuple[int, bytes]:
+        # only the bits past the cursor are stored
+        rest = int.from_bytes(self.bits, "little") >> self.cursor
+        return self.cursor, rest.to_bytes((self.n - self.cursor + 7) // 8, "little")
+
+
+class _Progress:
+    """
+    Per-job chunk/byte counters, written to the Job row (with the relay
+    checkpoint, if any) at most every PROGRESS_INTERVAL_S and on flush.
+    """
+
+    def __init__(self, job: Job):
+        self.job_id = job.id
+        self.owner = job.lease_owner
+        self.total_chunks = 0
+        self.chunks_done = 0
+        self.bytes_done = 0
+        # distinct chunks the destination already had (dedup)
+        self.chunks_skipped = 0
+        self.objects_total = 0
+        self.objects_done = 0
+        self.checkpoint: Optional[_Checkpoint] = None
+        self._written_at = 0.0
+        self._pending: Optional[asyncio.Future] = None
+
+    def set(self, total_chunks: int, chunks_done: int, bytes_done: int) -> None:
+        self.total_chunks, self.chunks_done, self.bytes_done = total_chunks, chunks_done, bytes_done
+        self._maybe_flush()
+
+    def add(self, chunks: int, nbytes: int) -> None:
+        self.chunks_done += chunks
+        self.bytes_done += nbytes
+        self._maybe_flush()
+
+    def object_done(self) -> None:
+        self.objects_done += 1
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        # written in the background: counting never waits on the DB
+        if self._pending is None and time.monotonic() - self._written_at >= PROGRESS_INTERVAL_S:
+            self._pending = asyncio.ensure_future(self._write())
+            self._pending.add_done_callback(self._written)
+
+    def _written(self, fut: asyncio.Future) -> None:
+        self._pending = None
+        if not fut.cancelled() and fut.exception() is not None:
+            logger.warning("progress write for job %s failed: %r", self.job_id, fut.exception())
+
+    async def _write(self) -> None:
+        self._written_at = time.monotonic()
+        cp = None
+        if self.checkpoint is not None:
+            cp = (self.checkpoint.manifest_digest, *self.checkpoint.dump())
+        counts = (self.total_chunks, self.chunks_done, self.bytes_done, self.objects_total, self.objects_done)
+        await run_db(self._save, counts, cp)
+
+    def _save(self, db: Session, counts: tuple, cp: Optional[tuple]) -> None:
+        owned = Job.update_progress(db, self.job_id, self.owner, *counts)
+        bytes_done = counts[2]
+        if owned and cp is not None:
+            MigrationCheckpoint.save(db, self.job_id, *cp, bytes_done)
+
+    async def _settle(self) -> None:
+        if self._pending is not None:
+            await asyncio.wait([self._pending])
+
+    async def flush(self) -> None:
+        # after any background write, so an older snapshot never lands last
+        await self._settle()
+        await self._write()
+
+    async def drop_checkpoint(self) -> None:
+        self.checkpoint = None
+        await self._settle()
+        await run_db(MigrationCheckpoint.discard, self.job_id)
+
+
+async def _gather_or_cancel(aws: list[Awaitable]) -> list:
+    tasks = [asyncio.ensure_future(a) for a in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        # on failure, don't leave sibling tasks running
+        for t in tasks:
+            t.cancel()
 
 
 class MigrationService:
-    def __init__(self, timeout_s: float = 30.0):
-        self.timeout = aiohttp.ClientTimeout(total=timeout_s)
+    def __init__(self, http: HttpClient | None = None, mode: str | None = None):
+        self.http = http or http_client
+        self.mode = mode or settings.migration_mode
+        if self.mode not in ("direct", "relay"):
+            raise ValueError(f"unknown migration mode {self.mode!r}")
 
-    async def migrate_object(self, job: Job) -> None:
-        # 1) Lookup node base URLs from DB (sync)
-        db = SessionLocal()
+    async def _retry(self, fn):
+        # node requests are idempotent; retry transient failures in place
+        # before failing the whole job attempt
+        return await retry_async(fn, attempts=settings.http_retries)
+
+    async def run(self, job: Job) -> dict:
+        if job.kind == "bulk":
+            return await self.migrate_bulk(job)
+        return await self.migrate_object(job)
+
+    async def migrate_object(self, job: Job) -> dict:
+        # 1) Lookup node base URLs from DB (on the DB executor)
+        src_base, dst_base = await run_db(self._node_urls, job.src_node, job.dst_node)
+
+        progress = _Progress(job)
+        progress.objects_total = 1
         try:
-            src: Node | None = db.query(Node).filter(Node.name == job.src_node).first()
-            dst: Node | None = db.query(Node).filter(Node.name == job.dst_node).first()
-            if not src or not dst:
-                raise RuntimeError(f"Unknown node(s): src={job.src_node} dst={job.dst_node}")
+            if self.mode == "direct":
+                await self._migrate_direct(src_base, dst_base, job.object_id, progress)
+            else:
+                await self._migrate_relay(src_base, dst_base, job.object_id, progress)
+            progress.objects_done = 1
+        finally:
+            # on failure this saves how far the attempt got, for the retry
+            await progress.flush()
+        return self._summary(progress)
+
+    async def migrate_bulk(self, job: Job) -> dict:
+        """
+        Migrate the job's listed objects, or every object on src (drain), in
+        groups: each group's manifests are fetched, the union of their chunks
+        goes through one delta check and copy pipeline, then the manifests are
+        installed on dst. Chunk data always flows through the control plane
+        here (whatever MIGRATION_MODE says), since only it sees every
+        manifest. A retried bulk job starts over, but re-copies nothing: dst
+        reports everything already copied as present.
+        """
+        src_base, dst_base = await run_db(self._node_urls, job.src_node, job.dst_node)
 
-            src_base = src.base_url.rstrip("/")
-            dst_base = dst.base_url.rstrip("/")
+        progress = _Progress(job)
+        codecs = await self._retry(lambda: self._dst_codecs(dst_base))
+        seen: set[str] = set()
+        not_found: list[str] = []
+        try:
+            if job.object_ids is not None:
+                object_ids = json.loads(job.object_ids)
+                progress.objects_total = len(object_ids)
+                groups = self._listed_groups(src_base, object_ids, not_found)
+            else:
+                groups = self._drain_groups(src_base, progress)
+            async for manifests in groups:
+                await self._migrate_group(src_base, dst_base, manifests, codecs, seen, progress)
         finally:
-            db.close()
+            await progress.flush()
+
+        if not_found:
+            shown = ", ".join(not_found[:10]) + (", ..." if len(not_found) > 10 else "")
+            raise PermanentError(f"{len(not_found)} object(s) not found on source: {shown}")
+        return self._summary(progress)
+
+    @staticmethod
+    def _summary(progress: _Progress) -> dict:
+        return {
+            "total_chunks": progress.total_chunks,
+            "chunks_skipped": progress.chunks_skipped,
+            "bytes": progress.bytes_done,
+            "objects": progress.objects_done,
+        }
+
+    @staticmethod
+    def _node_urls(db: Session, src_node: str, dst_node: str) -> tuple[str, str]:
+        src: Node | None = db.query(Node).filter(Node.name == src_node).first()
+        dst: Node | None = db.query(Node).filter(Node.name == dst_node).first()
+        if not src or not dst:
+            raise PermanentError(f"Unknown node(s): src={src_node} dst={dst_node}")
+        return src.base_url.rstrip("/"), dst.base_url.rstrip("/")
+
+    async def _migrate_direct(self, src_base: str, dst_base: str, object_id: str, progress: _Progress) -> None:
+        # 2) Tell the destination to pull from the source itself, then wait for
+        # it; object bytes never pass through the control plane. A retried job
+        # resumes by itself: chunks an earlier pull stored are already on dst
+        # and its local delta check skips them.
+        session = self.http.session
+        pull_url = f"{dst_base}/replication/pull"
+
+        async def start() -> dict:
+            async with session.post(pull_url, json={"object_id": object_id, "source_url": src_base}) as r:
+                if r.status != 202:
+                    text = await r.text()
+                    raise RuntimeError(f"dst pull request failed {r.status}: {text}")
+                return await r.json()
+
+        pull = await self._retry(start)
+        status_url = f"{dst_base}/replication/pull/{pull['pull_id']}"
+
+        async def poll() -> dict:
+            async with session.get(status_url) as r:
+                if r.status != 200:
+                    text = await r.text()
+                    raise RuntimeError(f"dst pull status failed {r.status}: {text}")
+                return await r.json()
 
-        object_id = job.object_id
+        while pull["status"] == "running":
+            await asyncio.sleep(settings.pull_poll_interval_s)
+            pull = await self._retry(poll)
+            self._pull_progress(pull, progress)
 
+        if pull["status"] != "succeeded":
+            # only dst saw the error; don't retry an object src doesn't have
+            async with session.get(f"{src_base}/objects/{object_id}/manifest") as r:
+                if r.status == 404:
+                    raise PermanentError(f"object {object_id} not found on source")
+            raise RuntimeError(f"dst pull failed: {pull['error']}")
+        self._pull_progress(pull, progress)
+
+    @staticmethod
+    def _pull_progress(pull: dict, progress: _Progress) -> None:
+        # chunks the destination already had count as done
+        total = pull.get("unique_chunks", pull["total_chunks"])
+        progress.chunks_skipped = total - pull["missing_chunks"]
+        progress.set(total, progress.chunks_skipped + pull["copied_chunks"], pull["bytes_copied"])
+
+    async def _migrate_relay(self, src_base: str, dst_base: str, object_id: str, progress: _Progress) -> None:
         # 2) Pull manifest from source (async HTTP)
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            manifest_url = f"{src_base}/objects/{object_id}/manifest"
-            async with session.get(manifest_url) as r:
+        manifest = await self._retry(lambda: self._fetch_manifest(src_base, object_id))
+        if manifest is None:
+            raise PermanentError(f"object {object_id} not found on source")
+
+        chunks: list[str] = manifest.get("chunks", [])
+        unique = list(dict.fromkeys(chunks))
+
+        # resume from the last attempt's checkpoint: chunks it confirmed on
+        # dst are neither checked nor copied again
+        checkpoint = _Checkpoint(hashlib.sha256("\n".join(unique).encode()).hexdigest(), len(unique))
+        resumed_bytes = await run_db(self._load_checkpoint, progress.job_id, checkpoint)
+        progress.checkpoint = checkpoint
+        progress.set(len(unique), checkpoint.count, resumed_bytes)
+
+        # chunk sizes, for batching and the in-flight byte budget
+        if manifest.get("chunk_sizes"):
+            sizes = dict(zip(chunks, manifest["chunk_sizes"]))
+            size_of = sizes.__getitem__
+        else:
+            chunk_size = int(manifest.get("chunk_size") or 0)
+            size_of = lambda h: chunk_size
+
+        codecs = await self._retry(lambda: self._dst_codecs(dst_base))
+
+        # 3) Copy the chunks dst is missing
+        await self._copy_missing(src_base, dst_base, unique, size_of, codecs, checkpoint, progress)
+
+        # 4) Install the source manifest on the destination; every chunk is
+        # already there, so this moves O(manifest) bytes, not the object
+        status, text = await self._retry(lambda: self._put_manifest(dst_base, object_id, manifest))
+        if status == 409:
+            # chunks the checkpoint trusted are gone from dst (GC'd while
+            # unreferenced); the retry starts over and re-checks everything
+            await progress.drop_checkpoint()
+        if status != 200:
+            raise RuntimeError(f"dst manifest PUT failed {status}: {text}")
+
+        await progress.drop_checkpoint()
+
+    async def _copy_missing(
+        self,
+        src_base: str,
+        dst_base: str,
+        unique: list[str],
+        size_of: Callable[[str], int],
+        codecs: list[str],
+        checkpoint: _Checkpoint,
+        progress: _Progress,
+    ) -> None:
+        """
+        Make sure dst has every chunk in `unique` (distinct hashes), skipping
+        those `checkpoint` already confirms and confirming the rest as they
+        are found on dst or copied there.
+        """
+        position = {h: i for i, h in enumerate(unique)}
+        budget = _ByteBudget(COPY_INFLIGHT_BYTES)
+        batches: asyncio.Queue[Optional[list[str]]] = asyncio.Queue(maxsize=COPY_CONCURRENCY * 2)
+
+        # Pipeline: the delta check feeds copy batches to COPY_CONCURRENCY
+        # workers as each /chunks/missing reply arrives, so checks, fetches
+        # and stores overlap; the queue bound and byte budget keep a fast
+        # checker from running ahead of the copies.
+        async def check() -> None:
+            for start in range(checkpoint.cursor, len(unique), MISSING_BATCH):
+                window = [h for h in unique[start : start + MISSING_BATCH] if not checkpoint.has(position[h])]
+                if not window:
+                    continue
+                missing = await self._retry(lambda: self._missing(dst_base, window))
+                absent = set(missing)
+                for h in window:
+                    if h not in absent:
+                        checkpoint.confirm(position[h])
+                progress.chunks_skipped += len(window) - len(missing)
+                progress.add(len(window) - len(missing), 0)
+                for batch in _copy_batches(missing, size_of):
+                    await batches.put(batch)
+            for _ in range(COPY_CONCURRENCY):
+                await batches.put(None)
+
+        async def copy() -> None:
+            while (batch := await batches.get()) is not None:
+                async with budget.reserve(sum(size_of(h) for h in batch)):
+                    result = await self._retry(lambda: self._copy_batch(src_base, dst_base, batch, codecs))
+                for h in batch:
+                    checkpoint.confirm(position[h])
+                progress.add(len(batch), result["bytes"])
+
+        await _gather_or_cancel([check()] + [copy() for _ in range(COPY_CONCURRENCY)])
+
+    async def _listed_groups(
+        self, src_base: str, object_ids: list[str], not_found: list[str]
+    ) -> AsyncIterator[list[dict]]:
+        # manifests of the listed objects, MANIFEST_CONCURRENCY fetches at a time
+        group: list[dict] = []
+        nchunks = 0
+        for i in range(0, len(object_ids), MANIFEST_CONCURRENCY):
+            ids = object_ids[i : i + MANIFEST_CONCURRENCY]
+            fetched = await _gather_or_cancel(
+                [self._retry(lambda oid=oid: self._fetch_manifest(src_base, oid)) for oid in ids]
+            )
+            for oid, m in zip(ids, fetched):
+                if m is None:
+                    not_found.append(oid)
+                    continue
+                group.append(m)
+                nchunks += len(m["chunks"])
+            if len(group) >= BULK_GROUP_OBJECTS or nchunks >= BULK_GROUP_CHUNKS:
+                yield group
+                group, nchunks = [], 0
+        if group:
+            yield group
+
+    async def _drain_groups(self, src_base: str, progress: _Progress) -> AsyncIterator[list[dict]]:
+        # every object on src, a page of manifests per group
+        list_url = f"{src_base}/objects"
+        cursor: Optional[str] = None
+
+        async def page() -> dict:
+            params = {"limit": str(BULK_GROUP_OBJECTS), "manifests": "true"}
+            if cursor is not None:
+                params["cursor"] = cursor
+            async with self.http.session.get(list_url, params=params) as r:
+                if r.status in (404, 405):
+                    raise PermanentError("source node can't list its objects (GET /objects)")
                 if r.status != 200:
                     text = await r.text()
-                    raise RuntimeError(f"manifest fetch failed {r.status}: {text}")
-                manifest = await r.json()
-
-            chunks: list[str] = manifest.get("chunks", [])
-            if not chunks:
-                raise RuntimeError("manifest has no chunks")
-
-            # 3) Ensure chunks exist on destination (copy missing chunks)
-            for ch in chunks:
-                head_url = f"{dst_base}/chunks/{ch}"
-                async with session.head(head_url) as head:
-                    if head.status == 200:
-                        continue
-                    if head.status not in (404,):
-                        raise RuntimeError(f"dst HEAD chunk {ch} unexpected {head.status}")
-
-                # fetch from source
-                get_url = f"{src_base}/chunks/{ch}"
-                async with session.get(get_url) as gr:
-                    if gr.status != 200:
-                        text = await gr.text()
-                        raise RuntimeError(f"src GET chunk {ch} failed {gr.status}: {text}")
-                    data = await gr.read()
-
-                # put into destination
-                put_url = f"{dst_base}/chunks/{ch}"
-                async with session.put(put_url, data=data) as pr:
-                    if pr.status != 200:
-                        text = await pr.text()
-                        raise RuntimeError(f"dst PUT chunk {ch} failed {pr.status}: {text}")
-
-            # 4) Rebuild object on destination by ingesting the full object bytes
-            # simplest: stream whole object from source and ingest into dst
-            obj_get = f"{src_base}/objects/{object_id}"
-            async with session.get(obj_get) as ogr:
-                if ogr.status != 200:
-                    text = await ogr.text()
-                    raise RuntimeError(f"src GET object failed {ogr.status}: {text}")
-                obj_bytes = await ogr.read()
-
-            ingest_url = f"{dst_base}/objects/{object_id}/ingest"
-            async with session.post(ingest_url, data=obj_bytes) as ir:
-                if ir.status != 200:
-                    text = await ir.text()
-                    raise RuntimeError(f"dst ingest failed {ir.status}: {text}")
+                    raise RuntimeError(f"src object listing failed {r.status}: {text}")
+                return await r.json()
+
+        while True:
+            listing = await self._retry(page)
+            if listing["objects"]:
+                progress.objects_total += len(listing["objects"])
+                yield listing["objects"]
+            cursor = listing["next_cursor"]
+            if cursor is None:
+                return
+
+    async def _migrate_group(
+        self,
+        src_base: str,
+        dst_base: str,
+        manifests: list[dict],
+        codecs: list[str],
+        seen: set[str],
+        progress: _Progress,
+    ) -> None:
+        # the group's distinct chunks, minus those earlier groups confirmed
+        sizes: dict[str, int] = {}
+        for m in manifests:
+            for h, n in zip(m["chunks"], m.get("chunk_sizes") or repeat(int(m.get("chunk_size") or 0))):
+                sizes.setdefault(h, n)
+        unique = [h for h in sizes if h not in seen]
+        progress.total_chunks += len(unique)
+
+        await self._copy_missing(
+            src_base, dst_base, unique, sizes.__getitem__, codecs, _Checkpoint("", len(unique)), progress
+        )
+
+        sem = asyncio.Semaphore(MANIFEST_CONCURRENCY)
+
+        async def install(m: dict) -> None:
+            async with sem:
+                status, text = await self._retry(lambda: self._put_manifest(dst_base, m["object_id"], m))
+            if status != 200:
+                raise RuntimeError(f"dst manifest PUT for {m['object_id']} failed {status}: {text}")
+            progress.object_done()
+
+        await _gather_or_cancel([install(m) for m in manifests])
+
+        if len(seen) + len(unique) > BULK_SEEN_MAX:
+            seen.clear()
+        seen.update(unique)
+
+    async def _fetch_manifest(self, src_base: str, object_id: str) -> Optional[dict]:
+        """
+        The object's manifest on src, or None if src doesn't have it.
+        """
+        async with self.http.session.get(f"{src_base}/objects/{object_id}/manifest") as r:
+            if r.status == 404:
+                return None
+            if r.status != 200:
+                text = await r.text()
+                raise RuntimeError(f"manifest fetch failed {r.status}: {text}")
+            return await r.json()
+
+    async def _put_manifest(self, dst_base: str, object_id: str, manifest: dict) -> tuple[int, str]:
+        body = {
+            "size_bytes": manifest["size_bytes"],
+            "chunk_size": manifest["chunk_size"],
+            "chunks": manifest["chunks"],
+            "chunker": manifest.get("chunker", "fixed"),
+            "chunk_sizes": manifest.get("chunk_sizes"),
+        }
+        async with self.http.session.put(f"{dst_base}/objects/{object_id}/manifest", json=body) as r:
+            text = await r.text()
+            # 4xx is the caller's to interpret (409: chunks missing on dst)
+            if r.status >= 500:
+                raise RuntimeError(f"dst manifest PUT failed {r.status}: {text}")
+            return r.status, text
+
+    @staticmethod
+    def _load_checkpoint(db: Session, job_id: int, checkpoint: _Checkpoint) -> int:
+        """
+        Restore `checkpoint` from the job's saved one if it is for the same
+        manifest and recent enough; returns the bytes copied before it.
+        """
+        saved = db.get(MigrationCheckpoint, job_id)
+        if saved is None or saved.manifest_digest != checkpoint.manifest_digest:
+            return 0
+        # dst only protects unreferenced chunks for its GC grace period
+        if time.time() - saved.saved_at > settings.migration_checkpoint_ttl_s:
+            return 0
+        checkpoint.restore(saved.cursor, saved.confirmed)
+        return saved.bytes_done
+
+    async def _missing(self, dst_base: str, hashes: list[str]) -> list[str]:
+        async with self.http.session.post(f"{dst_base}/chunks/missing", json={"hashes": hashes}) as mr:
+            if mr.status != 200:
+                text = await mr.text()
+                raise RuntimeError(f"dst missing-chunks check failed {mr.status}: {text}")
+            return (await mr.json())["missing"]
+
+    async def _copy_batch(self, src_base: str, dst_base: str, batch: list[str], codecs: list[str]) -> dict:
+        # frames stream from src /chunks/batch/get straight into dst /chunks/batch/put;
+        # chunks src stores compressed stay compressed when dst can decode the codec
+        session = self.http.session
+        get_url = f"{src_base}/chunks/batch/get"
+        get_headers = {CODECS_HEADER: ",".join(codecs)}
+        async with session.post(get_url, json={"hashes": batch}, headers=get_headers) as gr:
+            if gr.status != 200:
+                text = await gr.text()
+                raise RuntimeError(f"src batch GET failed {gr.status}: {text}")
+
+            put_url = f"{dst_base}/chunks/batch/put"
+            async with session.post(
+                put_url,
+                data=gr.content.iter_chunked(RELAY_READ_BYTES),
+                headers={"Content-Type": FRAMES_MEDIA_TYPE},
+            ) as pr:
+                if pr.status != 200:
+                    text = await pr.text()
+                    raise RuntimeError(f"dst batch PUT failed {pr.status}: {text}")
+                return await pr.json()
+
+    async def _dst_codecs(self, dst_base: str) -> list[str]:
+        async with self.http.session.get(f"{dst_base}/chunks/codecs") as r:
+            if r.status in (400, 404):
+                # node predates compression (no such route): raw frames only
+                return []
+            if r.status != 200:
+                text = await r.text()
+                raise RuntimeError(f"dst codecs fetch failed {r.status}: {text}")
+            return (await r.json())["codecs"]
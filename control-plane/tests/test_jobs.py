@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from src.db.models import Base, Job
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _claim(db, owner):
+    claimed = Job.claim(db, owner, lease_s=30, kinds=("migrate",))
+    return claimed[0] if claimed else None
+
+
+def _queue(db, n=1):
+    return [Job.create_migrate(db, "node1", "node2", f"obj-{i}").id for i in range(n)]
+
+
+def test_claim_takes_oldest_queued_job_once(db):
+    first, second = _queue(db, 2)
+
+    assert _claim(db, "a") == first
+    assert _claim(db, "b") == second
+    assert _claim(db, "c") is None
+
+    job = db.get(Job, first)
+    db.refresh(job)
+    assert job.status == "running"
+    assert job.lease_owner == "a"
+
+
+def test_expired_lease_is_reclaimed(db):
+    (job_id,) = _queue(db)
+    assert _claim(db, "crashed") == job_id
+
+    db.get(Job, job_id).lease_expires_at = time.time() - 1
+    db.commit()
+
+    assert _claim(db, "b") == job_id
+    assert not Job.renew_lease(db, job_id, "crashed", lease_s=30)
+    assert Job.renew_lease(db, job_id, "b", lease_s=30)
+
+
+def test_release_is_fenced_on_lease_owner(db):
+    (job_id,) = _queue(db)
+    _claim(db, "a")
+
+    assert not Job.release(db, job_id, "b", "succeeded")
+    assert Job.release(db, job_id, "a", "failed", "boom")
+
+    job = db.get(Job, job_id)
+    db.refresh(job)
+    assert (job.status, job.last_error, job.lease_owner) == ("failed", "boom", None)
+    assert _claim(db, "a") is None
+
+
+def test_bump_retry_requeues_after_delay(db):
+    (job_id,) = _queue(db)
+    _claim(db, "a")
+
+    assert not Job.bump_retry(db, job_id, "b", "boom", delay_s=60)
+    assert Job.bump_retry(db, job_id, "a", "boom", delay_s=60)
+
+    job = db.get(Job, job_id)
+    db.refresh(job)
+    assert (job.status, job.retries, job.last_error, job.lease_owner) == ("queued", 1, "boom", None)
+    # not due yet
+    assert _claim(db, "a") is None
+
+    job.next_attempt_at = time.time() - 1
+    db.commit()
+    assert _claim(db, "a") == job_id
+
+
+def test_bulk_jobs_are_claimed_only_by_kind(db):
+    job = Job.create_bulk(db, "node1", "node2", ["a", "b"])
+    assert (job.kind, job.object_id, job.object_ids) == ("bulk", "*", '["a", "b"]')
+
+    assert _claim(db, "a") is None
+    assert Job.claim(db, "a", lease_s=30, kinds=("migrate", "bulk")) == (job.id, "queued")
+
+
+def test_active_migrate_finds_only_pending_jobs_for_the_object(db):
+    (job_id,) = _queue(db)
+    Job.create_migrate(db, "node1", "node3", "obj-0")
+
+    assert Job.active_migrate(db, "node2", "obj-0").id == job_id
+    assert Job.active_migrate(db, "node2", "obj-1") is None
+
+    _claim(db, "a")
+    assert Job.active_migrate(db, "node2", "obj-0").id == job_id
+
+    Job.release(db, job_id, "a", "succeeded")
+    assert Job.active_migrate(db, "node2", "obj-0") is None
+
+
+def test_one_pending_migrate_per_object_and_destination(db):
+    (job_id,) = _queue(db)
+    with pytest.raises(IntegrityError):
+        Job.create_migrate(db, "node3", "node2", "obj-0")
+    # other destinations, and bulk jobs, are unaffected
+    Job.create_migrate(db, "node1", "node3", "obj-0")
+    Job.create_bulk(db, "node1", "node2", ["obj-0"])
+
+    _claim(db, "a")
+    with pytest.raises(IntegrityError):
+        Job.create_migrate(db, "node1", "node2", "obj-0")
+    Job.release(db, job_id, "a", "failed", "boom")
+    assert Job.create_migrate(db, "node1", "node2", "obj-0").id != job_id
+
+
+def test_concurrent_migrate_requests_create_one_job(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/cp.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    make_session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    start = threading.Barrier(8)
+    created, conflicts = [], []
+
+    def request():
+        session = make_session()
+        start.wait()
+        try:
+            created.append(Job.create_migrate(session, "node1", "node2", "obj").id)
+        except IntegrityError:
+            conflicts.append(1)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert (len(created), len(conflicts)) == (1, 7)
+    engine.dispose()
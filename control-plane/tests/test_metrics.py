@@ -0,0 +1,9 @@
+from prometheus_client import REGISTRY
+
+from src.api.metrics import register_collectors
+
+
+def test_register_collectors_is_idempotent():
+    register_collectors()
+    register_collectors()
+    assert REGISTRY.get_sample_value("replicator_http_requests_total") is not None
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from src.core import retry
+from src.core.retry import PermanentError, backoff_delay, retry_async
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    slept = []
+
+    async def fake_sleep(s):
+        slept.append(s)
+
+    monkeypatch.setattr(retry.asyncio, "sleep", fake_sleep)
+    return slept
+
+
+def _flaky(failures, exc=RuntimeError):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise exc("boom")
+        return len(calls)
+
+    return fn, calls
+
+
+def test_backoff_doubles_up_to_cap():
+    assert [backoff_delay(a, 1, 10, jitter=False) for a in range(1, 7)] == [1, 2, 4, 8, 10, 10]
+    for _ in range(100):
+        assert 1 <= backoff_delay(2, 1, 10) <= 2
+
+
+def test_retries_until_success(no_sleep):
+    fn, calls = _flaky(2)
+    assert asyncio.run(retry_async(fn, attempts=3, base_s=1, max_s=10)) == 3
+    assert len(no_sleep) == 2
+
+
+def test_gives_up_after_attempts(no_sleep):
+    fn, calls = _flaky(5)
+    with pytest.raises(RuntimeError):
+        asyncio.run(retry_async(fn, attempts=3))
+    assert len(calls) == 3
+    assert len(no_sleep) == 2
+
+
+def test_permanent_and_unlisted_errors_are_not_retried():
+    fn, calls = _flaky(1, PermanentError)
+    with pytest.raises(PermanentError):
+        asyncio.run(retry_async(fn, attempts=3))
+    assert len(calls) == 1
+
+    fn, calls = _flaky(1, KeyError)
+    with pytest.raises(KeyError):
+        asyncio.run(retry_async(fn, attempts=3, retry_on=(RuntimeError,)))
+    assert len(calls) == 1
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, inspect, text
+
+from src.db.models import Base
+from src.db.session import _add_missing_columns
+
+
+def test_new_columns_are_added_to_a_populated_jobs_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/cp.db")
+    with engine.begin() as conn:
+        # the jobs table as first released, before progress and leases
+        conn.execute(
+            text(
+                "CREATE TABLE jobs (id INTEGER PRIMARY KEY, kind VARCHAR(32) NOT NULL, src_node VARCHAR(128) NOT NULL,"
+                " dst_node VARCHAR(128) NOT NULL, object_id VARCHAR(256) NOT NULL, status VARCHAR(32),"
+                " retries INTEGER, last_error TEXT, created_at VARCHAR(64), updated_at VARCHAR(64))"
+            )
+        )
+        conn.execute(text("INSERT INTO jobs (kind, src_node, dst_node, object_id) VALUES ('migrate', 'a', 'b', 'o')"))
+
+    _add_missing_columns(engine, Base.metadata)
+
+    cols = {c["name"]: c for c in inspect(engine).get_columns("jobs")}
+    assert {c.name for c in Base.metadata.tables["jobs"].columns} <= set(cols)
+    assert not cols["chunks_done"]["nullable"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT chunks_done, lease_owner FROM jobs")).one() == (0, None)
+    engine.dispose()
+
+
+def test_non_null_column_without_default_is_added_as_nullable(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/cp.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE things (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO things (id) VALUES (1)"))
+    metadata = MetaData()
+    Table("things", metadata, Column("id", Integer, primary_key=True), Column("label", String(8), nullable=False))
+
+    _add_missing_columns(engine, metadata)
+
+    cols = {c["name"]: c for c in inspect(engine).get_columns("things")}
+    assert cols["label"]["nullable"]
+    engine.dispose()
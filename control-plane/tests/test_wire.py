@@ -0,0 +1,24 @@
+import ast
+from pathlib import Path
+
+import pytest
+
+from src.core import wire
+
+FRAMING = Path(__file__).resolve().parents[2] / "data-plane" / "src" / "core" / "framing.py"
+
+
+def _module_constants(path):
+    tree = ast.parse(path.read_text())
+    return {
+        node.targets[0].id: node.value.value
+        for node in tree.body
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.targets[0], ast.Name)
+    }
+
+
+@pytest.mark.skipif(not FRAMING.is_file(), reason="data-plane sources not checked out alongside")
+def test_wire_constants_match_the_data_plane():
+    data_plane = _module_constants(FRAMING)
+    for name in ("FRAMES_MEDIA_TYPE", "CODECS_HEADER"):
+        assert getattr(wire, name) == data_plane[name], name
@@ -0,0 +1,168 @@
+"""
+Ingest throughput vs event-loop responsiveness.
+
+Starts a data-plane node (uvicorn subprocess, temp data dir) once per mode:
+  - inline: IO_WORKERS=0, hashing and chunk writes run on the event loop
+  - pool:   hashing and chunk writes run on the I/O thread pool
+then streams --objects concurrent ingests of --size-mb each while a prober
+sends HEAD /chunks/<hash> every --probe-ms, and reports:
+  - ingest MB/s: total object bytes / wall time of all ingests
+  - HEAD p50/p99/max latency (ms) while the ingests run
+
+Run from data-plane/:
+  python -m benchmarks.bench_ingest --size-mb 64 --objects 4 --chunk-kb 1024
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import aiohttp
+
+PIECE_BYTES = 256 * 1024
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+async def _wait_healthy(base: str, timeout_s: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    async with aiohttp.ClientSession() as s:
+        while time.monotonic() < deadline:
+            try:
+                async with s.get(f"{base}/health") as r:
+                    if r.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"node at {base} did not become healthy")
+
+
+async def _ingest(s: aiohttp.ClientSession, base: str, object_id: str, data: bytes, headers: Dict[str, str]) -> None:
+    async def body():
+        for i in range(0, len(data), PIECE_BYTES):
+            yield data[i : i + PIECE_BYTES]
+
+    async with s.post(f"{base}/objects/{object_id}/ingest", data=body(), headers=headers) as r:
+        if r.status != 200:
+            raise RuntimeError(f"ingest {object_id} failed {r.status}: {await r.text()}")
+
+
+async def _probe(s: aiohttp.ClientSession, base: str, interval_s: float, done: asyncio.Event) -> List[float]:
+    url = f"{base}/chunks/{'0' * 64}"
+    latencies: List[float] = []
+    while not done.is_set():
+        t0 = time.perf_counter()
+        async with s.head(url) as r:
+            await r.read()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(interval_s)
+    return latencies
+
+
+async def _measure(base: str, objects: List[bytes], headers: Dict[str, str], probe_ms: float) -> Dict[str, float]:
+    # separate sessions so probes never queue behind ingest connections
+    async with aiohttp.ClientSession() as ingest_s, aiohttp.ClientSession() as probe_s:
+        done = asyncio.Event()
+        prober = asyncio.create_task(_probe(probe_s, base, probe_ms / 1000, done))
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_ingest(ingest_s, base, f"bench-{i}", d, headers) for i, d in enumerate(objects)))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        latencies = await prober
+
+    total = sum(len(d) for d in objects)
+    return {
+        "ingest_mb_per_s": round(total / elapsed / 1e6, 2),
+        "head_probes": len(latencies),
+        "head_p50_ms": round(_percentile(latencies, 0.50), 2),
+        "head_p99_ms": round(_percentile(latencies, 0.99), 2),
+        "head_max_ms": round(max(latencies, default=0.0), 2),
+    }
+
+
+def _run_mode(mode: str, objects: List[bytes], headers: Dict[str, str], args) -> Dict[str, object]:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    tmp = tempfile.mkdtemp(prefix=f"bench-ingest-{mode}-")
+    env = dict(
+        os.environ,
+        PYTHONPATH=".",
+        DATABASE_URL=f"sqlite:///{tmp}/node.db",
+        CHUNK_STORE_ROOT=f"{tmp}/blobs",
+        CHUNK_STORE_BACKEND=args.backend,
+        GC_ENABLED="0",
+    )
+    if mode == "inline":
+        env["IO_WORKERS"] = "0"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        asyncio.run(_wait_healthy(base))
+        result = asyncio.run(_measure(base, objects, headers, args.probe_ms))
+    finally:
+        proc.terminate()
+        proc.wait(10)
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"mode": mode, **result}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--size-mb", type=float, default=64, help="size of each object")
+    ap.add_argument("--objects", type=int, default=4, help="concurrent ingests")
+    ap.add_argument("--chunk-kb", type=int, default=1024)
+    ap.add_argument("--chunker", choices=("fixed", "cdc"), default="fixed")
+    ap.add_argument("--backend", choices=("fs", "pack"), default="fs")
+    ap.add_argument("--probe-ms", type=float, default=5, help="pause between HEAD probes")
+    ap.add_argument("--modes", default="inline,pool", help="comma-separated: inline, pool")
+    ap.add_argument("--json", action="store_true", help="print machine-readable JSON only")
+    args = ap.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    # random bytes: no dedupe, so every chunk is hashed and written
+    objects = [os.urandom(size) for _ in range(args.objects)]
+    headers = {"x-chunker": args.chunker, "x-chunk-size": str(args.chunk_kb * 1024)}
+
+    results = [_run_mode(m, objects, headers, args) for m in args.modes.split(",")]
+
+    if args.json:
+        print(json.dumps({"params": vars(args), "results": results}, indent=2))
+        return
+
+    print(
+        f"{args.objects} concurrent ingests x {args.size_mb} MB, {args.chunker} {args.chunk_kb} KiB chunks, "
+        f"{args.backend} store, cpus={os.cpu_count()}"
+    )
+    print(f"{'mode':<8} {'MB/s':>8} {'probes':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for r in results:
+        print(
+            f"{r['mode']:<8} {r['ingest_mb_per_s']:>8} {r['head_probes']:>7} "
+            f"{r['head_p50_ms']:>8} {r['head_p99_ms']:>8} {r['head_max_ms']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Chunk serving throughput and server CPU per GB, copied vs mapped reads.
+
+Starts a data-plane node (uvicorn subprocess, temp data dir) once per mode:
+  - copy: CHUNK_MMAP=0, every chunk is read into a bytes object and sent
+  - mmap: chunks of at least CHUNK_MMAP_MIN_BYTES are sent from a mapped view
+          of the store file
+ingests one --size-mb object of random bytes, then fetches its chunks with
+GET /chunks/<hash> (--clients concurrent clients, --rounds passes over all
+chunks) and downloads it --rounds times with GET /objects/<id>, and reports
+for each workload:
+  - MB/s: bytes received / wall time
+  - CPU s/GB: server user+system CPU time (from /proc) per GB served
+
+The read cache is off by default (--cache-mb) so both modes read the store;
+the store files stay in the page cache, so this measures CPU, not the disk.
+
+Run from data-plane/ (Linux):
+  python -m benchmarks.bench_serve --size-mb 256 --chunk-kb 1024 --clients 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks.bench_ingest import PIECE_BYTES, _free_port, _wait_healthy
+
+READ_BYTES = 1024 * 1024
+
+
+def _cpu_s(pid: int) -> float:
+    # utime + stime of the server process, fields 14 and 15 of /proc/<pid>/stat
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def _ingest(s: aiohttp.ClientSession, base: str, object_id: str, data: bytes, chunk_kb: int) -> List[str]:
+    async def body():
+        for i in range(0, len(data), PIECE_BYTES):
+            yield data[i : i + PIECE_BYTES]
+
+    headers = {"x-chunk-size": str(chunk_kb * 1024)}
+    async with s.post(f"{base}/objects/{object_id}/ingest", data=body(), headers=headers) as r:
+        if r.status != 200:
+            raise RuntimeError(f"ingest {object_id} failed {r.status}: {await r.text()}")
+    async with s.get(f"{base}/objects/{object_id}/manifest") as r:
+        return (await r.json())["chunks"]
+
+
+async def _drain(s: aiohttp.ClientSession, url: str) -> int:
+    n = 0
+    async with s.get(url) as r:
+        if r.status != 200:
+            raise RuntimeError(f"GET {url} failed {r.status}")
+        async for piece in r.content.iter_chunked(READ_BYTES):
+            n += len(piece)
+    return n
+
+
+async def _timed(pid: int, urls: List[str], clients: int) -> Dict[str, float]:
+    queue: asyncio.Queue = asyncio.Queue()
+    for u in urls:
+        queue.put_nowait(u)
+    received = 0
+
+    async def client(s: aiohttp.ClientSession) -> None:
+        nonlocal received
+        while not queue.empty():
+            received += await _drain(s, queue.get_nowait())
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector) as s:
+        cpu0, t0 = _cpu_s(pid), time.perf_counter()
+        await asyncio.gather(*(client(s) for _ in range(clients)))
+        elapsed, cpu = time.perf_counter() - t0, _cpu_s(pid) - cpu0
+
+    return {
+        "mb_per_s": round(received / elapsed / 1e6, 1),
+        "cpu_s_per_gb": round(cpu / (received / 1e9), 3),
+    }
+
+
+async def _measure(pid: int, base: str, data: bytes, args) -> Dict[str, object]:
+    async with aiohttp.ClientSession() as s:
+        chunks = await _ingest(s, base, "bench-serve", data, args.chunk_kb)
+    # one untimed pass so both modes start with the store in the page cache
+    await _timed(pid, [f"{base}/chunks/{h}" for h in chunks], args.clients)
+
+    chunk_urls = [f"{base}/chunks/{h}" for h in chunks] * args.rounds
+    object_urls = [f"{base}/objects/bench-serve"] * args.rounds
+    return {
+        "chunks": await _timed(pid, chunk_urls, args.clients),
+        "object": await _timed(pid, object_urls, min(args.clients, args.rounds)),
+    }
+
+
+def _run_mode(mode: str, data: bytes, args) -> Dict[str, object]:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    tmp = tempfile.mkdtemp(prefix=f"bench-serve-{mode}-")
+    env = dict(
+        os.environ,
+        PYTHONPATH=".",
+        DATABASE_URL=f"sqlite:///{tmp}/node.db",
+        CHUNK_STORE_ROOT=f"{tmp}/blobs",
+        CHUNK_STORE_BACKEND=args.backend,
+        CHUNK_CACHE_BYTES=str(args.cache_mb * 1024 * 1024),
+        CHUNK_MMAP="1" if mode == "mmap" else "0",
+        GC_ENABLED="0",
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        asyncio.run(_wait_healthy(base))
+        result = asyncio.run(_measure(proc.pid, base, data, args))
+    finally:
+        proc.terminate()
+        proc.wait(10)
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"mode": mode, **result}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--size-mb", type=float, default=256, help="size of the served object")
+    ap.add_argument("--chunk-kb", type=int, default=1024)
+    ap.add_argument("--backend", choices=("fs", "pack"), default="fs")
+    ap.add_argument("--clients", type=int, default=8, help="concurrent GETs")
+    ap.add_argument("--rounds", type=int, default=4, help="passes over the object per workload")
+    ap.add_argument("--cache-mb", type=int, default=0, help="CHUNK_CACHE_BYTES of the node, in MiB")
+    ap.add_argument("--modes", default="copy,mmap", help="comma-separated: copy, mmap")
+    ap.add_argument("--json", action="store_true", help="print machine-readable JSON only")
+    args = ap.parse_args()
+
+    # random bytes: incompressible and no dedupe, every chunk is distinct
+    data = os.urandom(int(args.size_mb * 1024 * 1024))
+
+    results = [_run_mode(m, data, args) for m in args.modes.split(",")]
+
+    if args.json:
+        print(json.dumps({"params": vars(args), "results": results}, indent=2))
+        return
+
+    print(
+        f"{args.size_mb} MB object x {args.rounds} rounds, {args.chunk_kb} KiB chunks, {args.backend} store, "
+        f"{args.clients} clients, cpus={os.cpu_count()}"
+    )
+    print(f"{'mode':<6} {'chunks MB/s':>12} {'CPU s/GB':>9} {'object MB/s':>12} {'CPU s/GB':>9}")
+    for r in results:
+        c, o = r["chunks"], r["object"]
+        print(f"{r['mode']:<6} {c['mb_per_s']:>12} {c['cpu_s_per_gb']:>9} {o['mb_per_s']:>12} {o['cpu_s_per_gb']:>9}")
+
+
+if __name__ == "__main__":
+    main()
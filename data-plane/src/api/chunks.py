@@ -1,9 +1,22 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import Response
+import hashlib
+import uuid
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from typing import BinaryIO, Iterator, List, Set, Tuple, Union
 
-from src.storage.chunk_store import ChunkStore
+from src.core.config import settings
+from src.core.executor import amap_ordered, offload
+from src.core import compression
+from src.core.framing import CODECS_HEADER, FRAMES_MEDIA_TYPE, aiter_frames, encode_frame_header
+from src.db.index import refcount, referencing_objects
+from src.db.session import get_db
+from src.storage.factory import get_chunk_store, get_staging_dir
 from src.api.metrics import (
     chunks_put_total,
     chunks_get_total,
@@ -14,12 +27,20 @@ from src.api.metrics import (
     dedupe_misses_total,
 )
 
-from pathlib import Path
-
 router = APIRouter(prefix="/chunks", tags=["chunks"])
 
-# Store chunks on the container volume
-store = ChunkStore(root=Path("/app/data/blobs"))
+# chunks live on the container volume (CHUNK_STORE_ROOT / CHUNK_STORE_BACKEND);
+# get_chunk_store() is built once, in the app's startup hook, not at import
+
+# upper bound on hashes per batch request (~64 KiB of hex per 1k hashes)
+MAX_BATCH_HASHES = 10_000
+
+# body bytes a chunk PUT hashes and writes per hop to the I/O pool
+STAGE_BYTES = 256 * 1024
+
+
+class ChunkHashesIn(BaseModel):
+    hashes: List[str]
 
 
 def _validate_hash(h: str) -> None:
@@ -38,7 +59,7 @@ def head_chunk(chunk_hash: str):
     _validate_hash(chunk_hash)
     chunks_head_total.inc()
 
-    if store.exists(chunk_hash):
+    if get_chunk_store().exists(chunk_hash):
         dedupe_hits_total.inc()
         return Response(status_code=200)
     else:
@@ -46,32 +67,215 @@ def head_chunk(chunk_hash: str):
         return Response(status_code=404)
 
 
+@router.post("/missing")
+def missing_chunks(body: ChunkHashesIn):
+    """
+    Batch form of HEAD: returns the subset of `hashes` this node does not have,
+    in request order, so a delta check costs one round trip instead of N.
+    """
+    if len(body.hashes) > MAX_BATCH_HASHES:
+        raise HTTPException(status_code=413, detail=f"at most {MAX_BATCH_HASHES} hashes per request")
+    for h in body.hashes:
+        _validate_hash(h)
+    chunks_head_total.inc(len(body.hashes))
+
+    # present chunks are about to be referenced by the caller: refresh their GC age
+    store = get_chunk_store()
+    missing = [h for h in body.hashes if not store.touch(h)]
+    dedupe_hits_total.inc(len(body.hashes) - len(missing))
+    dedupe_misses_total.inc(len(missing))
+    return {"missing": missing}
+
+
+def _iter_frames(hashes: List[str], accept: Set[int]) -> Iterator[Union[bytes, memoryview]]:
+    store = get_chunk_store()
+    for h in hashes:
+        flags, payload = store.get_frame_view(h, accept)
+        chunks_get_total.inc()
+        bytes_out_total.inc(len(payload))
+        # header and payload go out separately: no copy of a mapped payload
+        yield encode_frame_header(h, len(payload), flags)
+        yield payload
+
+
+@router.get("/codecs")
+def list_codecs():
+    """
+    Compression codecs this node can decode; peers send them in x-chunk-codecs.
+    """
+    return {"codecs": compression.available()}
+
+
+@router.post("/batch/get")
+def get_chunks_batch(body: ChunkHashesIn, request: Request):
+    """
+    Stream many chunks in one response as length-prefixed frames (see core/framing.py).
+    Chunks stored compressed with a codec listed in x-chunk-codecs are sent as is.
+    """
+    if len(body.hashes) > MAX_BATCH_HASHES:
+        raise HTTPException(status_code=413, detail=f"at most {MAX_BATCH_HASHES} hashes per request")
+    for h in body.hashes:
+        _validate_hash(h)
+
+    # verify up front: once streaming starts the status line can't change
+    store = get_chunk_store()
+    absent = [h for h in body.hashes if not store.exists(h)]
+    if absent:
+        raise HTTPException(status_code=404, detail={"missing": absent})
+
+    accept = compression.parse_codecs(request.headers.get(CODECS_HEADER))
+    return StreamingResponse(_iter_frames(body.hashes, accept), media_type=FRAMES_MEDIA_TYPE)
+
+
+def _verify_and_store(frame: Tuple[str, int, bytes]) -> Tuple[bool, int]:
+    # runs on the I/O pool; returns (newly stored, payload bytes)
+    chunk_hash, flags, payload = frame
+    return get_chunk_store().put_frame(chunk_hash, flags, payload), len(payload)
+
+
+@router.post("/batch/put")
+async def put_chunks_batch(request: Request):
+    """
+    Store a stream of frames. Frames are hash-verified and written on the I/O
+    pool as they arrive, several at once; a bad frame aborts the request
+    (frames already written are kept).
+    """
+    stored = exists = nbytes = 0
+    try:
+        frames = aiter_frames(request.stream())
+        async for was_stored, n in amap_ordered(_verify_and_store, frames, settings.ingest_window):
+            chunks_put_total.inc()
+            bytes_in_total.inc(n)
+            nbytes += n
+            if was_stored:
+                dedupe_misses_total.inc()
+                stored += 1
+            else:
+                dedupe_hits_total.inc()
+                exists += 1
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"stored": stored, "exists": exists, "bytes": nbytes}
+
+
+@router.get("/{chunk_hash}/refs")
+def chunk_refs(chunk_hash: str, db: Session = Depends(get_db)):
+    """
+    How many manifests reference this chunk, and (the first 100 of) which.
+    """
+    _validate_hash(chunk_hash)
+    return {
+        "hash": chunk_hash,
+        "refcount": refcount(db, chunk_hash),
+        "objects": referencing_objects(db, chunk_hash, limit=100),
+    }
+
+
 @router.get("/{chunk_hash}")
-def get_chunk(chunk_hash: str):
+def get_chunk(chunk_hash: str, request: Request):
     _validate_hash(chunk_hash)
     chunks_get_total.inc()
 
-    if not store.exists(chunk_hash):
+    if not get_chunk_store().exists(chunk_hash):
         raise HTTPException(status_code=404, detail="chunk not found")
 
-    data = store.read(chunk_hash)
-    bytes_out_total.inc(len(data))
-    return Response(content=data, media_type="application/octet-stream")
+    # compressed body only if the caller listed the codec in x-chunk-codecs;
+    # x-chunk-codec then names it
+    accept = compression.parse_codecs(request.headers.get(CODECS_HEADER))
+    try:
+        # a large chunk is a view of the mapped store file: the server writes
+        # it to the socket straight from the page cache
+        flags, payload = get_chunk_store().get_frame_view(chunk_hash, accept)
+    except FileNotFoundError:
+        # deleted by GC since the exists() check
+        raise HTTPException(status_code=404, detail="chunk not found")
+    bytes_out_total.inc(len(payload))
+    headers = {"x-chunk-codec": compression.name_of(flags)} if flags else None
+    return Response(content=payload, media_type="application/octet-stream", headers=headers)
+
+
+def _stage(f: BinaryIO, digest, piece: bytes) -> None:
+    # runs on the I/O pool
+    digest.update(piece)
+    f.write(piece)
+
+
+async def _spool_verified(chunk_hash: str, request: Request) -> Tuple[Path, int]:
+    """
+    Stream the request body into a temp file in the staging dir, hashing it
+    on the way; returns (path, bytes). Raises 400 (temp file removed) if the
+    body doesn't hash to chunk_hash.
+    """
+    path = get_staging_dir() / f"{chunk_hash}.{uuid.uuid4().hex}"
+    digest = hashlib.sha256()
+    nbytes = 0
+    buf = bytearray()
+    f = await offload(open, path, "wb")
+    try:
+        with f:
+            async for piece in request.stream():
+                buf += piece
+                # the server hands over small pieces: batch them per pool hop
+                if len(buf) >= STAGE_BYTES:
+                    await offload(_stage, f, digest, bytes(buf))
+                    nbytes += len(buf)
+                    buf.clear()
+            await offload(_stage, f, digest, bytes(buf))
+            nbytes += len(buf)
+        if digest.hexdigest() != chunk_hash:
+            raise HTTPException(status_code=400, detail=f"hash mismatch for chunk {chunk_hash}")
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, nbytes
 
 
 @router.put("/{chunk_hash}")
-async def put_chunk(chunk_hash: str, request: Request):
+async def put_chunk(chunk_hash: str, request: Request, response: Response):
+    """
+    Store one chunk. A chunk the node already has is answered before any of
+    the body is read: the server only sends "100 Continue" once the handler
+    reads it, so a client using Expect: 100-continue uploads nothing on a
+    dedup hit. Otherwise the body is spooled to disk while it is hashed
+    and stored only if it matches chunk_hash (400 if not).
+    """
     _validate_hash(chunk_hash)
     chunks_put_total.inc()
 
-    data = await request.body()
-    bytes_in_total.inc(len(data))
-
+    store = get_chunk_store()
     # idempotent PUT: if exists, treat as dedupe hit
-    if store.exists(chunk_hash):
+    if await offload(store.touch, chunk_hash):
         dedupe_hits_total.inc()
-        return {"status": "exists", "hash": chunk_hash, "bytes": len(data)}
+        if request.headers.get("expect", "").lower() == "100-continue":
+            # the client won't send the body it announced, and the server would
+            # otherwise read the next request on this connection as that body
+            response.headers["connection"] = "close"
+        return {"status": "exists", "hash": chunk_hash, "bytes": int(request.headers.get("content-length") or 0)}
+
+    # a body compressed by the sender names its codec in x-chunk-codec; it is
+    # verified against the hash after decoding and stored as received
+    codec = request.headers.get("x-chunk-codec")
+    if codec:
+        data = await request.body()
+        bytes_in_total.inc(len(data))
+        try:
+            flags = compression.by_name(codec.lower()).codec_id
+            stored = await offload(store.put_frame, chunk_hash, flags, data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not stored:
+            dedupe_hits_total.inc()
+            return {"status": "exists", "hash": chunk_hash, "bytes": len(data)}
+        dedupe_misses_total.inc()
+        return {"status": "stored", "hash": chunk_hash, "bytes": len(data)}
 
-    store.write(chunk_hash, data)
+    path, nbytes = await _spool_verified(chunk_hash, request)
+    bytes_in_total.inc(nbytes)
+    try:
+        await offload(store.write_file, chunk_hash, path)
+    finally:
+        # already moved into the store unless writing it failed
+        path.unlink(missing_ok=True)
     dedupe_misses_total.inc()
-    return {"status": "stored", "hash": chunk_hash, "bytes": len(data)}
+    return {"status": "stored", "hash": chunk_hash, "bytes": nbytes}
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from fastapi.responses import Response
-from prometheus_client import Counter, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, generate_latest, CONTENT_TYPE_LATEST
 
 router = APIRouter(tags=["metrics"])
 
@@ -14,6 +14,22 @@ bytes_out_total = Counter("replicator_bytes_out_total", "Total bytes sent by nod
 dedupe_hits_total = Counter("replicator_dedupe_hits_total", "Total dedupe hits (chunk already existed)")
 dedupe_misses_total = Counter("replicator_dedupe_misses_total", "Total dedupe misses (chunk stored)")
 
+pulls_total = Counter("replicator_pulls_total", "Peer-to-peer object pulls by outcome", ["status"])
+
+chunk_cache_hits_total = Counter("replicator_chunk_cache_hits_total", "Chunk cache hits", ["cache"])
+chunk_cache_misses_total = Counter("replicator_chunk_cache_misses_total", "Chunk cache misses", ["cache"])
+chunk_cache_evictions_total = Counter("replicator_chunk_cache_evictions_total", "Chunk cache evictions", ["cache"])
+chunk_cache_bytes = Gauge("replicator_chunk_cache_bytes", "Chunk bytes held in the read cache")
+
+presence_checks_total = Counter(
+    "replicator_presence_checks_total", "Presence-filter lookups: absent (no disk access) or maybe", ["result"]
+)
+
+gc_runs_total = Counter("replicator_gc_runs_total", "Completed chunk GC passes")
+gc_chunks_scanned_total = Counter("replicator_gc_chunks_scanned_total", "Chunks examined by GC")
+gc_chunks_reclaimed_total = Counter("replicator_gc_chunks_reclaimed_total", "Unreferenced chunks deleted by GC")
+gc_bytes_reclaimed_total = Counter("replicator_gc_bytes_reclaimed_total", "Chunk bytes deleted by GC")
+
 @router.get("/metrics")
 def metrics():
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
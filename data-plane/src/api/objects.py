@@ -1,83 +1,185 @@
 from __future__ import annotations
 
-import json
-from pathlib import Path
+from bisect import bisect_right
+from itertools import accumulate
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 
 from sqlalchemy.orm import Session
 from fastapi import Depends
 
 from src.core.hashing import sha256_hex
-from src.core.chunking import iter_chunks
+from src.core.chunking import CDCParams, aiter_cdc_chunks, aiter_chunks
+from src.core.config import settings
+from src.core.executor import amap_ordered, offload
+from src.core.manifest import CHUNKERS, ManifestIn, check_manifest
 from src.db.session import get_db
 from src.db.models import ObjectManifest
-from src.storage.chunk_store import ChunkStore
-from pydantic import BaseModel
-from typing import List
+from src.storage.factory import get_chunk_store
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, Union
 
 from src.api.metrics import bytes_in_total, bytes_out_total
 
 router = APIRouter(prefix="/objects", tags=["objects"])
 
-store = ChunkStore(root=Path("/app/data/blobs"))
-
 DEFAULT_CHUNK_SIZE = 1024 * 1024  
 
-class ManifestIn(BaseModel):
-    size_bytes: int
-    chunk_size: int
-    chunks: List[str]
-
+# GET /objects paging: objects per page, and (with manifests=true) chunk
+# hashes per page, so a page of huge manifests stays bounded
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+LIST_MAX_MANIFEST_CHUNKS = 200_000
 
 def _validate_object_id(object_id: str) -> None:
     if not object_id or len(object_id) > 256:
         raise HTTPException(status_code=400, detail="invalid object_id")
 
 
+def _header_int(request: Request, name: str, default: int) -> int:
+    try:
+        return int(request.headers.get(name, str(default)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"invalid {name}")
+
+
+def _chunk_stream(request: Request) -> Tuple[str, int, AsyncIterator[bytes]]:
+    """
+    Pick the chunker for an ingest from its headers:
+      x-chunker: fixed (default) | cdc
+      x-chunk-size: fixed chunk size, or the cdc average size
+      x-chunk-min-size / x-chunk-max-size: cdc bounds (default avg/4, avg*4)
+    cdc is opt-in and experimental: its cut-point scan needs numpy (the "cdc"
+    extra) to keep up with ingest, and falls back to ~6 MB/s pure Python.
+    """
+    chunker = request.headers.get("x-chunker", "fixed").lower()
+    if chunker not in CHUNKERS:
+        raise HTTPException(status_code=400, detail=f"unknown chunker {chunker!r}")
+
+    # allow override via header (handy for tests)
+    chunk_size = _header_int(request, "x-chunk-size", DEFAULT_CHUNK_SIZE)
+    if chunk_size <= 0:
+        raise HTTPException(status_code=400, detail="invalid x-chunk-size")
+
+    if chunker == "fixed":
+        return chunker, chunk_size, aiter_chunks(request.stream(), chunk_size)
+
+    defaults = CDCParams.from_avg(chunk_size)
+    try:
+        params = CDCParams(
+            min_size=_header_int(request, "x-chunk-min-size", defaults.min_size),
+            avg_size=chunk_size,
+            max_size=_header_int(request, "x-chunk-max-size", defaults.max_size),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return chunker, chunk_size, aiter_cdc_chunks(request.stream(), params)
+
+
+def _manifest_body(m: ObjectManifest) -> dict:
+    return {
+        "object_id": m.object_id,
+        "size_bytes": m.size_bytes,
+        "chunk_size": m.chunk_size,
+        "chunker": m.chunker,
+        "chunks": m.chunks,
+        "chunk_sizes": m.chunk_sizes,
+    }
+
+
+def _store_chunk(chunk: bytes) -> Tuple[str, int]:
+    h = sha256_hex(chunk)
+    store = get_chunk_store()
+    # touch() on a dedupe hit keeps GC from reclaiming the chunk before
+    # this manifest commits
+    if not store.touch(h):
+        store.write(h, chunk)
+    return h, len(chunk)
+
+
 @router.post("/{object_id}/ingest")
 async def ingest_object(object_id: str, request: Request, db: Session = Depends(get_db)):
     _validate_object_id(object_id)
 
-    raw = await request.body()
-    bytes_in_total.inc(len(raw))
-
-    # allow override via header (handy for tests)
-    chunk_size = int(request.headers.get("x-chunk-size", str(DEFAULT_CHUNK_SIZE)))
+    chunker, chunk_size, chunks = _chunk_stream(request)
 
+    # consume the body incrementally: chunks are hashed and persisted on the
+    # I/O pool as they fill, up to ingest_window at once, so peak memory is
+    # ~window chunks regardless of object size and the event loop stays free
+    size_bytes = 0
     chunk_hashes: list[str] = []
-    for chunk in iter_chunks(raw, chunk_size):
-        h = sha256_hex(chunk)
+    chunk_sizes: list[int] = []
+    async for h, n in amap_ordered(_store_chunk, chunks, settings.ingest_window):
+        size_bytes += n
+        bytes_in_total.inc(n)
         chunk_hashes.append(h)
-        if not store.exists(h):
-            store.write(h, chunk)
-
-    manifest = ObjectManifest(
-        object_id=object_id,
-        size_bytes=len(raw),
-        chunk_size=chunk_size,
-        chunks_json=json.dumps(chunk_hashes),
-    )
-
-    existing = db.get(ObjectManifest, object_id)
-    if existing:
-        # overwrite to keep it simple for now
-        existing.size_bytes = manifest.size_bytes
-        existing.chunk_size = manifest.chunk_size
-        existing.chunks_json = manifest.chunks_json
-    else:
-        db.add(manifest)
+        chunk_sizes.append(n)
 
-    db.commit()
+    # the manifest commit is blocking DB I/O: keep it off the event loop
+    await offload(
+        lambda: ObjectManifest.upsert(
+            db,
+            object_id,
+            size_bytes=size_bytes,
+            chunk_size=chunk_size,
+            chunks=chunk_hashes,
+            chunker=chunker,
+            # fixed-size chunk lengths are implied by chunk_size
+            chunk_sizes=chunk_sizes if chunker != "fixed" else None,
+        )
+    )
 
     return {
         "object_id": object_id,
-        "size_bytes": len(raw),
+        "size_bytes": size_bytes,
         "chunk_size": chunk_size,
+        "chunker": chunker,
         "chunks": len(chunk_hashes),
     }
 
 
+@router.get("")
+def list_objects(
+    cursor: Optional[str] = None,
+    limit: int = LIST_DEFAULT_LIMIT,
+    manifests: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Objects in object_id order, up to `limit` per page. Pass next_cursor back
+    as `cursor` for the next page; it is null once the listing is exhausted.
+    With manifests=true each entry is the full manifest, and a page also ends
+    early once it holds LIST_MAX_MANIFEST_CHUNKS chunk hashes.
+    """
+    if not 1 <= limit <= LIST_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be 1..{LIST_MAX_LIMIT}")
+
+    if not manifests:
+        rows = ObjectManifest.summaries(db, cursor, limit)
+        objects = [
+            {
+                "object_id": r.object_id,
+                "size_bytes": r.size_bytes,
+                "chunk_size": r.chunk_size,
+                "chunker": r.chunker,
+                "chunk_count": r.chunk_count,
+            }
+            for r in rows
+        ]
+        full = len(objects) == limit
+    else:
+        objects = []
+        nchunks = 0
+        full = False
+        for m in ObjectManifest.iter_after(db, cursor, limit):
+            objects.append(_manifest_body(m))
+            nchunks += m.chunk_count
+            if len(objects) == limit or nchunks >= LIST_MAX_MANIFEST_CHUNKS:
+                full = True
+                break
+
+    return {"objects": objects, "next_cursor": objects[-1]["object_id"] if full else None}
+
+
 @router.get("/{object_id}/manifest")
 def get_manifest(object_id: str, db: Session = Depends(get_db)):
     _validate_object_id(object_id)
@@ -85,50 +187,147 @@ def get_manifest(object_id: str, db: Session = Depends(get_db)):
     if not m:
         raise HTTPException(status_code=404, detail="object not found")
 
-    return {
-        "object_id": m.object_id,
-        "size_bytes": m.size_bytes,
-        "chunk_size": m.chunk_size,
-        "chunks": json.loads(m.chunks_json),
-    }
+    return _manifest_body(m)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=start-end" range into an inclusive (start, end) pair.
+    Returns None when the header should be ignored (malformed or multi-range),
+    and raises 416 when it is well-formed but unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # suffix range: last N bytes
+            n = int(last)
+            if n <= 0:
+                raise ValueError
+            start, end = max(size - n, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _locate(pos: int, chunk_size: int, starts: Optional[List[int]]) -> Tuple[int, int]:
+    """
+    Map a byte offset to (chunk index, offset within that chunk).
+    Fixed-size chunks are a division away; variable-length ones need a bisect.
+    """
+    if starts is None:
+        idx = pos // chunk_size
+        return idx, pos - idx * chunk_size
+    idx = bisect_right(starts, pos) - 1
+    return idx, pos - starts[idx]
+
+
+def _iter_object_bytes(chunks: List[str], idx: int, offset: int, remaining: int) -> Iterator[Union[bytes, memoryview]]:
+    store = get_chunk_store()
+    while remaining > 0 and idx < len(chunks):
+        # a view of the mapped chunk where possible; slicing it copies nothing
+        data = store.read_view(chunks[idx])
+        piece = data[offset : offset + remaining] if offset or len(data) > remaining else data
+        remaining -= len(piece)
+        offset = 0
+        idx += 1
+        bytes_out_total.inc(len(piece))
+        yield piece
 
 
 @router.get("/{object_id}")
-def download_object(object_id: str, db: Session = Depends(get_db)):
+def download_object(object_id: str, request: Request, db: Session = Depends(get_db)):
     _validate_object_id(object_id)
     m = db.get(ObjectManifest, object_id)
     if not m:
         raise HTTPException(status_code=404, detail="object not found")
 
-    chunks = json.loads(m.chunks_json)
-    out = bytearray()
+    chunks = m.chunks
+    size = m.size_bytes
+    starts = None
+    chunk_sizes = m.chunk_sizes
+    if chunk_sizes is not None:
+        starts = [0, *accumulate(chunk_sizes)][:-1]
 
-    for h in chunks:
-        if not store.exists(h):
-            raise HTTPException(status_code=500, detail=f"missing chunk {h}")
-        out.extend(store.read(h))
+    status_code = 200
+    start, end = 0, size - 1
+    headers = {"Accept-Ranges": "bytes"}
+
+    range_header = request.headers.get("range")
+    if range_header:
+        parsed = _parse_range(range_header, size)
+        if parsed:
+            start, end = parsed
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    first, offset = _locate(start, m.chunk_size, starts) if size > 0 else (0, 0)
+
+    # verify up front: once streaming starts the status line can't change
+    if size > 0:
+        last, _ = _locate(end, m.chunk_size, starts)
+        store = get_chunk_store()
+        for h in chunks[first : last + 1]:
+            if not store.exists(h):
+                raise HTTPException(status_code=500, detail=f"missing chunk {h}")
+
+    headers["Content-Length"] = str(max(end - start + 1, 0))
+    return StreamingResponse(
+        _iter_object_bytes(chunks, first, offset, end - start + 1),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/octet-stream",
+    )
+
+@router.delete("/{object_id}")
+def delete_object(object_id: str, db: Session = Depends(get_db)):
+    _validate_object_id(object_id)
+    if not ObjectManifest.remove(db, object_id):
+        raise HTTPException(status_code=404, detail="object not found")
+    return {"status": "deleted", "object_id": object_id}
 
-    bytes_out_total.inc(len(out))
-    return Response(content=bytes(out), media_type="application/octet-stream")
 
 @router.put("/{object_id}/manifest")
 def put_manifest(object_id: str, body: ManifestIn, db: Session = Depends(get_db)):
     _validate_object_id(object_id)
 
-    manifest = ObjectManifest(
-        object_id=object_id,
+    try:
+        check_manifest(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # only accept manifests this node can actually serve
+    store = get_chunk_store()
+    absent = [h for h in dict.fromkeys(body.chunks) if not store.touch(h)]
+    if absent:
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "missing chunks", "missing_count": len(absent), "missing": absent[:100]},
+        )
+
+    ObjectManifest.upsert(
+        db,
+        object_id,
         size_bytes=body.size_bytes,
         chunk_size=body.chunk_size,
-        chunks_json=json.dumps(body.chunks),
+        chunks=body.chunks,
+        chunker=body.chunker,
+        chunk_sizes=body.chunk_sizes,
     )
-
-    existing = db.get(ObjectManifest, object_id)
-    if existing:
-        existing.size_bytes = manifest.size_bytes
-        existing.chunk_size = manifest.chunk_size
-        existing.chunks_json = manifest.chunks_json
-    else:
-        db.add(manifest)
-
-    db.commit()
     return {"status": "manifest_saved", "object_id": object_id, "chunks": len(body.chunks)}
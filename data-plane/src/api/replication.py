@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, AnyHttpUrl
+
+from src.services.pull_service import pull_service
+
+router = APIRouter(prefix="/replication", tags=["replication"])
+
+
+class PullReq(BaseModel):
+    object_id: str
+    source_url: AnyHttpUrl
+
+
+@router.post("/pull", status_code=202)
+async def start_pull(req: PullReq):
+    """
+    Pull an object (manifest + missing chunks) onto this node directly from a peer.
+    Runs in the background; poll GET /replication/pull/{pull_id} for completion.
+    """
+    if not req.object_id or len(req.object_id) > 256:
+        raise HTTPException(status_code=400, detail="invalid object_id")
+    p = pull_service.start(req.object_id, str(req.source_url))
+    return p.to_dict()
+
+
+@router.get("/pull/{pull_id}")
+def get_pull(pull_id: int):
+    p = pull_service.get(pull_id)
+    if not p:
+        raise HTTPException(status_code=404, detail="pull not found")
+    return p.to_dict()
@@ -1,8 +1,204 @@
 from __future__ import annotations
-from typing import Iterator
+import hashlib
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List
+
+from src.core.executor import offload
 
 def iter_chunks(data: bytes, chunk_size: int) -> Iterator[bytes]:
     if chunk_size <= 0:
         raise ValueError("chunk_size must be > 0")
     for i in range(0, len(data), chunk_size):
         yield data[i : i + chunk_size]
+
+
+async def aiter_chunks(stream: AsyncIterator[bytes], chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    Re-slice an async byte stream (e.g. Request.stream()) into fixed-size chunks.
+    Only one partial chunk is buffered at a time, so memory stays ~chunk_size.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be > 0")
+    buf = bytearray()
+    async for piece in stream:
+        if not piece:
+            continue
+        buf += piece
+        while len(buf) >= chunk_size:
+            yield bytes(buf[:chunk_size])
+            del buf[:chunk_size]
+    if buf:
+        yield bytes(buf)
+
+
+# --- content-defined chunking (FastCDC) ---
+#
+# A gear rolling hash is updated per byte; a boundary is declared where the
+# masked high bits of the fingerprint are zero. Cut points depend only on nearby
+# content, so an insert/delete only changes the chunks around the edit.
+
+_M64 = (1 << 64) - 1
+
+# deterministic table: every node must cut identically or dedup across nodes breaks
+_GEAR: List[int] = [
+    int.from_bytes(hashlib.sha256(b"replicator-gear-%d" % i).digest()[:8], "big") for i in range(256)
+]
+
+# FastCDC "normalized chunking": a stricter mask before avg_size and a looser
+# one after it pulls the chunk size distribution towards avg_size
+_NORMALIZATION = 2
+
+
+def _high_mask(bits: int) -> int:
+    # the gear hash shifts left, so the high bits carry the most history
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+@dataclass(frozen=True)
+class CDCParams:
+    min_size: int
+    avg_size: int
+    max_size: int
+
+    def __post_init__(self) -> None:
+        if not (0 < self.min_size <= self.avg_size <= self.max_size):
+            raise ValueError("cdc sizes must satisfy 0 < min <= avg <= max")
+
+    @classmethod
+    def from_avg(cls, avg_size: int) -> "CDCParams":
+        return cls(max(avg_size // 4, 1), avg_size, avg_size * 4)
+
+    @property
+    def _bits(self) -> int:
+        return max(self.avg_size.bit_length() - 1, 1)
+
+    @property
+    def mask_s(self) -> int:
+        return _high_mask(min(self._bits + _NORMALIZATION, 63))
+
+    @property
+    def mask_l(self) -> int:
+        return _high_mask(max(self._bits - _NORMALIZATION, 1))
+
+
+def cdc_cut(data, params: CDCParams) -> int:
+    """
+    Length of the first content-defined chunk of `data`.
+    Callers must pass at least max_size bytes unless this is the tail of the input.
+    """
+    n = len(data)
+    if n <= params.min_size:
+        return n
+    if n > params.max_size:
+        n = params.max_size
+    normal = min(params.avg_size, n)
+    if _np is not None:
+        return _cdc_cut_np(data, params, n, normal)
+    return _cdc_cut_py(data, params, n, normal)
+
+
+def _cdc_cut_py(data, params: CDCParams, n: int, normal: int) -> int:
+    # one byte per iteration: ~6 MB/s, hence the numpy path below
+    gear = _GEAR
+    m64 = _M64
+    mask_s = params.mask_s
+    mask_l = params.mask_l
+    fp = 0
+
+    with memoryview(data) as mv:
+        i = params.min_size
+        for b in mv[i:normal]:
+            fp = ((fp << 1) + gear[b]) & m64
+            i += 1
+            if not fp & mask_s:
+                return i
+
+        for b in mv[normal:n]:
+            fp = ((fp << 1) + gear[b]) & m64
+            i += 1
+            if not fp & mask_l:
+                return i
+    return n
+
+
+# numpy (optional) scans for cut points a block at a time
+try:
+    import numpy as _np
+
+    _GEAR_NP = _np.array(_GEAR, dtype=_np.uint64)
+except ImportError:
+    _np = None
+
+# positions hashed per numpy pass: about avg_size / 4, so a typical cut lands
+# in the first few blocks without paying per-block overhead on every few KiB
+_NP_BLOCK_MIN = 4 * 1024
+_NP_BLOCK_MAX = 64 * 1024
+
+
+def _gear_fingerprints(window):
+    """
+    Gear fingerprint after each byte of `window` (uint8 array), starting from
+    fp = 0 before its first byte.
+
+    fp after byte t is sum(gear[b[t-k]] << k for k < 64) mod 2**64 (older
+    bytes are shifted out), computed by doubling: h_2m[t] = h_m[t] +
+    (h_m[t-m] << m), so 6 vector passes instead of a loop over bytes.
+    """
+    h = _GEAR_NP[window]
+    m = 1
+    while m < 64 and m < len(h):
+        h[m:] += h[:-m] << _np.uint64(m)
+        m *= 2
+    return h
+
+
+def _cdc_cut_np(data, params: CDCParams, n: int, normal: int) -> int:
+    buf = _np.frombuffer(data, dtype=_np.uint8, count=n)
+    start = params.min_size
+    mask_s = _np.uint64(params.mask_s)
+    mask_l = _np.uint64(params.mask_l)
+    block = min(max(params.avg_size // 4, _NP_BLOCK_MIN), _NP_BLOCK_MAX)
+    pos = start
+    while pos < n:
+        end = min(pos + block, n)
+        # 63 bytes of history still count towards the first fingerprints
+        lo = max(pos - 63, start)
+        fp = _gear_fingerprints(buf[lo:end])[pos - lo :]
+        split = min(max(normal - pos, 0), len(fp))
+        hits = _np.flatnonzero((fp[:split] & mask_s) == 0)
+        if hits.size:
+            return pos + int(hits[0]) + 1
+        hits = _np.flatnonzero((fp[split:] & mask_l) == 0)
+        if hits.size:
+            return pos + split + int(hits[0]) + 1
+        pos = end
+    return n
+
+
+def iter_cdc_chunks(data: bytes, params: CDCParams) -> Iterator[bytes]:
+    pos = 0
+    end = len(data)
+    while pos < end:
+        cut = cdc_cut(memoryview(data)[pos : pos + params.max_size], params)
+        yield data[pos : pos + cut]
+        pos += cut
+
+
+async def aiter_cdc_chunks(stream: AsyncIterator[bytes], params: CDCParams) -> AsyncIterator[bytes]:
+    """
+    Streaming counterpart of iter_cdc_chunks; buffers at most ~max_size bytes.
+    Cut-point search runs on the I/O pool so the event loop keeps serving.
+    """
+    buf = bytearray()
+    async for piece in stream:
+        if not piece:
+            continue
+        buf += piece
+        while len(buf) >= params.max_size:
+            cut = await offload(cdc_cut, buf, params)
+            yield bytes(buf[:cut])
+            del buf[:cut]
+    while buf:
+        cut = await offload(cdc_cut, buf, params)
+        yield bytes(buf[:cut])
+        del buf[:cut]
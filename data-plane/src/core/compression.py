@@ -0,0 +1,165 @@
+from __future__ import annotations
+import lzma
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set
+
+# Per-chunk compression.
+#
+# A compressed chunk is stored (and sent in frames) as
+#
+#   magic "\xffRCZ" | codec u8 | raw length u64 (big endian) | compressed bytes
+#
+# Chunks that don't compress well are kept raw with no header, which is also
+# what every chunk written before compression existed looks like. (A raw chunk
+# that happens to start with the magic is stored under the IDENTITY codec so it
+# can't be misread.) Hashes are always over the raw bytes, so dedup doesn't
+# depend on the codec.
+
+MAGIC = b"\xffRCZ"
+HEADER = struct.Struct(">4sBQ")
+
+RAW = 0
+IDENTITY = 255
+
+
+@dataclass(frozen=True)
+class Codec:
+    codec_id: int
+    name: str
+    compress: Callable[[bytes, int], bytes]
+    # (payload, max output bytes) -> raw bytes
+    decompress: Callable[[bytes, int], bytes]
+
+
+def _zlib_compress(data: bytes, level: int) -> bytes:
+    return zlib.compress(data, level if level >= 0 else 6)
+
+
+def _zlib_decompress(payload: bytes, max_len: int) -> bytes:
+    d = zlib.decompressobj()
+    out = d.decompress(payload, max_len)
+    if d.unconsumed_tail or not d.eof:
+        raise ValueError("zlib payload is larger than its header says or truncated")
+    return out
+
+
+def _lzma_compress(data: bytes, level: int) -> bytes:
+    return lzma.compress(data, preset=level if level >= 0 else 6)
+
+
+def _lzma_decompress(payload: bytes, max_len: int) -> bytes:
+    d = lzma.LZMADecompressor()
+    out = d.decompress(payload, max_len)
+    if not d.eof:
+        raise ValueError("lzma payload is larger than its header says or truncated")
+    return out
+
+
+_CODECS: Dict[int, Codec] = {
+    1: Codec(1, "zlib", _zlib_compress, _zlib_decompress),
+    2: Codec(2, "lzma", _lzma_compress, _lzma_decompress),
+}
+
+# faster codecs, when their (optional) packages are installed
+try:
+    import zstandard
+
+    _CODECS[3] = Codec(
+        3,
+        "zstd",
+        lambda data, level: zstandard.ZstdCompressor(level=level if level >= 0 else 3).compress(data),
+        lambda payload, max_len: zstandard.ZstdDecompressor().decompress(payload, max_output_size=max_len),
+    )
+except ImportError:
+    pass
+
+try:
+    import lz4.frame
+
+    def _lz4_decompress(payload: bytes, max_len: int) -> bytes:
+        d = lz4.frame.LZ4FrameDecompressor()
+        out = d.decompress(payload, max_length=max_len)
+        if not d.eof or d.unused_data:
+            raise ValueError("lz4 payload is larger than its header says or truncated")
+        return out
+
+    _CODECS[4] = Codec(
+        4,
+        "lz4",
+        lambda data, level: lz4.frame.compress(data, compression_level=max(level, 0)),
+        _lz4_decompress,
+    )
+except ImportError:
+    pass
+
+_BY_NAME = {c.name: c for c in _CODECS.values()}
+
+
+def available() -> List[str]:
+    return [c.name for c in _CODECS.values()]
+
+
+def by_name(name: str) -> Codec:
+    try:
+        return _BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"unknown or unavailable codec {name!r}")
+
+
+def name_of(codec_id: int) -> str:
+    return _CODECS[codec_id].name
+
+
+def parse_codecs(header: Optional[str]) -> Set[int]:
+    """
+    Codec ids this node can decode out of a "zlib, zstd" style list
+    (x-chunk-codecs); unknown names are ignored.
+    """
+    if not header:
+        return set()
+    names = {n.strip().lower() for n in header.split(",")}
+    return {c.codec_id for c in _CODECS.values() if c.name in names}
+
+
+def encode(data: bytes, codec: Optional[Codec], level: int = -1, min_ratio: float = 0.9) -> bytes:
+    """
+    Stored form of a chunk: compressed with a header if that saves at least
+    (1 - min_ratio) of the bytes, else the raw bytes unchanged.
+    """
+    if codec is not None and data:
+        packed = codec.compress(data, level)
+        if HEADER.size + len(packed) <= len(data) * min_ratio:
+            return HEADER.pack(MAGIC, codec.codec_id, len(data)) + packed
+    if data[:4] == MAGIC:
+        return HEADER.pack(MAGIC, IDENTITY, len(data)) + data
+    return data
+
+
+def codec_of(blob: bytes) -> int:
+    if len(blob) >= HEADER.size and blob[:4] == MAGIC:
+        return blob[4]
+    return RAW
+
+
+def decode(blob: bytes) -> bytes:
+    """
+    Raw chunk bytes from a stored/framed encoding. Raises ValueError on an
+    unknown codec or a payload that doesn't match its header.
+    """
+    if codec_of(blob) == RAW:
+        return blob
+    _, codec_id, raw_len = HEADER.unpack_from(blob)
+    if codec_id == IDENTITY:
+        return blob[HEADER.size :]
+    codec = _CODECS.get(codec_id)
+    if codec is None:
+        raise ValueError(f"chunk compressed with unsupported codec {codec_id}")
+    try:
+        data = codec.decompress(blob[HEADER.size :], raw_len)
+    except Exception as e:
+        raise ValueError(f"corrupt {codec.name} chunk: {e}") from e
+    if len(data) != raw_len:
+        raise ValueError(f"corrupt {codec.name} chunk: {len(data)} bytes, header says {raw_len}")
+    return data
@@ -0,0 +1,62 @@
+import os
+from pydantic import BaseModel
+
+
+class Settings(BaseModel):
+    # fs: one file per chunk under a 2-hex fan-out; pack: append-only segment files
+    chunk_store_backend: str = os.getenv("CHUNK_STORE_BACKEND", "fs")
+    chunk_store_root: str = os.getenv("CHUNK_STORE_ROOT", "/app/data/blobs")
+    pack_segment_bytes: int = int(os.getenv("PACK_SEGMENT_BYTES", str(256 * 1024 * 1024)))
+    # sealed segments with at least this fraction of dead bytes get rewritten
+    pack_compact_ratio: float = float(os.getenv("PACK_COMPACT_RATIO", "0.5"))
+    pack_compact_interval_s: float = float(os.getenv("PACK_COMPACT_INTERVAL_S", "300"))
+    # appended records reach the disk (fsync) within this many seconds; a power
+    # loss can drop that window. 0 fsyncs every record
+    pack_fsync_interval_s: float = float(os.getenv("PACK_FSYNC_INTERVAL_S", "1"))
+
+    # threads for chunk hashing / store I/O off the event loop (0 = inline),
+    # and chunks of one ingest or batch PUT processed concurrently
+    io_workers: int = int(os.getenv("IO_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+    ingest_window: int = int(os.getenv("INGEST_WINDOW", "8"))
+
+    # in-memory read cache: chunk bodies (byte budget) and hash -> present/absent
+    chunk_cache_bytes: int = int(os.getenv("CHUNK_CACHE_BYTES", str(128 * 1024 * 1024)))
+    chunk_cache_entries: int = int(os.getenv("CHUNK_CACHE_ENTRIES", "200000"))
+
+    # chunk GETs, batch gets and object downloads send chunks of at least
+    # chunk_mmap_min_bytes from an mmap of the store file instead of copying
+    # them into a bytes object first (CHUNK_MMAP=0 always copies)
+    chunk_mmap: bool = os.getenv("CHUNK_MMAP", "1") not in ("0", "false", "no")
+    chunk_mmap_min_bytes: int = int(os.getenv("CHUNK_MMAP_MIN_BYTES", str(64 * 1024)))
+
+    # chunk PUT spool files (<root>/incoming) older than this are removed at
+    # startup as leftovers of a crash
+    staging_max_age_s: float = float(os.getenv("STAGING_MAX_AGE_S", "3600"))
+
+    # fs backend: Bloom filter answering definite misses without a stat();
+    # sized for presence_capacity chunks at presence_fp_rate false positives.
+    # There is deliberately no exact hash set on fs (the pack backend's index
+    # is exact): a Python set of digests costs ~100 bytes per chunk (~1 GB at
+    # the default capacity) against ~1.2 bytes for the filter at 1%, and a
+    # "maybe" still stats the store
+    presence_filter: bool = os.getenv("PRESENCE_FILTER", "1") not in ("0", "false", "no")
+    presence_capacity: int = int(os.getenv("PRESENCE_CAPACITY", "10000000"))
+    presence_fp_rate: float = float(os.getenv("PRESENCE_FP_RATE", "0.01"))
+
+    # per-chunk compression of newly stored chunks: none | zlib | lzma | zstd | lz4
+    # (the last two need their packages); kept raw unless compressed size is
+    # at most min_ratio of the original. level -1 = codec default
+    chunk_compression: str = os.getenv("CHUNK_COMPRESSION", "none").lower()
+    chunk_compression_level: int = int(os.getenv("CHUNK_COMPRESSION_LEVEL", "-1"))
+    chunk_compression_min_ratio: float = float(os.getenv("CHUNK_COMPRESSION_MIN_RATIO", "0.9"))
+
+    # chunk GC: unreferenced chunks older than gc_grace_s are deleted, at most
+    # gc_max_deletes_per_s, scanning gc_batch stored hashes per DB query
+    gc_enabled: bool = os.getenv("GC_ENABLED", "1") not in ("0", "false", "no")
+    gc_interval_s: float = float(os.getenv("GC_INTERVAL_S", "600"))
+    gc_grace_s: float = float(os.getenv("GC_GRACE_S", "3600"))
+    gc_batch: int = int(os.getenv("GC_BATCH", "1000"))
+    gc_max_deletes_per_s: float = float(os.getenv("GC_MAX_DELETES_PER_S", "500"))
+
+
+settings = Settings()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Deque, Optional, TypeVar
+
+from src.core.config import settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Worker pool for chunk hashing and chunk-store I/O. hashlib and file I/O
+# release the GIL, so async handlers hand that work off here instead of
+# blocking the event loop, and several chunks of one ingest hash in parallel.
+# IO_WORKERS=0 runs everything inline on the loop (the old behaviour).
+_pool: Optional[ThreadPoolExecutor] = (
+    ThreadPoolExecutor(max_workers=settings.io_workers, thread_name_prefix="chunk-io")
+    if settings.io_workers > 0
+    else None
+)
+
+
+async def offload(fn: Callable[..., R], *args) -> R:
+    if _pool is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
+
+
+async def amap_ordered(fn: Callable[[T], R], items: AsyncIterator[T], window: int) -> AsyncIterator[R]:
+    """
+    Apply fn to each item on the pool with up to `window` calls in flight,
+    yielding results in input order. Bounds memory to ~window items.
+    """
+    pending: Deque[asyncio.Future] = deque()
+    try:
+        async for item in items:
+            pending.append(asyncio.ensure_future(offload(fn, item)))
+            if len(pending) >= window:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for f in pending:
+            f.cancel()
+
+
+def shutdown() -> None:
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import struct
+from typing import AsyncIterator, Tuple
+
+# Multi-chunk wire format used by /chunks/batch/*: a plain concatenation of
+#
+#   digest 32B (raw SHA-256) | flags u8 | length u64 (big endian) | payload
+#
+# flags: 0 = payload is the raw chunk bytes; otherwise the compression codec
+# id, and payload is the chunk in its compressed encoding (core/compression.py).
+# Senders only use codecs the receiver listed in x-chunk-codecs.
+
+FRAME_HEADER = struct.Struct(">32sBQ")
+FRAMES_MEDIA_TYPE = "application/x-replicator-frames"
+
+FLAG_RAW = 0
+CODECS_HEADER = "x-chunk-codecs"
+
+# refuse to buffer absurd frames from a misbehaving peer
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def encode_frame_header(chunk_hash: str, length: int, flags: int = FLAG_RAW) -> bytes:
+    return FRAME_HEADER.pack(bytes.fromhex(chunk_hash), flags, length)
+
+
+async def aiter_frames(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, int, bytes]]:
+    """
+    Incrementally parse frames from a byte stream, yielding (hash hex, flags, payload)
+    as soon as each frame is complete. Buffers at most ~one frame.
+    """
+    buf = bytearray()
+    async for piece in stream:
+        if not piece:
+            continue
+        buf += piece
+        while len(buf) >= FRAME_HEADER.size:
+            digest, flags, length = FRAME_HEADER.unpack_from(buf)
+            if length > MAX_FRAME_BYTES:
+                raise ValueError(f"frame too large ({length} bytes)")
+            end = FRAME_HEADER.size + length
+            if len(buf) < end:
+                break
+            yield digest.hex(), flags, bytes(buf[FRAME_HEADER.size : end])
+            del buf[:end]
+    if buf:
+        raise ValueError("truncated frame at end of stream")
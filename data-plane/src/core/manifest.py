@@ -0,0 +1,41 @@
+from __future__ import annotations
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+CHUNKERS = ("fixed", "cdc")
+
+
+class ManifestIn(BaseModel):
+    size_bytes: int
+    chunk_size: int
+    chunks: List[str]
+    # variable-length (cdc) manifests carry explicit per-chunk lengths
+    chunker: str = "fixed"
+    chunk_sizes: Optional[List[int]] = None
+
+
+def check_manifest(m: ManifestIn) -> None:
+    """
+    Reject a manifest this node couldn't serve correctly, whether it came
+    from a client (PUT /objects/{id}/manifest) or a peer (pull replication).
+    Raises ValueError. Chunk presence is checked by each caller.
+    """
+    if m.chunker not in CHUNKERS:
+        raise ValueError(f"unknown chunker {m.chunker!r}")
+    if m.chunk_sizes is not None and (len(m.chunk_sizes) != len(m.chunks) or sum(m.chunk_sizes) != m.size_bytes):
+        raise ValueError("chunk_sizes do not match chunks/size_bytes")
+    if m.chunker != "fixed" and m.chunk_sizes is None:
+        raise ValueError("variable-length manifest needs chunk_sizes")
+    if m.chunk_size <= 0 or m.size_bytes < 0:
+        raise ValueError("chunk_size must be > 0 and size_bytes >= 0")
+    # ranged reads of a fixed manifest locate chunks by division
+    if m.chunker == "fixed" and -(-m.size_bytes // m.chunk_size) != len(m.chunks):
+        raise ValueError("chunks do not match size_bytes/chunk_size")
+
+    if any(len(h) != 64 for h in m.chunks):
+        raise ValueError("invalid chunk hash length")
+    try:
+        bytes.fromhex("".join(m.chunks))
+    except ValueError:
+        raise ValueError("invalid chunk hash format")
@@ -0,0 +1,137 @@
+from __future__ import annotations
+import json
+import logging
+import struct
+from typing import List, Set, Tuple
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from src.db.models import Base, ChunkRef, ObjectManifest, pack_hashes, pack_sizes
+
+logger = logging.getLogger("replicator")
+
+# legacy manifest rows converted per round trip during migration
+_MIGRATE_BATCH = 500
+
+
+def refcount(db: Session, chunk_hash: str) -> int:
+    """
+    Number of objects whose current manifest references chunk_hash.
+    """
+    return db.scalar(
+        select(func.count()).select_from(ChunkRef).where(ChunkRef.chunk_hash == bytes.fromhex(chunk_hash))
+    )
+
+
+def referencing_objects(db: Session, chunk_hash: str, limit: int = 100) -> List[str]:
+    return list(
+        db.scalars(
+            select(ChunkRef.object_id)
+            .where(ChunkRef.chunk_hash == bytes.fromhex(chunk_hash))
+            .order_by(ChunkRef.object_id)
+            .limit(limit)
+        )
+    )
+
+
+def referenced(db: Session, chunk_hashes: List[str]) -> Set[str]:
+    """
+    The subset of chunk_hashes referenced by at least one manifest.
+    """
+    if not chunk_hashes:
+        return set()
+    rows = db.scalars(
+        select(ChunkRef.chunk_hash).where(ChunkRef.chunk_hash.in_([bytes.fromhex(h) for h in chunk_hashes])).distinct()
+    )
+    return {d.hex() for d in rows}
+
+
+def migrate_legacy_manifests(engine: Engine) -> None:
+    """
+    One-off upgrade of node DBs that still store manifests as chunks_json /
+    chunk_sizes_json text: the old table is renamed aside, the new schema is
+    created, rows are re-encoded (binary digests + chunk_refs) in batches, and
+    the old table is dropped.
+
+    All of it is one SQLite transaction, so an interrupted upgrade leaves the
+    old table as it was and runs again on next start. A legacy table left
+    behind by an earlier, non-transactional upgrade is resumed: its rows are
+    converted unless the object already has a (newer) manifest. Rows that
+    can't be decoded are logged and kept in the legacy table instead of
+    failing startup.
+    """
+    table = ObjectManifest.__tablename__
+    legacy = f"{table}_legacy"
+    insp = inspect(engine)
+    if not insp.has_table(legacy):
+        if not insp.has_table(table):
+            return
+        if "chunks_json" not in {c["name"] for c in insp.get_columns(table)}:
+            return
+
+    # pysqlite commits on its own before DDL; with the driver in autocommit
+    # and an explicit BEGIN, the rename and create_all roll back too
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            skipped = _convert_legacy_manifests(conn, table, legacy)
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+
+    for object_id, err in skipped:
+        logger.warning("legacy manifest of %s not migrated, left in %s: %s", object_id, legacy, err)
+
+
+def _convert_legacy_manifests(conn: Connection, table: str, legacy: str) -> List[Tuple[str, str]]:
+    if not inspect(conn).has_table(legacy):
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    Base.metadata.create_all(bind=conn)
+
+    legacy_cols = {c["name"] for c in inspect(conn).get_columns(legacy)}
+    cols = "object_id, size_bytes, chunk_size, chunks_json"
+    cols += ", chunk_sizes_json" if "chunk_sizes_json" in legacy_cols else ", NULL"
+    cols += ", chunker" if "chunker" in legacy_cols else ", 'fixed'"
+
+    db = Session(bind=conn)
+    skipped: List[Tuple[str, str]] = []
+    after = ""
+    while True:
+        rows = conn.execute(
+            text(
+                f"SELECT {cols} FROM {legacy} WHERE object_id > :after"
+                f" AND object_id NOT IN (SELECT object_id FROM {table}) ORDER BY object_id LIMIT :n"
+            ),
+            {"after": after, "n": _MIGRATE_BATCH},
+        ).all()
+        if not rows:
+            break
+        for object_id, size_bytes, chunk_size, chunks_json, sizes_json, chunker in rows:
+            try:
+                chunks_bin = pack_hashes(json.loads(chunks_json))
+                sizes_bin = pack_sizes(json.loads(sizes_json)) if sizes_json else None
+            except (TypeError, ValueError, struct.error) as e:
+                skipped.append((object_id, repr(e)))
+                continue
+            db.add(
+                ObjectManifest(
+                    object_id=object_id,
+                    size_bytes=size_bytes,
+                    chunk_size=chunk_size,
+                    chunker=chunker or "fixed",
+                    chunks_bin=chunks_bin,
+                    chunk_sizes_bin=sizes_bin,
+                )
+            )
+            ChunkRef.replace(db, object_id, chunks_bin)
+        db.flush()
+        after = rows[-1][0]
+
+    # rows now (or already) in the new table are done; only the bad ones stay
+    conn.execute(text(f"DELETE FROM {legacy} WHERE object_id IN (SELECT object_id FROM {table})"))
+    if not skipped:
+        conn.execute(text(f"DROP TABLE {legacy}"))
+    return skipped
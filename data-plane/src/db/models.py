@@ -1,6 +1,30 @@
 from __future__ import annotations
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Integer, Text
+import struct
+from typing import Iterator, List, Optional, Sequence
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, Session
+from sqlalchemy import Row, String, Integer, LargeBinary, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+DIGEST_BYTES = 32
+
+
+def pack_hashes(chunks: List[str]) -> bytes:
+    return bytes.fromhex("".join(chunks))
+
+
+def unpack_hashes(blob: bytes) -> List[str]:
+    h = blob.hex()
+    n = DIGEST_BYTES * 2
+    return [h[i : i + n] for i in range(0, len(h), n)]
+
+
+def pack_sizes(sizes: List[int]) -> bytes:
+    return struct.pack(f"<{len(sizes)}Q", *sizes)
+
+
+def unpack_sizes(blob: bytes) -> List[int]:
+    return list(struct.unpack(f"<{len(blob) // 8}Q", blob))
+
 
 class Base(DeclarativeBase):
     pass
@@ -10,7 +34,117 @@ class ObjectManifest(Base):
 
     object_id: Mapped[str] = mapped_column(String(256), primary_key=True)
     size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    # fixed: every chunk but the last is chunk_size; cdc: chunk_size is the average
     chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    chunker: Mapped[str] = mapped_column(String(16), nullable=False, default="fixed", server_default="fixed")
+
+    # raw SHA-256 digests, 32 bytes per chunk, in object order
+    chunks_bin: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # little-endian u64 per chunk; only set for variable-length chunkers
+    chunk_sizes_bin: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+
+    @property
+    def chunks(self) -> List[str]:
+        return unpack_hashes(self.chunks_bin)
+
+    @property
+    def chunk_sizes(self) -> Optional[List[int]]:
+        return unpack_sizes(self.chunk_sizes_bin) if self.chunk_sizes_bin is not None else None
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.chunks_bin) // DIGEST_BYTES
+
+    @classmethod
+    def upsert(
+        cls,
+        db: Session,
+        object_id: str,
+        size_bytes: int,
+        chunk_size: int,
+        chunks: List[str],
+        chunker: str = "fixed",
+        chunk_sizes: Optional[List[int]] = None,
+    ) -> None:
+        """
+        Create or overwrite the manifest for object_id, replace its rows in the
+        chunk -> object reverse index, and commit, all in one transaction. The
+        manifest is written with INSERT .. ON CONFLICT DO UPDATE, so two
+        installs of the same object racing each other (a pull and a manifest
+        PUT, say) both succeed and the last one wins.
+        """
+        values = {
+            "size_bytes": size_bytes,
+            "chunk_size": chunk_size,
+            "chunker": chunker,
+            "chunks_bin": pack_hashes(chunks),
+            "chunk_sizes_bin": pack_sizes(chunk_sizes) if chunk_sizes is not None else None,
+        }
+        db.execute(
+            sqlite_insert(cls)
+            .values(object_id=object_id, **values)
+            .on_conflict_do_update(index_elements=[cls.object_id], set_=values)
+        )
+        ChunkRef.replace(db, object_id, values["chunks_bin"])
+        db.commit()
+
+    @classmethod
+    def summaries(cls, db: Session, after: Optional[str], limit: int) -> Sequence[Row]:
+        """
+        Up to `limit` objects with object_id > after, in object_id order
+        (keyset pagination), without loading their chunk lists.
+        """
+        q = select(
+            cls.object_id,
+            cls.size_bytes,
+            cls.chunk_size,
+            cls.chunker,
+            (func.length(cls.chunks_bin) // DIGEST_BYTES).label("chunk_count"),
+        )
+        if after is not None:
+            q = q.where(cls.object_id > after)
+        return db.execute(q.order_by(cls.object_id).limit(limit)).all()
+
+    @classmethod
+    def iter_after(cls, db: Session, after: Optional[str], limit: int) -> Iterator["ObjectManifest"]:
+        """
+        Like summaries(), but full manifests, fetched as the caller iterates.
+        """
+        q = select(cls)
+        if after is not None:
+            q = q.where(cls.object_id > after)
+        return iter(db.execute(q.order_by(cls.object_id).limit(limit)).scalars())
+
+    @classmethod
+    def remove(cls, db: Session, object_id: str) -> bool:
+        """
+        Drop the manifest and its chunk references; the chunks themselves are
+        left for GC. Returns False if there was no such object.
+        """
+        m = db.get(cls, object_id)
+        if not m:
+            return False
+        db.delete(m)
+        ChunkRef.replace(db, object_id, b"")
+        db.commit()
+        return True
+
+
+class ChunkRef(Base):
+    """
+    Reverse index: one row per (chunk, object) pair. The primary key leads with
+    chunk_hash, so "which objects reference X" / refcount(X) is an index range
+    scan rather than a scan over every manifest.
+    """
+
+    __tablename__ = "chunk_refs"
+
+    chunk_hash: Mapped[bytes] = mapped_column(LargeBinary(DIGEST_BYTES), primary_key=True)
+    object_id: Mapped[str] = mapped_column(String(256), primary_key=True, index=True)
 
-    # JSON string: ["hash1","hash2",...]
-    chunks_json: Mapped[str] = mapped_column(Text, nullable=False)
+    @classmethod
+    def replace(cls, db: Session, object_id: str, chunks_bin: bytes) -> None:
+        db.execute(delete(cls).where(cls.object_id == object_id))
+        digests = {chunks_bin[i : i + DIGEST_BYTES] for i in range(0, len(chunks_bin), DIGEST_BYTES)}
+        if digests:
+            db.execute(insert(cls), [{"chunk_hash": d, "object_id": object_id} for d in digests])
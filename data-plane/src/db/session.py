@@ -4,6 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.db.models import Base
+from src.db.index import migrate_legacy_manifests
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:////app/data/node.db")
 
@@ -15,6 +16,8 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def init_db() -> None:
+    # schema changes are explicit upgrades (see migrate_legacy_manifests)
+    migrate_legacy_manifests(engine)
     Base.metadata.create_all(bind=engine)
 
 def get_db():
@@ -1,18 +1,75 @@
+import asyncio
+import logging
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
 from src.api.health import router as health_router
 from src.api.chunks import router as chunks_router
 from src.api.objects import router as objects_router
 from src.api.metrics import router as metrics_router
+from src.api.replication import router as replication_router
+from src.core import executor
+from src.core.config import settings
 from src.db.session import init_db
+from src.services.gc_service import chunk_gc
+from src.storage.factory import get_backend_store, get_chunk_store, get_presence_filter, get_staging_dir
+from src.storage.pack_store import PackChunkStore
+
+logger = logging.getLogger("replicator")
 
 app = FastAPI(title="Replicator Data Plane", version="0.1.0")
 
+
+async def _compact_forever(store: PackChunkStore) -> None:
+    while True:
+        await asyncio.sleep(settings.pack_compact_interval_s)
+        try:
+            reclaimed = await run_in_threadpool(store.compact, settings.pack_compact_ratio)
+            if reclaimed:
+                logger.info("pack compaction reclaimed %d bytes", reclaimed)
+        except Exception:
+            logger.exception("pack compaction failed")
+
+
+async def _sync_forever(store: PackChunkStore) -> None:
+    while True:
+        await asyncio.sleep(settings.pack_fsync_interval_s)
+        try:
+            await run_in_threadpool(store.sync)
+        except Exception:
+            logger.exception("pack fsync failed")
+
+
 @app.on_event("startup")
-def _startup():
+async def _startup():
     init_db()
+    # build the store stack (and start the presence scan) here rather than at
+    # import, so importing the app has no side effects on the store root
+    get_chunk_store()
+    get_staging_dir()
+    store = get_backend_store()
+    if isinstance(store, PackChunkStore):
+        asyncio.create_task(_compact_forever(store))
+        if settings.pack_fsync_interval_s > 0:
+            asyncio.create_task(_sync_forever(store))
+    if settings.gc_enabled:
+        asyncio.create_task(chunk_gc.run_forever())
+
+
+@app.on_event("shutdown")
+def _shutdown():
+    store = get_backend_store()
+    if isinstance(store, PackChunkStore):
+        store.close()
+    presence = get_presence_filter()
+    if presence is not None:
+        presence.save_snapshot()
+    executor.shutdown()
+
 
 app.include_router(health_router)
 app.include_router(chunks_router)
 app.include_router(objects_router)
 app.include_router(metrics_router)
+app.include_router(replication_router)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import List
+
+from starlette.concurrency import run_in_threadpool
+
+from src.api.metrics import (
+    gc_bytes_reclaimed_total,
+    gc_chunks_reclaimed_total,
+    gc_chunks_scanned_total,
+    gc_runs_total,
+)
+from src.core.config import settings
+from src.db.index import referenced
+from src.db.session import SessionLocal
+from src.storage.factory import get_chunk_store
+
+logger = logging.getLogger("replicator")
+
+
+@dataclass
+class GCStats:
+    scanned: int = 0
+    reclaimed_chunks: int = 0
+    reclaimed_bytes: int = 0
+    seconds: float = 0.0
+
+
+class ChunkGC:
+    """
+    Incremental mark-and-sweep over the chunk store, using chunk_refs as the
+    mark set:
+    - walk stored hashes gc_batch at a time
+    - one DB query per batch finds which of them any manifest references
+    - unreferenced chunks last written/touched before now - grace_s are deleted
+
+    The grace period covers ingests in flight: their chunks are written (or
+    touched, on a dedupe hit) before the manifest commits, and touch/delete are
+    serialized in the store, so a chunk is only reclaimed if nothing has
+    claimed it for grace_s. Deletes are paced to max_deletes_per_s.
+    """
+
+    def __init__(
+        self,
+        grace_s: float | None = None,
+        batch: int | None = None,
+        max_deletes_per_s: float | None = None,
+    ):
+        self.grace_s = settings.gc_grace_s if grace_s is None else grace_s
+        self.batch = batch or settings.gc_batch
+        self.max_deletes_per_s = max_deletes_per_s or settings.gc_max_deletes_per_s
+        self.last_run: GCStats | None = None
+
+    @property
+    def store(self):
+        # resolved on use: the store is built at app startup, after this import
+        return get_chunk_store()
+
+    async def run_forever(self, interval_s: float | None = None) -> None:
+        interval_s = interval_s or settings.gc_interval_s
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                stats = await self.collect()
+                if stats.reclaimed_chunks:
+                    logger.info(
+                        "chunk gc reclaimed %d chunks / %d bytes (scanned %d)",
+                        stats.reclaimed_chunks,
+                        stats.reclaimed_bytes,
+                        stats.scanned,
+                    )
+            except Exception:
+                logger.exception("chunk gc failed")
+
+    async def collect(self) -> GCStats:
+        """
+        One full pass over the store.
+        """
+        stats = GCStats()
+        started = time.monotonic()
+        cutoff = time.time() - self.grace_s
+        hashes = self.store.iter_hashes()
+
+        while True:
+            batch = await run_in_threadpool(lambda: list(islice(hashes, self.batch)))
+            if not batch:
+                break
+            freed = await run_in_threadpool(self._sweep, batch, cutoff)
+            stats.scanned += len(batch)
+            stats.reclaimed_chunks += len(freed)
+            stats.reclaimed_bytes += sum(freed)
+            gc_chunks_scanned_total.inc(len(batch))
+            gc_chunks_reclaimed_total.inc(len(freed))
+            gc_bytes_reclaimed_total.inc(sum(freed))
+
+            # rate limit: spread deletes out so GC doesn't starve foreground I/O
+            if freed:
+                await asyncio.sleep(len(freed) / self.max_deletes_per_s)
+            else:
+                await asyncio.sleep(0)
+
+        stats.seconds = time.monotonic() - started
+        gc_runs_total.inc()
+        self.last_run = stats
+        return stats
+
+    def _sweep(self, batch: List[str], cutoff: float) -> List[int]:
+        db = SessionLocal()
+        try:
+            live = referenced(db, batch)
+        finally:
+            db.close()
+
+        freed = []
+        for h in batch:
+            if h in live:
+                continue
+            n = self.store.delete_if_older(h, cutoff)
+            if n is not None:
+                freed.append(n)
+        return freed
+
+
+chunk_gc = ChunkGC()
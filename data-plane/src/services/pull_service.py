@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from src.api.metrics import bytes_in_total, chunks_put_total, dedupe_misses_total, pulls_total
+from src.core.executor import offload
+from src.core import compression
+from src.core.framing import CODECS_HEADER, FRAMES_MEDIA_TYPE, aiter_frames
+from src.core.manifest import ManifestIn, check_manifest
+from src.db.models import ObjectManifest
+from src.db.session import SessionLocal
+from src.storage.factory import get_chunk_store
+
+logger = logging.getLogger("replicator")
+
+# chunks per /chunks/batch/get request to the peer, and batches in flight
+PULL_BATCH = 64
+PULL_CONCURRENCY = 4
+READ_BYTES = 256 * 1024
+# finished pulls kept around for status queries
+MAX_FINISHED = 1000
+
+
+@dataclass
+class PullStatus:
+    pull_id: int
+    object_id: str
+    source_url: str
+    status: str = "running"  # running/succeeded/failed
+    total_chunks: int = 0
+    unique_chunks: int = 0
+    missing_chunks: int = 0
+    copied_chunks: int = 0
+    bytes_copied: int = 0
+    error: str = ""
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+class PullService:
+    """
+    Replicates an object onto this node straight from a peer node:
+    - fetch the manifest from the peer
+    - check chunk presence locally (no network round trips)
+    - pull missing chunks as framed batches, verifying every hash
+    - install the manifest once all chunks are present
+
+    The control plane only starts the pull and polls its status, so object
+    bytes never pass through it.
+    """
+
+    def __init__(self, timeout_s: float = 300.0):
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=timeout_s)
+        self._ids = itertools.count(1)
+        self._pulls: "OrderedDict[int, PullStatus]" = OrderedDict()
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    @property
+    def store(self):
+        # resolved on use: the store is built at app startup, after this import
+        return get_chunk_store()
+
+    def start(self, object_id: str, source_url: str) -> PullStatus:
+        source_url = source_url.rstrip("/")
+        # idempotent while in flight: a retried instruction joins the running pull
+        for p in self._pulls.values():
+            if p.status == "running" and p.object_id == object_id and p.source_url == source_url:
+                return p
+
+        p = PullStatus(pull_id=next(self._ids), object_id=object_id, source_url=source_url)
+        self._pulls[p.pull_id] = p
+        self._tasks[p.pull_id] = asyncio.create_task(self._run(p))
+        self._trim()
+        return p
+
+    def get(self, pull_id: int) -> Optional[PullStatus]:
+        return self._pulls.get(pull_id)
+
+    def _trim(self) -> None:
+        finished = [i for i, p in self._pulls.items() if p.status != "running"]
+        for i in finished[: max(len(finished) - MAX_FINISHED, 0)]:
+            del self._pulls[i]
+
+    async def _run(self, p: PullStatus) -> None:
+        try:
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                await self._pull(session, p)
+            p.status = "succeeded"
+        except Exception as e:
+            logger.warning("pull %s of %s from %s failed: %r", p.pull_id, p.object_id, p.source_url, e)
+            p.status = "failed"
+            p.error = str(e) or repr(e)
+        finally:
+            pulls_total.labels(status=p.status).inc()
+            self._tasks.pop(p.pull_id, None)
+
+    async def _pull(self, session: aiohttp.ClientSession, p: PullStatus) -> None:
+        async with session.get(f"{p.source_url}/objects/{p.object_id}/manifest") as r:
+            if r.status != 200:
+                raise RuntimeError(f"manifest fetch failed {r.status}: {await r.text()}")
+            body = await r.json()
+        # the same checks a client's PUT manifest gets, before pulling anything
+        manifest = ManifestIn.model_validate(body)
+        check_manifest(manifest)
+
+        chunks = manifest.chunks
+        unique = list(dict.fromkeys(chunks))
+        # touch what we already have so GC keeps it until the manifest lands
+        missing = await offload(lambda: [h for h in unique if not self.store.touch(h)])
+        p.total_chunks = len(chunks)
+        p.unique_chunks = len(unique)
+        p.missing_chunks = len(missing)
+
+        sem = asyncio.Semaphore(PULL_CONCURRENCY)
+
+        async def pull_batch(batch: List[str]) -> None:
+            async with sem:
+                await self._pull_batch(session, p, batch)
+
+        await asyncio.gather(*(pull_batch(missing[i : i + PULL_BATCH]) for i in range(0, len(missing), PULL_BATCH)))
+
+        absent = await offload(lambda: [h for h in unique if not self.store.exists(h)])
+        if absent:
+            raise RuntimeError(f"{len(absent)} chunks still missing after pull")
+
+        # the commit is blocking DB I/O: keep it off the event loop
+        await offload(self._install_manifest, p.object_id, manifest)
+
+    @staticmethod
+    def _install_manifest(object_id: str, manifest: ManifestIn) -> None:
+        db = SessionLocal()
+        try:
+            ObjectManifest.upsert(
+                db,
+                object_id,
+                size_bytes=manifest.size_bytes,
+                chunk_size=manifest.chunk_size,
+                chunks=manifest.chunks,
+                chunker=manifest.chunker,
+                chunk_sizes=manifest.chunk_sizes,
+            )
+        finally:
+            db.close()
+
+    async def _pull_batch(self, session: aiohttp.ClientSession, p: PullStatus, batch: List[str]) -> None:
+        url = f"{p.source_url}/chunks/batch/get"
+        # compressed chunks on the peer come over compressed if we can decode them
+        headers = {CODECS_HEADER: ",".join(compression.available())}
+        async with session.post(url, json={"hashes": batch}, headers=headers) as r:
+            if r.status != 200:
+                raise RuntimeError(f"peer batch GET failed {r.status}: {await r.text()}")
+            if not r.content_type.startswith(FRAMES_MEDIA_TYPE):
+                raise RuntimeError(f"peer batch GET returned {r.content_type}")
+
+            expected = set(batch)
+            async for chunk_hash, flags, data in aiter_frames(r.content.iter_chunked(READ_BYTES)):
+                if chunk_hash not in expected:
+                    raise RuntimeError(f"unexpected frame for chunk {chunk_hash}")
+                # verified against the hash after decoding, on the I/O pool
+                if await offload(self.store.put_frame, chunk_hash, flags, data):
+                    dedupe_misses_total.inc()
+
+                chunks_put_total.inc()
+                bytes_in_total.inc(len(data))
+                p.copied_chunks += 1
+                p.bytes_copied += len(data)
+
+
+pull_service = PullService()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from src.api.metrics import chunk_cache_bytes, chunk_cache_evictions_total, chunk_cache_hits_total, chunk_cache_misses_total
+from src.storage.chunk_store import ChunkStore
+from src.storage.pack_store import PackChunkStore
+
+
+class CachedChunkStore:
+    """
+    Read-through cache in front of a chunk store:
+    - body cache: LRU of chunk bytes bounded by `max_bytes`
+    - existence cache: LRU of hash -> present/absent, bounded by `max_entries`
+
+    Chunks are content-addressed, so a cached body never goes stale; the only
+    invalidation needed is on write (absent -> present) and on delete/GC
+    (present -> absent), and both go through this wrapper. Writes don't
+    populate the body cache, so a large ingest doesn't flush hot chunks; nor
+    do chunks read_view() returns mapped, which the page cache already holds.
+
+    A lookup that reads the inner store outside the lock only records what it
+    saw if no write or delete of that hash (one of `_GEN_SLOTS` generation
+    counters, by hash) happened meanwhile, so it can't overwrite their entry.
+    """
+
+    _GEN_SLOTS = 1024
+
+    def __init__(self, inner: Union[ChunkStore, PackChunkStore], max_bytes: int, max_entries: int):
+        self.inner = inner
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        # largest single chunk worth caching: don't let one chunk evict most of the cache
+        self.max_item_bytes = max_bytes // 8
+        self._lock = threading.Lock()
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._present: "OrderedDict[str, bool]" = OrderedDict()
+        self._gens = [0] * self._GEN_SLOTS
+
+    # --- store interface ---
+
+    def exists(self, chunk_hash: str) -> bool:
+        with self._lock:
+            present = self._present.get(chunk_hash)
+            if present is not None:
+                self._present.move_to_end(chunk_hash)
+            gen = self._gens[self._slot(chunk_hash)]
+        if present is not None:
+            chunk_cache_hits_total.labels(cache="exists").inc()
+            return present
+        chunk_cache_misses_total.labels(cache="exists").inc()
+        present = self.inner.exists(chunk_hash)
+        self._remember(chunk_hash, present, seen_gen=gen)
+        return present
+
+    def read(self, chunk_hash: str) -> bytes:
+        with self._lock:
+            data = self._bodies.get(chunk_hash)
+            if data is not None:
+                self._bodies.move_to_end(chunk_hash)
+            gen = self._gens[self._slot(chunk_hash)]
+        if data is not None:
+            chunk_cache_hits_total.labels(cache="body").inc()
+            return data
+        chunk_cache_misses_total.labels(cache="body").inc()
+        data = self.inner.read(chunk_hash)
+        self._remember(chunk_hash, True, seen_gen=gen)
+        self._put_body(chunk_hash, data)
+        return data
+
+    def read_view(self, chunk_hash: str) -> Union[bytes, memoryview]:
+        with self._lock:
+            data = self._bodies.get(chunk_hash)
+            if data is not None:
+                self._bodies.move_to_end(chunk_hash)
+            gen = self._gens[self._slot(chunk_hash)]
+        if data is not None:
+            chunk_cache_hits_total.labels(cache="body").inc()
+            return data
+        chunk_cache_misses_total.labels(cache="body").inc()
+        view = self.inner.read_view(chunk_hash)
+        self._remember(chunk_hash, True, seen_gen=gen)
+        # a mapped chunk is already served from the page cache: don't copy it in
+        if isinstance(view, bytes):
+            self._put_body(chunk_hash, view)
+        return view
+
+    def write(self, chunk_hash: str, data: bytes) -> None:
+        self.inner.write(chunk_hash, data)
+        self._remember(chunk_hash, True)
+
+    def write_file(self, chunk_hash: str, path: Path) -> None:
+        self.inner.write_file(chunk_hash, path)
+        self._remember(chunk_hash, True)
+
+    def touch(self, chunk_hash: str) -> bool:
+        # always hits the store: touch refreshes the chunk's GC age
+        with self._lock:
+            gen = self._gens[self._slot(chunk_hash)]
+        present = self.inner.touch(chunk_hash)
+        self._remember(chunk_hash, present, seen_gen=gen)
+        return present
+
+    def delete(self, chunk_hash: str) -> bool:
+        deleted = self.inner.delete(chunk_hash)
+        self._forget(chunk_hash)
+        return deleted
+
+    def delete_if_older(self, chunk_hash: str, cutoff: float) -> Optional[int]:
+        freed = self.inner.delete_if_older(chunk_hash, cutoff)
+        if freed is not None:
+            self._forget(chunk_hash)
+        return freed
+
+    def iter_hashes(self) -> Iterator[str]:
+        return self.inner.iter_hashes()
+
+    # --- internals ---
+
+    def _slot(self, chunk_hash: str) -> int:
+        return hash(chunk_hash) % self._GEN_SLOTS
+
+    def _remember(self, chunk_hash: str, present: bool, seen_gen: Optional[int] = None) -> None:
+        """
+        Record a write (seen_gen None) or a lookup that started at generation
+        seen_gen; the lookup is dropped if the hash was written or deleted since.
+        """
+        with self._lock:
+            slot = self._slot(chunk_hash)
+            if seen_gen is None:
+                self._gens[slot] += 1
+            elif self._gens[slot] != seen_gen:
+                return
+            self._present[chunk_hash] = present
+            self._present.move_to_end(chunk_hash)
+            while len(self._present) > self.max_entries:
+                self._present.popitem(last=False)
+                chunk_cache_evictions_total.labels(cache="exists").inc()
+
+    def _put_body(self, chunk_hash: str, data: bytes) -> None:
+        if len(data) > self.max_item_bytes:
+            return
+        with self._lock:
+            if chunk_hash in self._bodies:
+                return
+            self._bodies[chunk_hash] = data
+            self._bytes += len(data)
+            evicted = 0
+            while self._bytes > self.max_bytes:
+                _, old = self._bodies.popitem(last=False)
+                self._bytes -= len(old)
+                evicted += 1
+            size = self._bytes
+        if evicted:
+            chunk_cache_evictions_total.labels(cache="body").inc(evicted)
+        chunk_cache_bytes.set(size)
+
+    def _forget(self, chunk_hash: str) -> None:
+        with self._lock:
+            self._gens[self._slot(chunk_hash)] += 1
+            self._present[chunk_hash] = False
+            self._present.move_to_end(chunk_hash)
+            old = self._bodies.pop(chunk_hash, None)
+            if old is not None:
+                self._bytes -= len(old)
+            size = self._bytes
+        chunk_cache_bytes.set(size)
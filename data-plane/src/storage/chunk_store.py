@@ -1,10 +1,31 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import mmap
+import os
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterator, Optional, Union
+
+
+def map_range(fd: int, offset: int, length: int) -> memoryview:
+    """
+    Read-only view of bytes [offset, offset + length) of an open file, backed
+    by an mmap instead of a copy. The mapping lives as long as the view (or a
+    slice of it) does, even if the file is closed or unlinked meanwhile.
+    """
+    start = offset - offset % mmap.ALLOCATIONGRANULARITY
+    mm = mmap.mmap(fd, offset + length - start, access=mmap.ACCESS_READ, offset=start)
+    return memoryview(mm)[offset - start :]
+
 
 @dataclass(frozen=True)
 class ChunkStore:
     root: Path  # e.g. /app/data/blobs
+    # read_view() maps chunks of at least this many bytes (None: always copy)
+    mmap_min_bytes: Optional[int] = None
+    # serializes touch() against delete_if_older() so GC can't remove a chunk
+    # that a writer has just decided to reuse
+    _gc_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
     def _path_for(self, chunk_hash: str) -> Path:
         prefix = chunk_hash[:2]
@@ -17,9 +38,76 @@ class ChunkStore:
         p = self._path_for(chunk_hash)
         return p.read_bytes()
 
+    def read_view(self, chunk_hash: str) -> Union[bytes, memoryview]:
+        """
+        Like read(), but a chunk of at least mmap_min_bytes comes back as a
+        view of the mapped file, so serving it never copies it into a bytes
+        object. Smaller chunks are cheaper to read than to map.
+        """
+        with open(self._path_for(chunk_hash), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if self.mmap_min_bytes is None or size < max(self.mmap_min_bytes, 1):
+                return f.read()
+            return map_range(f.fileno(), 0, size)
+
     def write(self, chunk_hash: str, data: bytes) -> None:
         p = self._path_for(chunk_hash)
         p.parent.mkdir(parents=True, exist_ok=True)
-        tmp = p.with_suffix(".tmp")
+        # per-writer temp name: the same chunk may be written by two threads at once
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
         tmp.write_bytes(data)
         tmp.replace(p)
+
+    def write_file(self, chunk_hash: str, path: Path) -> None:
+        """
+        Store a chunk from a file holding its (verified) bytes, by renaming the
+        file into place; `path` must be on the store's filesystem.
+        """
+        p = self._path_for(chunk_hash)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, p)
+
+    def delete(self, chunk_hash: str) -> bool:
+        try:
+            self._path_for(chunk_hash).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def touch(self, chunk_hash: str) -> bool:
+        """
+        Mark a chunk as just (re)referenced (bumps its mtime) so GC treats it
+        as young. Returns False if the chunk is absent.
+        """
+        with self._gc_lock:
+            try:
+                os.utime(self._path_for(chunk_hash))
+                return True
+            except FileNotFoundError:
+                return False
+
+    def delete_if_older(self, chunk_hash: str, cutoff: float) -> Optional[int]:
+        """
+        Delete the chunk if it was last written/touched before `cutoff`;
+        returns the bytes freed, or None if it was kept or absent.
+        """
+        p = self._path_for(chunk_hash)
+        with self._gc_lock:
+            try:
+                st = p.stat()
+                if st.st_mtime >= cutoff:
+                    return None
+                p.unlink()
+            except FileNotFoundError:
+                return None
+        return st.st_size
+
+    def iter_hashes(self) -> Iterator[str]:
+        if not self.root.is_dir():
+            return
+        for d in self.root.iterdir():
+            if len(d.name) != 2 or not d.is_dir():
+                continue
+            for p in d.iterdir():
+                if len(p.name) == 64 and not p.suffix:
+                    yield p.name
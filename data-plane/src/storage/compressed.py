@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator, Optional, Set, Tuple, Union
+
+from src.core import compression
+from src.core.compression import HEADER, IDENTITY, MAGIC, RAW, Codec
+from src.core.hashing import sha256_hex
+
+
+class CompressedChunkStore:
+    """
+    Outermost store layer: chunks are compressed on write (see
+    core/compression.py) and decompressed on read, so callers always see raw
+    bytes. Layers below (read cache, presence filter, backend) hold the stored
+    encoding, which keeps the cache's byte budget in compressed bytes.
+
+    read_encoded/write_encoded move the stored form as-is, for shipping
+    compressed frames between nodes without recompressing. Chunks written
+    compressed stay readable with codec=None (compression turned off).
+    read_view/get_frame_view serve large chunks from a mapped view of the
+    store file (see the backend's read_view) wherever no decoding is needed.
+    """
+
+    def __init__(self, inner, codec: Optional[Codec], level: int = -1, min_ratio: float = 0.9):
+        self.inner = inner
+        self.codec = codec
+        self.level = level
+        self.min_ratio = min_ratio
+
+    def exists(self, chunk_hash: str) -> bool:
+        return self.inner.exists(chunk_hash)
+
+    def touch(self, chunk_hash: str) -> bool:
+        return self.inner.touch(chunk_hash)
+
+    def read(self, chunk_hash: str) -> bytes:
+        return compression.decode(self.inner.read(chunk_hash))
+
+    def write(self, chunk_hash: str, data: bytes) -> None:
+        self.inner.write(chunk_hash, compression.encode(data, self.codec, self.level, self.min_ratio))
+
+    def write_file(self, chunk_hash: str, path: Path) -> None:
+        """
+        write() from a file holding the chunk's (verified) raw bytes, which is
+        consumed. Without compression the file becomes the stored chunk as is
+        (renamed into place by the fs backend); otherwise it is read and
+        compressed like any write.
+        """
+        if self.codec is None:
+            with open(path, "rb") as f:
+                stored_raw = f.read(len(MAGIC)) != MAGIC
+            if stored_raw:
+                self.inner.write_file(chunk_hash, path)
+                return
+        self.write(chunk_hash, path.read_bytes())
+        path.unlink()
+
+    def read_encoded(self, chunk_hash: str) -> bytes:
+        return self.inner.read(chunk_hash)
+
+    def write_encoded(self, chunk_hash: str, blob: bytes) -> None:
+        # caller has decoded blob and verified it against chunk_hash
+        self.inner.write(chunk_hash, blob)
+
+    def get_frame(self, chunk_hash: str, accept: Set[int]) -> Tuple[int, bytes]:
+        """
+        (frame flags, payload) for sending a chunk to a peer that can decode
+        the codec ids in `accept`: the stored compressed form if allowed,
+        else raw bytes.
+        """
+        blob = self.read_encoded(chunk_hash)
+        codec_id = compression.codec_of(blob)
+        if codec_id == RAW:
+            return RAW, blob
+        if codec_id in accept:
+            return codec_id, blob
+        return RAW, compression.decode(blob)
+
+    def read_view(self, chunk_hash: str) -> Union[bytes, memoryview]:
+        """
+        read(), without a copy for a chunk stored uncompressed.
+        """
+        return self.get_frame_view(chunk_hash, set())[1]
+
+    def get_frame_view(self, chunk_hash: str, accept: Set[int]) -> Tuple[int, Union[bytes, memoryview]]:
+        """
+        get_frame(), with the payload a view of the stored form (no copy)
+        whenever that can be sent as is.
+        """
+        blob = self.inner.read_view(chunk_hash)
+        codec_id = compression.codec_of(blob)
+        if codec_id == RAW:
+            return RAW, blob
+        if codec_id == IDENTITY:
+            return RAW, blob[HEADER.size :]
+        if codec_id in accept:
+            return codec_id, blob
+        return RAW, compression.decode(blob)
+
+    def put_frame(self, chunk_hash: str, flags: int, payload: bytes) -> bool:
+        """
+        Verify a received frame against chunk_hash and store it, keeping a
+        compressed payload as received. Returns False if the chunk was already
+        present; raises ValueError on a bad codec, payload or hash.
+        """
+        if flags == RAW:
+            data = payload
+        else:
+            if compression.codec_of(payload) != flags:
+                raise ValueError(f"frame flags {flags} don't match payload encoding for chunk {chunk_hash}")
+            data = compression.decode(payload)
+        if sha256_hex(data) != chunk_hash:
+            raise ValueError(f"hash mismatch for chunk {chunk_hash}")
+
+        if self.touch(chunk_hash):
+            return False
+        if flags == RAW:
+            self.write(chunk_hash, data)
+        else:
+            self.write_encoded(chunk_hash, payload)
+        return True
+
+    def delete(self, chunk_hash: str) -> bool:
+        return self.inner.delete(chunk_hash)
+
+    def delete_if_older(self, chunk_hash: str, cutoff: float) -> Optional[int]:
+        return self.inner.delete_if_older(chunk_hash, cutoff)
+
+    def iter_hashes(self) -> Iterator[str]:
+        return self.inner.iter_hashes()
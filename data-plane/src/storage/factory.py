@@ -0,0 +1,88 @@
+from __future__ import annotations
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+from src.core import compression
+from src.core.config import settings
+from src.storage.cache import CachedChunkStore
+from src.storage.chunk_store import ChunkStore
+from src.storage.compressed import CompressedChunkStore
+from src.storage.pack_store import PackChunkStore
+from src.storage.presence import PresenceFilteredStore
+
+
+
+@lru_cache(maxsize=None)
+def get_backend_store() -> Union[ChunkStore, PackChunkStore]:
+    """
+    The on-disk store selected by CHUNK_STORE_BACKEND, without the cache.
+    Cached so there is one instance (the pack backend must have a single writer).
+    """
+    root = Path(settings.chunk_store_root)
+    backend = settings.chunk_store_backend
+    mmap_min_bytes = settings.chunk_mmap_min_bytes if settings.chunk_mmap else None
+    if backend == "fs":
+        return ChunkStore(root=root, mmap_min_bytes=mmap_min_bytes)
+    if backend == "pack":
+        return PackChunkStore(
+            root=root,
+            segment_bytes=settings.pack_segment_bytes,
+            mmap_min_bytes=mmap_min_bytes,
+            fsync_interval_s=settings.pack_fsync_interval_s,
+        )
+    raise ValueError(f"unknown CHUNK_STORE_BACKEND {backend!r}")
+
+
+@lru_cache(maxsize=None)
+def get_staging_dir() -> Path:
+    """
+    Where chunk PUT bodies are spooled while they are hashed: under the store
+    root, so the fs backend can rename a verified chunk into place. Spool
+    files untouched for STAGING_MAX_AGE_S are left over from a crash and are
+    removed on first use; younger ones may belong to another worker's upload.
+    """
+    staging = Path(settings.chunk_store_root) / "incoming"
+    staging.mkdir(parents=True, exist_ok=True)
+    cutoff = time.time() - settings.staging_max_age_s
+    for p in staging.iterdir():
+        try:
+            if p.stat().st_mtime < cutoff:
+                p.unlink()
+        except FileNotFoundError:
+            pass
+    return staging
+
+
+@lru_cache(maxsize=None)
+def get_presence_filter() -> Optional[PresenceFilteredStore]:
+    """
+    Bloom-filter presence index for the fs backend (PRESENCE_FILTER=0 disables
+    it); the pack backend already keeps an exact in-memory index.
+    """
+    store = get_backend_store()
+    if not settings.presence_filter or not isinstance(store, ChunkStore):
+        return None
+    return PresenceFilteredStore(store, capacity=settings.presence_capacity, fp_rate=settings.presence_fp_rate)
+
+
+@lru_cache(maxsize=None)
+def get_chunk_store() -> CompressedChunkStore:
+    """
+    Process-wide chunk store every router shares, layered bottom-up as:
+    backend store, presence filter (fs only), read cache (CHUNK_CACHE_BYTES=0
+    disables it), compression (CHUNK_COMPRESSION=none stores new chunks raw).
+    """
+    store: Union[ChunkStore, PackChunkStore, PresenceFilteredStore, CachedChunkStore]
+    store = get_presence_filter() or get_backend_store()
+    if settings.chunk_cache_bytes > 0:
+        store = CachedChunkStore(store, max_bytes=settings.chunk_cache_bytes, max_entries=settings.chunk_cache_entries)
+
+    codec = None if settings.chunk_compression == "none" else compression.by_name(settings.chunk_compression)
+    return CompressedChunkStore(
+        store,
+        codec=codec,
+        level=settings.chunk_compression_level,
+        min_ratio=settings.chunk_compression_min_ratio,
+    )
@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.storage.chunk_store import map_range
+
+# Append-only packfile chunk store.
+#
+# Chunks are appended as records to large segment files instead of one file
+# per chunk. An in-memory index maps digest -> (segment, offset, length).
+#
+# segment layout:
+#   record*  [trailer entry*  footer]      (trailer only once sealed)
+#
+#   record  = header(53) | data(length) | crc32(header + data)
+#   header  = magic "RPK1" | kind u8 | digest 32B | length u64 | written_at u64
+#   entry   = digest 32B | kind u8 | data offset u64 | length u64 | written_at u64
+#   footer  = magic "RPKT" | entry count u64 | trailer offset u64 | crc32(entries)
+#
+# Recovery loads sealed segments from their trailers and re-scans the single
+# unsealed (active) segment, truncating any torn tail left by a crash.
+#
+# Durability: every record is flushed to the OS as it is appended, so a process
+# crash loses nothing. The active segment is fsynced when sealed, by sync()
+# (the node calls it every PACK_FSYNC_INTERVAL_S) and, with fsync_interval_s=0,
+# after every record; a power loss can drop the records written since the last
+# fsync, which the re-scan then treats as a torn tail.
+
+_REC_MAGIC = b"RPK1"
+_FOOTER_MAGIC = b"RPKT"
+_HEADER = struct.Struct(">4sB32sQQ")
+_CRC = struct.Struct(">I")
+_ENTRY = struct.Struct(">32sBQQQ")
+_FOOTER = struct.Struct(">4sQQI")
+
+_PUT = 1
+_DELETE = 2
+
+# live bytes compaction re-appends per hold of the store lock, so reads and
+# writes interleave with a segment rewrite instead of waiting it out
+_COMPACT_SLICE_BYTES = 4 * 1024 * 1024
+# write_file() copies a spooled chunk into its record in pieces of this size
+_COPY_BYTES = 1024 * 1024
+
+
+@dataclass
+class _Segment:
+    seg_id: int
+    path: Path
+    reader: BinaryIO
+    size: int = 0
+    dead_bytes: int = 0
+    sealed: bool = False
+    # reads in flight on `reader`; a segment removed by compaction (retired)
+    # closes its reader once the last one finishes
+    pins: int = 0
+    retired: bool = False
+    # (digest, kind, data offset, length, written_at) for every record, in order
+    entries: List[Tuple[bytes, int, int, int, int]] = field(default_factory=list)
+
+
+def _record_size(length: int) -> int:
+    return _HEADER.size + length + _CRC.size
+
+
+class PackChunkStore:
+    def __init__(
+        self,
+        root: Path,
+        segment_bytes: int = 256 * 1024 * 1024,
+        mmap_min_bytes: Optional[int] = None,
+        fsync_interval_s: float = 1.0,
+    ):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        # 0: fsync every record; otherwise the owner calls sync() this often
+        self.fsync_interval_s = fsync_interval_s
+        self._dirty = False
+        # read_view() maps chunks of at least this many bytes (None: always copy)
+        self.mmap_min_bytes = mmap_min_bytes
+        self._lock = threading.RLock()
+        # digest -> (segment id, data offset, length, written_at)
+        self._index: Dict[bytes, Tuple[int, int, int, int]] = {}
+        self._segments: Dict[int, _Segment] = {}
+        self._active: Optional[_Segment] = None
+        self._writer: Optional[BinaryIO] = None
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._recover()
+
+    # --- public interface (same as ChunkStore) ---
+
+    def exists(self, chunk_hash: str) -> bool:
+        return bytes.fromhex(chunk_hash) in self._index
+
+    def read(self, chunk_hash: str) -> bytes:
+        # pread outside the lock; the pin keeps compaction from closing the reader
+        seg, offset, length = self._pin(chunk_hash)
+        try:
+            return os.pread(seg.reader.fileno(), length, offset)
+        finally:
+            self._unpin(seg)
+
+    def read_view(self, chunk_hash: str) -> Union[bytes, memoryview]:
+        """
+        Like read(), but a chunk of at least mmap_min_bytes comes back as a
+        view of its range of the mapped segment instead of a copy.
+        """
+        seg, offset, length = self._pin(chunk_hash)
+        try:
+            if self.mmap_min_bytes is None or length < max(self.mmap_min_bytes, 1):
+                return os.pread(seg.reader.fileno(), length, offset)
+            # the mapping holds its own reference to the file: it outlives the
+            # reader being closed and the segment being removed
+            return map_range(seg.reader.fileno(), offset, length)
+        finally:
+            self._unpin(seg)
+
+    def write(self, chunk_hash: str, data: bytes) -> None:
+        digest = bytes.fromhex(chunk_hash)
+        with self._lock:
+            if digest in self._index:
+                return
+            self._append(_PUT, digest, data, int(time.time()))
+
+    def write_file(self, chunk_hash: str, path: Path) -> None:
+        """
+        Store a chunk from a file holding its (verified) bytes; the file is
+        copied into the record a slice at a time, then removed.
+        """
+        digest = bytes.fromhex(chunk_hash)
+        with open(path, "rb") as f:
+            length = os.fstat(f.fileno()).st_size
+            with self._lock:
+                if digest not in self._index:
+                    pieces = iter(lambda: f.read(_COPY_BYTES), b"")
+                    self._append_pieces(_PUT, digest, length, pieces, int(time.time()))
+        path.unlink()
+
+    def delete(self, chunk_hash: str) -> bool:
+        digest = bytes.fromhex(chunk_hash)
+        with self._lock:
+            if digest not in self._index:
+                return False
+            self._append(_DELETE, digest, b"", int(time.time()))
+            return True
+
+    def touch(self, chunk_hash: str) -> bool:
+        """
+        Mark a chunk as just (re)referenced so GC treats it as young.
+        Returns False if the chunk is absent. The new age lives in the index
+        only; it is carried into compacted copies but not across restarts.
+        """
+        digest = bytes.fromhex(chunk_hash)
+        with self._lock:
+            loc = self._index.get(digest)
+            if loc is None:
+                return False
+            self._index[digest] = (*loc[:3], int(time.time()))
+            return True
+
+    def delete_if_older(self, chunk_hash: str, cutoff: float) -> Optional[int]:
+        """
+        Tombstone the chunk if it was last written/touched before `cutoff`;
+        returns the bytes freed, or None if it was kept or absent.
+        """
+        digest = bytes.fromhex(chunk_hash)
+        with self._lock:
+            loc = self._index.get(digest)
+            if loc is None or loc[3] >= cutoff:
+                return None
+            self._append(_DELETE, digest, b"", int(time.time()))
+            return loc[2]
+
+    def iter_hashes(self) -> Iterator[str]:
+        with self._lock:
+            digests = list(self._index)
+        for d in digests:
+            yield d.hex()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "chunks": len(self._index),
+                "bytes": sum(s.size for s in self._segments.values()),
+                "dead_bytes": sum(s.dead_bytes for s in self._segments.values()),
+            }
+
+    def compact(self, min_dead_ratio: float = 0.5) -> int:
+        """
+        Rewrite sealed segments whose dead fraction is >= min_dead_ratio:
+        live records are re-appended to the active segment, then the old
+        segment file is removed. Returns bytes reclaimed.
+        """
+        with self._lock:
+            victims = [
+                s.seg_id
+                for s in self._segments.values()
+                if s.sealed and s.size and s.dead_bytes / s.size >= min_dead_ratio
+            ]
+
+        reclaimed = 0
+        for seg_id in victims:
+            reclaimed += self._compact_segment(seg_id)
+        return reclaimed
+
+    def sync(self) -> None:
+        """
+        fsync records appended since the last sync, without holding up writers.
+        """
+        with self._lock:
+            if not self._dirty or self._writer is None:
+                return
+            fd = os.dup(self._writer.fileno())
+            self._dirty = False
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer:
+                self._writer.flush()
+                os.fsync(self._writer.fileno())
+                self._writer.close()
+                self._writer = None
+            for s in self._segments.values():
+                s.reader.close()
+
+    # --- internals ---
+
+    def _segment_path(self, seg_id: int) -> Path:
+        return self.root / f"{seg_id:08d}.pack"
+
+    def _append(self, kind: int, digest: bytes, data: bytes, written_at: int) -> None:
+        self._append_pieces(kind, digest, len(data), (data,), written_at)
+
+    def _append_pieces(
+        self, kind: int, digest: bytes, length: int, pieces: Iterable[bytes], written_at: int
+    ) -> None:
+        seg = self._active
+        if seg is None or (seg.size and seg.size + _record_size(length) > self.segment_bytes):
+            seg = self._rotate()
+
+        header = _HEADER.pack(_REC_MAGIC, kind, digest, length, written_at)
+        crc = zlib.crc32(header)
+        offset = seg.size
+        try:
+            self._writer.write(header)
+            n = 0
+            for piece in pieces:
+                crc = zlib.crc32(piece, crc)
+                self._writer.write(piece)
+                n += len(piece)
+            if n != length:
+                raise IOError(f"chunk {digest.hex()} is {n} bytes, expected {length}")
+            self._writer.write(_CRC.pack(crc))
+            self._writer.flush()
+        except BaseException:
+            # drop the partial record: later appends must follow the last good one
+            self._writer.flush()
+            os.ftruncate(self._writer.fileno(), offset)
+            raise
+        if self.fsync_interval_s <= 0:
+            os.fsync(self._writer.fileno())
+        else:
+            self._dirty = True
+
+        seg.size += _record_size(length)
+        seg.entries.append((digest, kind, offset + _HEADER.size, length, written_at))
+        self._apply(seg, kind, digest, offset + _HEADER.size, length, written_at)
+
+    def _pin(self, chunk_hash: str) -> Tuple[_Segment, int, int]:
+        with self._lock:
+            loc = self._index.get(bytes.fromhex(chunk_hash))
+            if loc is None:
+                raise FileNotFoundError(chunk_hash)
+            seg_id, offset, length, _ = loc
+            seg = self._segments[seg_id]
+            seg.pins += 1
+        return seg, offset, length
+
+    def _unpin(self, seg: _Segment) -> None:
+        with self._lock:
+            seg.pins -= 1
+            if seg.retired and seg.pins == 0:
+                seg.reader.close()
+
+    def _apply(self, seg: _Segment, kind: int, digest: bytes, offset: int, length: int, written_at: int) -> None:
+        prev = self._index.pop(digest, None)
+        if prev is not None:
+            self._segments[prev[0]].dead_bytes += _record_size(prev[2])
+        if kind == _PUT:
+            self._index[digest] = (seg.seg_id, offset, length, written_at)
+        else:
+            # a tombstone is dead weight as soon as it's written
+            seg.dead_bytes += _record_size(0)
+
+    def _rotate(self) -> _Segment:
+        if self._active is not None:
+            self._seal(self._active)
+        seg_id = max(self._segments, default=0) + 1
+        path = self._segment_path(seg_id)
+        self._writer = open(path, "ab")
+        seg = _Segment(seg_id=seg_id, path=path, reader=open(path, "rb", buffering=0))
+        self._segments[seg_id] = seg
+        self._active = seg
+        return seg
+
+    def _seal(self, seg: _Segment) -> None:
+        if seg is self._active:
+            self._writer.close()
+            self._writer = None
+            self._active = None
+        body = b"".join(_ENTRY.pack(*e) for e in seg.entries)
+        footer = _FOOTER.pack(_FOOTER_MAGIC, len(seg.entries), seg.size, zlib.crc32(body))
+        with open(seg.path, "ab") as w:
+            w.write(body)
+            w.write(footer)
+            w.flush()
+            os.fsync(w.fileno())
+        seg.size += len(body) + len(footer)
+        seg.sealed = True
+        seg.entries = []
+
+    def _recover(self) -> None:
+        paths = sorted(p for p in self.root.glob("*.pack") if p.stem.isdigit())
+        for path in paths:
+            seg_id = int(path.stem)
+            seg = _Segment(seg_id=seg_id, path=path, reader=open(path, "rb", buffering=0))
+            self._segments[seg_id] = seg
+
+            entries = self._read_trailer(seg)
+            if entries is not None:
+                seg.sealed = True
+                seg.size = path.stat().st_size
+            else:
+                entries = self._scan(seg)
+
+            for digest, kind, offset, length, written_at in entries:
+                self._apply(seg, kind, digest, offset, length, written_at)
+            if not seg.sealed:
+                seg.entries = entries
+
+        # keep appending to the newest segment if it was never sealed; any older
+        # unsealed one (crash between rotate and seal) is sealed now
+        for seg in list(self._segments.values()):
+            if seg.sealed:
+                continue
+            if paths and seg.seg_id == int(paths[-1].stem):
+                self._active = seg
+                self._writer = open(seg.path, "ab")
+            else:
+                self._seal(seg)
+
+    def _read_trailer(self, seg: _Segment) -> Optional[List[Tuple[bytes, int, int, int, int]]]:
+        fd = seg.reader.fileno()
+        size = os.fstat(fd).st_size
+        if size < _FOOTER.size:
+            return None
+        magic, count, trailer_offset, crc = _FOOTER.unpack(os.pread(fd, _FOOTER.size, size - _FOOTER.size))
+        if magic != _FOOTER_MAGIC or trailer_offset + count * _ENTRY.size + _FOOTER.size != size:
+            return None
+        body = os.pread(fd, count * _ENTRY.size, trailer_offset)
+        if zlib.crc32(body) != crc:
+            return None
+        return [_ENTRY.unpack_from(body, i * _ENTRY.size) for i in range(count)]
+
+    def _scan(self, seg: _Segment) -> List[Tuple[bytes, int, int, int, int]]:
+        fd = seg.reader.fileno()
+        size = os.fstat(fd).st_size
+        entries = []
+        pos = 0
+        while pos + _HEADER.size + _CRC.size <= size:
+            header = os.pread(fd, _HEADER.size, pos)
+            magic, kind, digest, length, written_at = _HEADER.unpack(header)
+            end = pos + _record_size(length)
+            if magic != _REC_MAGIC or kind not in (_PUT, _DELETE) or end > size:
+                break
+            data = os.pread(fd, length, pos + _HEADER.size)
+            (crc,) = _CRC.unpack(os.pread(fd, _CRC.size, pos + _HEADER.size + length))
+            if zlib.crc32(data, zlib.crc32(header)) != crc:
+                break
+            entries.append((digest, kind, pos + _HEADER.size, length, written_at))
+            pos = end
+
+        if pos != size:
+            # torn or corrupt tail from a crash mid-append
+            os.truncate(seg.path, pos)
+        seg.size = pos
+        return entries
+
+    def _compact_segment(self, seg_id: int) -> int:
+        with self._lock:
+            seg = self._segments.get(seg_id)
+            if seg is None or not seg.sealed:
+                return 0
+            seg.pins += 1
+        try:
+            return self._rewrite_segment(seg)
+        finally:
+            self._unpin(seg)
+
+    def _rewrite_segment(self, seg: _Segment) -> int:
+        seg_id = seg.seg_id
+        # a sealed segment never changes, so its trailer and records are read
+        # without the lock; only re-appending a slice of them takes it
+        entries = self._read_trailer(seg) or []
+        fd = seg.reader.fileno()
+        copied = 0
+        i = 0
+        while i < len(entries):
+            batch = []
+            batch_bytes = 0
+            while i < len(entries) and batch_bytes < _COMPACT_SLICE_BYTES:
+                digest, kind, offset, length, written_at = entries[i]
+                i += 1
+                if kind == _PUT:
+                    loc = self._index.get(digest)
+                    if loc is None or loc[0] != seg_id or loc[1] != offset:
+                        continue
+                    batch.append((digest, kind, offset, os.pread(fd, length, offset), written_at))
+                    batch_bytes += length
+                else:
+                    batch.append((digest, kind, offset, b"", written_at))
+
+            with self._lock:
+                has_older = any(s < seg_id for s in self._segments)
+                for digest, kind, offset, data, written_at in batch:
+                    if kind == _PUT:
+                        # skip a record deleted or moved since it was read
+                        loc = self._index.get(digest)
+                        if loc is None or loc[0] != seg_id or loc[1] != offset:
+                            continue
+                        # keep the (possibly touched) age from the index
+                        self._append(_PUT, digest, data, loc[3])
+                        copied += _record_size(len(data))
+                    elif has_older and digest not in self._index:
+                        # an older segment may still hold the put this tombstone cancels
+                        self._append(_DELETE, digest, b"", written_at)
+
+        with self._lock:
+            if self._segments.pop(seg_id, None) is None:
+                # compacted concurrently
+                return 0
+            # the reader is closed by the last in-flight read (at the latest,
+            # this compaction's own unpin)
+            seg.retired = True
+            seg.path.unlink()
+        return seg.size - copied
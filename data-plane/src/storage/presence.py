@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from src.api.metrics import presence_checks_total
+from src.storage.chunk_store import ChunkStore
+
+logger = logging.getLogger("replicator")
+
+# snapshot = magic "RBF1" | nbits u64 | k u8 | count u64 | bits | crc32(bits)
+_SNAP_MAGIC = b"RBF1"
+_SNAP_HEADER = struct.Struct(">4sQBQ")
+_CRC = struct.Struct(">I")
+SNAPSHOT_NAME = "presence.bloom"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over SHA-256 chunk digests. The digests are
+    already uniform, so the k probe positions come straight from their bytes
+    (double hashing) instead of re-hashing.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        self.nbits = max(64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.nbits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self.bits = bytearray((self.nbits + 7) // 8)
+
+    def _positions(self, digest: bytes) -> Iterator[int]:
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.nbits
+
+    def add(self, digest: bytes) -> None:
+        for p in self._positions(digest):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+
+class PresenceFilteredStore:
+    """
+    Bloom-filter presence index in front of the fs chunk store, so a hash the
+    node has never stored is answered "missing" without a stat() under the
+    blob fan-out (most HEADs during a migration are misses). A "maybe" falls
+    through to the store, which also covers false positives and chunks GC has
+    since deleted (Bloom filters can't remove). Unlike the pack backend's
+    in-memory index there is no exact set behind the filter: at ~100 bytes
+    per chunk it would cost about 80x the filter's memory, so only misses
+    are answered from memory.
+
+    At startup the filter is loaded from the snapshot written at the last
+    clean shutdown, or rebuilt by a background scan of the store; until it is
+    complete every check falls through. A loaded snapshot is removed right
+    away, so after a crash (when it could miss newer chunks) the next start
+    rescans instead of trusting it.
+    """
+
+    def __init__(self, inner: ChunkStore, capacity: int, fp_rate: float = 0.01):
+        self.inner = inner
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.snapshot_path = Path(inner.root) / SNAPSHOT_NAME
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, fp_rate)
+        self._ready = False
+        self._overflow_warned = False
+
+        if not self._load_snapshot():
+            threading.Thread(target=self._scan, name="presence-scan", daemon=True).start()
+
+    # --- store interface ---
+
+    def exists(self, chunk_hash: str) -> bool:
+        if self._definitely_absent(chunk_hash):
+            return False
+        return self.inner.exists(chunk_hash)
+
+    def touch(self, chunk_hash: str) -> bool:
+        if self._definitely_absent(chunk_hash):
+            return False
+        return self.inner.touch(chunk_hash)
+
+    def write(self, chunk_hash: str, data: bytes) -> None:
+        self.inner.write(chunk_hash, data)
+        self._add(bytes.fromhex(chunk_hash))
+
+    def write_file(self, chunk_hash: str, path: Path) -> None:
+        self.inner.write_file(chunk_hash, path)
+        self._add(bytes.fromhex(chunk_hash))
+
+    def read(self, chunk_hash: str) -> bytes:
+        return self.inner.read(chunk_hash)
+
+    def read_view(self, chunk_hash: str) -> Union[bytes, memoryview]:
+        return self.inner.read_view(chunk_hash)
+
+    def delete(self, chunk_hash: str) -> bool:
+        return self.inner.delete(chunk_hash)
+
+    def delete_if_older(self, chunk_hash: str, cutoff: float) -> Optional[int]:
+        return self.inner.delete_if_older(chunk_hash, cutoff)
+
+    def iter_hashes(self) -> Iterator[str]:
+        return self.inner.iter_hashes()
+
+    # --- lifecycle ---
+
+    def save_snapshot(self) -> bool:
+        """
+        Persist the filter for the next start; call on clean shutdown only.
+        """
+        if not self._ready:
+            return False
+        with self._lock:
+            f = self._filter
+            header = _SNAP_HEADER.pack(_SNAP_MAGIC, f.nbits, f.k, f.count)
+            bits = bytes(f.bits)
+        tmp = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as w:
+            w.write(header)
+            w.write(bits)
+            w.write(_CRC.pack(zlib.crc32(bits)))
+            w.flush()
+            os.fsync(w.fileno())
+        tmp.replace(self.snapshot_path)
+        return True
+
+    # --- internals ---
+
+    def _definitely_absent(self, chunk_hash: str) -> bool:
+        if not self._ready:
+            return False
+        if bytes.fromhex(chunk_hash) in self._filter:
+            presence_checks_total.labels(result="maybe").inc()
+            return False
+        presence_checks_total.labels(result="absent").inc()
+        return True
+
+    def _add(self, digest: bytes) -> None:
+        # bit updates are read-modify-write on shared bytes: serialize them
+        with self._lock:
+            self._filter.add(digest)
+            overflow = self._filter.count > self.capacity and not self._overflow_warned
+            self._overflow_warned |= overflow
+        if overflow:
+            logger.warning(
+                "presence filter holds more than PRESENCE_CAPACITY=%d chunks; false-positive rate is rising",
+                self.capacity,
+            )
+
+    def _load_snapshot(self) -> bool:
+        try:
+            blob = self.snapshot_path.read_bytes()
+        except FileNotFoundError:
+            return False
+        # one-shot: a crash from here on must force a rescan
+        self.snapshot_path.unlink()
+
+        expected = BloomFilter(self.capacity, self.fp_rate)
+        if len(blob) < _SNAP_HEADER.size + _CRC.size:
+            return False
+        magic, nbits, k, count = _SNAP_HEADER.unpack_from(blob)
+        bits = blob[_SNAP_HEADER.size : -_CRC.size]
+        (crc,) = _CRC.unpack(blob[-_CRC.size :])
+        if (
+            magic != _SNAP_MAGIC
+            or (nbits, k) != (expected.nbits, expected.k)
+            or len(bits) != len(expected.bits)
+            or zlib.crc32(bits) != crc
+        ):
+            logger.info("presence snapshot unusable (corrupt or sized differently); rescanning")
+            return False
+
+        expected.bits[:] = bits
+        expected.count = count
+        self._filter = expected
+        self._ready = True
+        return True
+
+    def _scan(self) -> None:
+        n = 0
+        try:
+            for h in self.inner.iter_hashes():
+                self._add(bytes.fromhex(h))
+                n += 1
+        except Exception:
+            logger.exception("presence filter scan failed; serving without it")
+            return
+        self._ready = True
+        logger.info("presence filter built from %d stored chunks", n)
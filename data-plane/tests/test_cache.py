@@ -0,0 +1,65 @@
+import threading
+
+from src.core.hashing import sha256_hex
+from src.storage.cache import CachedChunkStore
+from src.storage.chunk_store import ChunkStore
+
+
+class _SlowExists(ChunkStore):
+    # exists() looks at the disk, then stalls before returning what it saw
+    def __init__(self, root):
+        super().__init__(root=root)
+        self.looked = threading.Event()
+        self.resume = threading.Event()
+
+    def exists(self, chunk_hash):
+        present = super().exists(chunk_hash)
+        self.looked.set()
+        self.resume.wait(5)
+        return present
+
+
+def _race(store, cache, h, act):
+    result = []
+    t = threading.Thread(target=lambda: result.append(cache.exists(h)))
+    t.start()
+    assert store.looked.wait(5)
+    act()
+    store.resume.set()
+    t.join(5)
+    return result[0]
+
+
+def test_miss_does_not_overwrite_concurrent_write(tmp_path):
+    store = _SlowExists(tmp_path / "blobs")
+    cache = CachedChunkStore(store, max_bytes=1 << 20, max_entries=100)
+    data = b"written while exists() was looking"
+    h = sha256_hex(data)
+
+    assert _race(store, cache, h, lambda: cache.write(h, data)) is False
+    # the stale miss was dropped: the write's entry stands
+    assert cache.exists(h)
+    assert cache._present[h] is True
+
+
+def test_hit_does_not_overwrite_concurrent_delete(tmp_path):
+    store = _SlowExists(tmp_path / "blobs")
+    cache = CachedChunkStore(store, max_bytes=1 << 20, max_entries=100)
+    data = b"deleted while exists() was looking"
+    h = sha256_hex(data)
+    store.write(h, data)
+
+    assert _race(store, cache, h, lambda: cache.delete(h)) is True
+    assert cache._present[h] is False
+    store.resume.set()
+    assert not cache.exists(h)
+
+
+def test_lookups_are_cached_when_nothing_races(tmp_path):
+    store = ChunkStore(root=tmp_path / "blobs")
+    cache = CachedChunkStore(store, max_bytes=1 << 20, max_entries=100)
+    h = sha256_hex(b"absent")
+    assert not cache.exists(h)
+    assert cache._present[h] is False
+    cache.write(h, b"absent")
+    assert cache.exists(h)
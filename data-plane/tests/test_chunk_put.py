@@ -0,0 +1,47 @@
+import hashlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import chunks
+from src.core.config import settings
+from src.storage import factory
+
+_FACTORIES = (factory.get_backend_store, factory.get_staging_dir, factory.get_presence_filter, factory.get_chunk_store)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "chunk_store_root", str(tmp_path / "blobs"))
+    monkeypatch.setattr(settings, "chunk_store_backend", "fs")
+    monkeypatch.setattr(settings, "presence_filter", False)
+    monkeypatch.setattr(settings, "chunk_compression", "none")
+    for f in _FACTORIES:
+        f.cache_clear()
+    app = FastAPI()
+    app.include_router(chunks.router)
+    yield TestClient(app)
+    for f in _FACTORIES:
+        f.cache_clear()
+
+
+def test_put_hash_mismatch_is_400_and_leaves_no_spool_file(client, tmp_path):
+    data = b"chunk body" * 1000
+    wrong = hashlib.sha256(b"something else").hexdigest()
+
+    r = client.put(f"/chunks/{wrong}", content=data)
+    assert r.status_code == 400
+    assert list((tmp_path / "blobs" / "incoming").iterdir()) == []
+    assert client.head(f"/chunks/{wrong}").status_code == 404
+
+
+def test_put_stores_verified_chunk_then_dedupes(client, tmp_path):
+    data = b"chunk body" * 1000
+    h = hashlib.sha256(data).hexdigest()
+
+    r = client.put(f"/chunks/{h}", content=data)
+    assert r.status_code == 200 and r.json()["status"] == "stored"
+    assert client.put(f"/chunks/{h}", content=data).json()["status"] == "exists"
+    assert client.get(f"/chunks/{h}").content == data
+    assert list((tmp_path / "blobs" / "incoming").iterdir()) == []
@@ -0,0 +1,64 @@
+import asyncio
+import random
+
+import pytest
+
+from src.core import chunking
+from src.core.chunking import CDCParams
+
+
+def _inputs(seed=7):
+    rng = random.Random(seed)
+    for trial in range(60):
+        avg = rng.choice([64, 1024, 16 * 1024])
+        params = CDCParams.from_avg(avg) if trial % 2 else CDCParams(rng.randint(1, avg), avg, avg * rng.randint(1, 8))
+        size = rng.randint(params.min_size + 1, params.max_size + 100)
+        # random bytes and low-entropy text exercise both masks
+        data = rng.randbytes(size) if trial % 3 else bytes(rng.choice(b"ab ") for _ in range(size))
+        yield data, params
+
+
+@pytest.mark.skipif(chunking._np is None, reason="numpy not installed")
+def test_numpy_scan_cuts_where_the_byte_loop_does():
+    for data, params in _inputs():
+        n = min(len(data), params.max_size)
+        normal = min(params.avg_size, n)
+        assert chunking._cdc_cut_np(data, params, n, normal) == chunking._cdc_cut_py(data, params, n, normal)
+
+
+def _stream(data, piece_sizes):
+    async def gen():
+        pos = 0
+        i = 0
+        while pos < len(data):
+            n = piece_sizes[i % len(piece_sizes)]
+            yield data[pos : pos + n]
+            pos += n
+            i += 1
+
+    return gen()
+
+
+async def _collect(aiter):
+    return [c async for c in aiter]
+
+
+@pytest.mark.parametrize("piece_sizes", [[1], [7, 4096, 1], [1 << 20]])
+def test_streaming_cdc_cuts_like_batch_cdc(piece_sizes):
+    rng = random.Random(3)
+    data = rng.randbytes(300_000) + b"abc " * 20_000
+    params = CDCParams.from_avg(4096)
+
+    batch = list(chunking.iter_cdc_chunks(data, params))
+    streamed = asyncio.run(_collect(chunking.aiter_cdc_chunks(_stream(data, piece_sizes), params)))
+
+    assert streamed == batch
+    assert b"".join(batch) == data
+    assert all(len(c) <= params.max_size for c in batch)
+    assert all(len(c) >= params.min_size for c in batch[:-1])
+
+
+def test_fixed_chunking_streams_like_batch():
+    data = bytes(range(256)) * 100
+    streamed = asyncio.run(_collect(chunking.aiter_chunks(_stream(data, [1000, 3]), 4096)))
+    assert streamed == list(chunking.iter_chunks(data, 4096))
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from src.core import compression
+from src.core.compression import HEADER, IDENTITY, MAGIC, RAW
+from src.core.hashing import sha256_hex
+from src.storage.chunk_store import ChunkStore
+from src.storage.compressed import CompressedChunkStore
+
+TEXT = b"the quick brown fox jumps over the lazy dog\n" * 2000
+
+
+@pytest.mark.parametrize("name", compression.available())
+def test_codec_round_trip(name):
+    codec = compression.by_name(name)
+    blob = compression.encode(TEXT, codec)
+    assert compression.codec_of(blob) == codec.codec_id
+    assert len(blob) < len(TEXT)
+    assert compression.decode(blob) == TEXT
+
+
+def test_incompressible_and_empty_chunks_stay_raw():
+    zlib = compression.by_name("zlib")
+    noise = os.urandom(64 * 1024)
+    assert compression.encode(noise, zlib) == noise
+    assert compression.encode(b"", zlib) == b""
+    assert compression.decode(noise) == noise
+
+
+def test_raw_chunk_starting_with_magic_uses_identity():
+    data = MAGIC + os.urandom(1024)
+    for codec in (None, compression.by_name("zlib")):
+        blob = compression.encode(data, codec)
+        assert compression.codec_of(blob) == IDENTITY
+        assert blob[HEADER.size :] == data
+        assert compression.decode(blob) == data
+
+
+def test_decode_rejects_unknown_codec_and_bad_length():
+    with pytest.raises(ValueError):
+        compression.decode(HEADER.pack(MAGIC, 200, 3) + b"abc")
+    blob = compression.encode(TEXT, compression.by_name("zlib"))
+    with pytest.raises(ValueError):
+        compression.decode(HEADER.pack(MAGIC, 1, len(TEXT) - 1) + blob[HEADER.size :])
+    with pytest.raises(ValueError):
+        compression.by_name("brotli")
+
+
+def test_store_sends_raw_to_peers_without_the_codec(tmp_path):
+    zlib = compression.by_name("zlib")
+    store = CompressedChunkStore(ChunkStore(root=tmp_path / "blobs"), zlib)
+    h = sha256_hex(TEXT)
+    store.write(h, TEXT)
+
+    assert store.read(h) == TEXT
+    flags, payload = store.get_frame(h, {zlib.codec_id})
+    assert flags == zlib.codec_id and compression.decode(payload) == TEXT
+    assert store.get_frame(h, set()) == (RAW, TEXT)
+    flags, view = store.get_frame_view(h, set())
+    assert flags == RAW and bytes(view) == TEXT
+
+    magic = MAGIC + os.urandom(1024)
+    hm = sha256_hex(magic)
+    store.write(hm, magic)
+    flags, view = store.get_frame_view(hm, {zlib.codec_id})
+    assert flags == RAW and bytes(view) == magic
+    assert store.read(hm) == magic
+
+
+def test_put_frame_verifies_hash_and_keeps_payload(tmp_path):
+    zlib = compression.by_name("zlib")
+    store = CompressedChunkStore(ChunkStore(root=tmp_path / "blobs"), None)
+    h = sha256_hex(TEXT)
+    blob = compression.encode(TEXT, zlib)
+
+    with pytest.raises(ValueError):
+        store.put_frame(sha256_hex(b"other"), zlib.codec_id, blob)
+    with pytest.raises(ValueError):
+        store.put_frame(h, compression.by_name("lzma").codec_id, blob)
+    assert store.put_frame(h, zlib.codec_id, blob)
+    assert not store.put_frame(h, zlib.codec_id, blob)
+    assert store.read_encoded(h) == blob
+    assert store.read(h) == TEXT
+
+
+@pytest.mark.parametrize("name", compression.available())
+def test_decompress_never_expands_past_the_header_length(name):
+    # a crafted payload that inflates far past its header's raw length must
+    # fail (or stop) at that length instead of allocating the whole thing
+    codec = compression.by_name(name)
+    big = b"\0" * (8 << 20)
+    payload = codec.compress(big, -1)
+    try:
+        out = codec.decompress(payload, 1024)
+    except Exception:
+        out = b""
+    assert len(out) <= 1024
+    with pytest.raises(ValueError):
+        compression.decode(HEADER.pack(MAGIC, codec.codec_id, 1024) + payload)
+    with pytest.raises(ValueError):
+        compression.decode(HEADER.pack(MAGIC, codec.codec_id, len(big)) + payload[:-8])
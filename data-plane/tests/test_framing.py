@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from src.core.framing import FRAME_HEADER, MAX_FRAME_BYTES, aiter_frames, encode_frame_header
+
+
+def _parse(body, piece=None):
+    async def stream():
+        step = piece or max(len(body), 1)
+        for i in range(0, len(body), step):
+            yield body[i : i + step]
+
+    async def collect():
+        return [f async for f in aiter_frames(stream())]
+
+    return asyncio.run(collect())
+
+
+FRAMES = [
+    ("aa" * 32, 0, b"hello"),
+    ("bb" * 32, 1, b"\x00" * 1000),
+    ("cc" * 32, 0, b""),
+]
+
+
+def _encode(frames):
+    return b"".join(encode_frame_header(h, len(p), flags) + p for h, flags, p in frames)
+
+
+@pytest.mark.parametrize("piece", [None, 1, 7, FRAME_HEADER.size])
+def test_frames_round_trip_however_the_stream_is_split(piece):
+    assert _parse(_encode(FRAMES), piece) == FRAMES
+
+
+def test_oversized_frame_is_rejected_from_its_header():
+    # only the header is sent: the length alone must be refused
+    with pytest.raises(ValueError, match="too large"):
+        _parse(encode_frame_header("aa" * 32, MAX_FRAME_BYTES + 1))
+
+
+def test_truncated_frame_is_rejected():
+    with pytest.raises(ValueError, match="truncated"):
+        _parse(_encode(FRAMES)[:-1])
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.core.hashing import sha256_hex
+from src.db.models import Base, ObjectManifest
+from src.services import gc_service
+from src.services.gc_service import ChunkGC
+from src.storage.chunk_store import ChunkStore
+
+
+def test_gc_reclaims_only_unreferenced_chunks_past_the_grace_period(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/node.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    store = ChunkStore(root=tmp_path / "blobs")
+    monkeypatch.setattr(gc_service, "SessionLocal", Session)
+    monkeypatch.setattr(gc_service, "get_chunk_store", lambda: store)
+
+    def put(data, age_s):
+        h = sha256_hex(data)
+        store.write(h, data)
+        then = time.time() - age_s
+        os.utime(store._path_for(h), (then, then))
+        return h
+
+    referenced_old = put(b"referenced", 3600)
+    orphan_old = put(b"orphan, old", 3600)
+    orphan_young = put(b"orphan, young", 0)
+    db = Session()
+    ObjectManifest.upsert(db, "obj", size_bytes=10, chunk_size=10, chunks=[referenced_old])
+    db.close()
+
+    stats = asyncio.run(ChunkGC(grace_s=60, batch=2, max_deletes_per_s=1e6).collect())
+
+    assert (stats.scanned, stats.reclaimed_chunks, stats.reclaimed_bytes) == (3, 1, len(b"orphan, old"))
+    assert set(store.iter_hashes()) == {referenced_old, orphan_young}
+    assert not store.exists(orphan_old)
+    engine.dispose()
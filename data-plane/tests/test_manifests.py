@@ -0,0 +1,190 @@
+import json
+import threading
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import sessionmaker
+
+from src.db import index
+from src.db.index import migrate_legacy_manifests, refcount
+from src.db.models import Base, ChunkRef, ObjectManifest
+
+
+@pytest.fixture()
+def make_session(tmp_path):
+    # a file DB: each thread gets its own connection, as on a real node
+    engine = create_engine(f"sqlite:///{tmp_path}/node.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    engine.dispose()
+
+
+def _hashes(tag, n):
+    return [f"{tag:02x}{i:062x}" for i in range(n)]
+
+
+def test_upsert_overwrites_manifest_and_refs(make_session):
+    db = make_session()
+    ObjectManifest.upsert(db, "obj", size_bytes=30, chunk_size=10, chunks=_hashes(1, 3))
+    ObjectManifest.upsert(db, "obj", size_bytes=20, chunk_size=10, chunks=_hashes(2, 2))
+
+    m = db.get(ObjectManifest, "obj")
+    assert (m.size_bytes, m.chunks) == (20, _hashes(2, 2))
+    refs = {d.hex() for d in db.scalars(select(ChunkRef.chunk_hash).where(ChunkRef.object_id == "obj"))}
+    assert refs == set(_hashes(2, 2))
+    db.close()
+
+
+def test_concurrent_installs_of_one_object_all_succeed(make_session):
+    rounds = 20
+    versions = {tag: _hashes(tag, 50) for tag in (1, 2)}
+    start = threading.Barrier(len(versions))
+    errors = []
+
+    def install(tag):
+        start.wait()
+        for _ in range(rounds):
+            db = make_session()
+            try:
+                ObjectManifest.upsert(db, "obj", size_bytes=500, chunk_size=10, chunks=versions[tag])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=install, args=(tag,)) for tag in versions]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+    # the last install wins, and the reverse index matches it exactly
+    db = make_session()
+    chunks = db.get(ObjectManifest, "obj").chunks
+    assert chunks in versions.values()
+    refs = {d.hex() for d in db.scalars(select(ChunkRef.chunk_hash).where(ChunkRef.object_id == "obj"))}
+    assert refs == set(chunks)
+    db.close()
+
+
+def _legacy_db(path, rows, table="object_manifests"):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"CREATE TABLE {table} (object_id VARCHAR(256) PRIMARY KEY, size_bytes INTEGER,"
+                " chunk_size INTEGER, chunks_json TEXT, chunk_sizes_json TEXT, chunker VARCHAR(16))"
+            )
+        )
+        conn.execute(text(f"INSERT INTO {table} VALUES (:id, :size, :cs, :chunks, :sizes, :chunker)"), rows)
+    return engine
+
+
+def _legacy_row(object_id, chunks, sizes=None, chunker=None):
+    size = sum(sizes) if sizes else 10 * len(chunks)
+    return {
+        "id": object_id,
+        "size": size,
+        "cs": 10,
+        "chunks": json.dumps(chunks) if isinstance(chunks, list) else chunks,
+        "sizes": json.dumps(sizes) if sizes else None,
+        "chunker": chunker,
+    }
+
+
+def test_legacy_json_manifests_are_migrated_to_packed_rows(tmp_path):
+    shared = _hashes(9, 1)[0]
+    fixed = _hashes(1, 3) + [shared]
+    cdc = _hashes(2, 2) + [shared]
+    engine = _legacy_db(
+        tmp_path / "legacy.db",
+        [
+            {"id": "fixed", "size": 35, "cs": 10, "chunks": json.dumps(fixed), "sizes": None, "chunker": None},
+            {"id": "cdc", "size": 6, "cs": 2, "chunks": json.dumps(cdc), "sizes": "[1, 2, 3]", "chunker": "cdc"},
+        ],
+    )
+
+    migrate_legacy_manifests(engine)
+    # already migrated: a second start leaves it alone
+    migrate_legacy_manifests(engine)
+
+    tables = inspect(engine).get_table_names()
+    assert "object_manifests_legacy" not in tables
+    db = sessionmaker(bind=engine)()
+    m = db.get(ObjectManifest, "fixed")
+    assert (m.size_bytes, m.chunk_size, m.chunker, m.chunks, m.chunk_sizes) == (35, 10, "fixed", fixed, None)
+    m = db.get(ObjectManifest, "cdc")
+    assert (m.chunker, m.chunks, m.chunk_sizes) == ("cdc", cdc, [1, 2, 3])
+    assert refcount(db, shared) == 2
+    assert refcount(db, fixed[0]) == 1
+    db.close()
+    engine.dispose()
+
+
+def test_interrupted_legacy_migration_rolls_back_and_reruns(tmp_path, monkeypatch):
+    rows = [_legacy_row(f"obj-{i}", _hashes(i, 2)) for i in range(5)]
+    engine = _legacy_db(tmp_path / "legacy.db", rows)
+    monkeypatch.setattr(index, "_MIGRATE_BATCH", 2)
+    replace = ChunkRef.replace
+    calls = []
+
+    def crash_on_fourth(db, object_id, chunks_bin):
+        calls.append(object_id)
+        if len(calls) == 4:
+            raise RuntimeError("killed mid-upgrade")
+        replace(db, object_id, chunks_bin)
+
+    monkeypatch.setattr(ChunkRef, "replace", crash_on_fourth)
+    with pytest.raises(RuntimeError):
+        migrate_legacy_manifests(engine)
+
+    # nothing of the attempt survives: not the rename, the new tables or any row
+    insp = inspect(engine)
+    assert set(insp.get_table_names()) == {"object_manifests"}
+    assert "chunks_json" in {c["name"] for c in insp.get_columns("object_manifests")}
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM object_manifests")) == 5
+
+    monkeypatch.setattr(ChunkRef, "replace", replace)
+    migrate_legacy_manifests(engine)
+    db = sessionmaker(bind=engine)()
+    assert [db.get(ObjectManifest, f"obj-{i}").chunks for i in range(5)] == [_hashes(i, 2) for i in range(5)]
+    assert "object_manifests_legacy" not in inspect(engine).get_table_names()
+    db.close()
+    engine.dispose()
+
+
+def test_bad_legacy_rows_are_kept_aside_and_leftover_table_resumed(tmp_path):
+    # a legacy table renamed aside by an older, non-transactional upgrade
+    engine = _legacy_db(
+        tmp_path / "legacy.db",
+        [
+            _legacy_row("good", _hashes(1, 2)),
+            _legacy_row("bad-hex", '["not-a-hash"]'),
+            _legacy_row("newer", _hashes(2, 2)),
+        ],
+        table="object_manifests_legacy",
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    ObjectManifest.upsert(db, "newer", size_bytes=30, chunk_size=10, chunks=_hashes(3, 3))
+    db.close()
+
+    migrate_legacy_manifests(engine)
+
+    db = sessionmaker(bind=engine)()
+    assert db.get(ObjectManifest, "good").chunks == _hashes(1, 2)
+    # the manifest written after the failed upgrade is not overwritten
+    assert db.get(ObjectManifest, "newer").chunks == _hashes(3, 3)
+    assert db.get(ObjectManifest, "bad-hex") is None
+    assert refcount(db, _hashes(1, 2)[0]) == 1
+    db.close()
+    with engine.connect() as conn:
+        assert conn.scalars(text("SELECT object_id FROM object_manifests_legacy")).all() == ["bad-hex"]
+
+    # the next start retries the bad row and leaves everything else alone
+    migrate_legacy_manifests(engine)
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM object_manifests")) == 2
+    engine.dispose()
@@ -0,0 +1,180 @@
+import os
+import threading
+
+import pytest
+
+from src.storage import pack_store
+from src.storage.pack_store import PackChunkStore
+
+
+def _chunk(i, size=1000):
+    return f"{i:064x}", bytes([i % 256]) * size
+
+
+@pytest.fixture()
+def store(tmp_path):
+    s = PackChunkStore(tmp_path / "pack", segment_bytes=64 * 1024)
+    yield s
+    s.close()
+
+
+def _fill(store, n):
+    chunks = dict(_chunk(i) for i in range(n))
+    for h, data in chunks.items():
+        store.write(h, data)
+    return chunks
+
+
+def test_store_serves_reads_and_writes_while_compacting(store, monkeypatch):
+    monkeypatch.setattr(pack_store, "_COMPACT_SLICE_BYTES", 4096)
+    chunks = _fill(store, 300)
+    # mostly-dead sealed segments to rewrite
+    for i, h in enumerate(list(chunks)):
+        if i % 4:
+            store.delete(h)
+            del chunks[h]
+
+    stop = threading.Event()
+    errors = []
+
+    def churn():
+        i = 1000
+        try:
+            while not stop.is_set():
+                h, data = _chunk(i)
+                store.write(h, data)
+                store.delete(h)
+                for live, data in list(chunks.items())[:20]:
+                    assert store.read(live) == data
+                i += 1
+        except Exception as e:
+            errors.append(e)
+
+    t = threading.Thread(target=churn)
+    t.start()
+    try:
+        assert store.compact(min_dead_ratio=0.5) > 0
+    finally:
+        stop.set()
+        t.join()
+    assert errors == []
+
+    assert set(store.iter_hashes()) == set(chunks)
+    for h, data in chunks.items():
+        assert store.read(h) == data
+
+
+def test_deleted_chunks_stay_deleted_across_compaction_and_reopen(tmp_path):
+    root = tmp_path / "pack"
+    s = PackChunkStore(root, segment_bytes=64 * 1024)
+    chunks = _fill(s, 200)
+    deleted = [h for i, h in enumerate(chunks) if i % 3 == 0]
+    for h in deleted:
+        assert s.delete(h)
+    assert not s.delete(deleted[0])
+    s.compact(min_dead_ratio=0.1)
+    s.close()
+
+    s = PackChunkStore(root, segment_bytes=64 * 1024)
+    try:
+        for h, data in chunks.items():
+            if h in deleted:
+                assert not s.exists(h)
+                with pytest.raises(FileNotFoundError):
+                    s.read(h)
+            else:
+                assert s.read(h) == data
+        assert set(s.iter_hashes()) == set(chunks) - set(deleted)
+    finally:
+        s.close()
+
+
+def test_torn_tail_is_truncated_on_reopen(tmp_path):
+    root = tmp_path / "pack"
+    s = PackChunkStore(root)
+    chunks = _fill(s, 3)
+    s.close()
+
+    (segment,) = root.glob("*.pack")
+    good_size = segment.stat().st_size
+    # a crash in the middle of appending the next record
+    with open(segment, "ab") as f:
+        f.write(b"RPK1" + os.urandom(40))
+
+    s = PackChunkStore(root)
+    try:
+        assert segment.stat().st_size == good_size
+        for h, data in chunks.items():
+            assert s.read(h) == data
+        # appends continue after the last good record
+        h, data = _chunk(99)
+        s.write(h, data)
+        assert s.read(h) == data
+    finally:
+        s.close()
+
+
+def test_write_file_copies_in_slices_and_drops_a_failed_record(tmp_path, monkeypatch):
+    root = tmp_path / "pack"
+    monkeypatch.setattr(pack_store, "_COPY_BYTES", 1000)
+    s = PackChunkStore(root)
+    h, data = _chunk(1, size=10_000)
+    spooled = tmp_path / "spool"
+    spooled.write_bytes(data)
+    s.write_file(h, spooled)
+    assert s.read(h) == data
+    assert not spooled.exists()
+
+    # a copy that fails half way leaves no partial record behind
+    def failing():
+        yield b"x" * 1000
+        raise OSError("spool file went away")
+
+    with pytest.raises(OSError):
+        s._append_pieces(pack_store._PUT, bytes.fromhex(_chunk(2)[0]), 5000, failing(), 0)
+    h3, data3 = _chunk(3)
+    s.write(h3, data3)
+    s.close()
+
+    s = PackChunkStore(root)
+    try:
+        assert (s.read(h), s.read(h3)) == (data, data3)
+        assert not s.exists(_chunk(2)[0])
+    finally:
+        s.close()
+
+
+def test_compacted_segment_reader_is_closed_after_in_flight_reads(store):
+    chunks = _fill(store, 200)
+    for i, h in enumerate(list(chunks)):
+        if i % 4:
+            store.delete(h)
+    # a read of a live chunk in the first segment, still in flight
+    live = next(h for i, h in enumerate(chunks) if i % 4 == 0)
+    seg, _, _ = store._pin(live)
+    retired = [s for s in store._segments.values() if s.sealed]
+
+    assert store.compact(min_dead_ratio=0.5) > 0
+    assert seg.retired and not seg.reader.closed
+    store._unpin(seg)
+    assert seg.reader.closed
+    assert all(s.reader.closed for s in retired if s.retired)
+
+
+def test_records_are_fsynced_per_record_or_on_sync(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(pack_store.os, "fsync", lambda fd: synced.append(fd))
+
+    every = PackChunkStore(tmp_path / "every", fsync_interval_s=0)
+    _fill(every, 3)
+    assert len(synced) == 3
+    every.close()
+
+    synced.clear()
+    batched = PackChunkStore(tmp_path / "batched", fsync_interval_s=1.0)
+    _fill(batched, 3)
+    assert synced == []
+    batched.sync()
+    batched.sync()
+    assert len(synced) == 1
+    batched.close()
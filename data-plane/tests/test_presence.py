@@ -0,0 +1,48 @@
+import hashlib
+import time
+
+from src.storage.chunk_store import ChunkStore
+from src.storage.presence import BloomFilter, PresenceFilteredStore
+
+
+def _digests(tag, n):
+    return [hashlib.sha256(b"%s-%d" % (tag, i)).digest() for i in range(n)]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    f = BloomFilter(capacity=5000, fp_rate=0.01)
+    added = _digests(b"in", 5000)
+    for d in added:
+        f.add(d)
+    assert all(d in f for d in added)
+
+    # false positives stay near the configured rate at capacity
+    false_pos = sum(d in f for d in _digests(b"out", 20000))
+    assert false_pos / 20000 < 0.03
+
+
+def _wait_ready(store, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not store._ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store._ready
+
+
+def test_filtered_store_finds_scanned_written_and_snapshotted_chunks(tmp_path):
+    inner = ChunkStore(root=tmp_path / "blobs")
+    before = hashlib.sha256(b"before").hexdigest()
+    inner.write(before, b"before")
+
+    store = PresenceFilteredStore(inner, capacity=1000)
+    _wait_ready(store)
+    after = hashlib.sha256(b"after").hexdigest()
+    store.write(after, b"after")
+    assert store.exists(before) and store.exists(after)
+    assert not store.exists(hashlib.sha256(b"never").hexdigest())
+
+    assert store.save_snapshot()
+    reloaded = PresenceFilteredStore(inner, capacity=1000)
+    # loaded from the snapshot, which is consumed so a crash forces a rescan
+    assert reloaded._ready
+    assert not reloaded.snapshot_path.exists()
+    assert reloaded.exists(before) and reloaded.exists(after)
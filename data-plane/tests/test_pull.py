@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+
+from aiohttp import web
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db.models import Base, ObjectManifest
+from src.services import pull_service
+from src.services.pull_service import PullService, PullStatus
+from src.storage.chunk_store import ChunkStore
+
+
+async def _pull_from_peer(manifest):
+    requests = []
+
+    async def get_manifest(request):
+        requests.append(request.path)
+        return web.json_response(manifest)
+
+    async def batch_get(request):
+        requests.append(request.path)
+        return web.Response(status=500)
+
+    app = web.Application()
+    app.router.add_get("/objects/obj/manifest", get_manifest)
+    app.router.add_post("/chunks/batch/get", batch_get)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        p = PullStatus(pull_id=1, object_id="obj", source_url=f"http://127.0.0.1:{port}")
+        await PullService()._run(p)
+    finally:
+        await runner.cleanup()
+    return p, requests
+
+
+def test_pull_rejects_a_bad_peer_manifest_without_installing_it(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/node.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    store = ChunkStore(root=tmp_path / "blobs")
+    monkeypatch.setattr(pull_service, "SessionLocal", Session)
+    monkeypatch.setattr(pull_service, "get_chunk_store", lambda: store)
+
+    data = b"x" * 10
+    h = hashlib.sha256(data).hexdigest()
+    store.write(h, data)
+    bad = [
+        {"size_bytes": 10, "chunk_size": 0, "chunks": [h]},
+        {"size_bytes": 10, "chunk_size": 10, "chunks": [h], "chunker": "cdc", "chunk_sizes": [9]},
+        {"size_bytes": 10, "chunk_size": 10, "chunks": ["zz" * 32]},
+        {"size_bytes": 10, "chunk_size": 10, "chunks": [h], "chunker": "rabin"},
+        {"chunk_size": 10, "chunks": [h]},
+    ]
+    for manifest in bad:
+        p, requests = asyncio.run(_pull_from_peer(manifest))
+        assert p.status == "failed", manifest
+        # rejected before any chunk was requested
+        assert requests == ["/objects/obj/manifest"]
+    db = Session()
+    assert db.get(ObjectManifest, "obj") is None
+    db.close()
+
+    p, _ = asyncio.run(_pull_from_peer({"size_bytes": 10, "chunk_size": 10, "chunks": [h]}))
+    assert p.status == "succeeded"
+
+    db = Session()
+    assert db.get(ObjectManifest, "obj").chunks == [h]
+    db.close()
+    engine.dispose()
@@ -0,0 +1,82 @@
+import hashlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api import objects
+from src.core.config import settings
+from src.db.models import Base
+from src.db.session import get_db
+from src.storage import factory
+
+_FACTORIES = (factory.get_backend_store, factory.get_staging_dir, factory.get_presence_filter, factory.get_chunk_store)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "chunk_store_root", str(tmp_path / "blobs"))
+    monkeypatch.setattr(settings, "chunk_store_backend", "fs")
+    monkeypatch.setattr(settings, "presence_filter", False)
+    monkeypatch.setattr(settings, "chunk_compression", "none")
+    for f in _FACTORIES:
+        f.cache_clear()
+    engine = create_engine(f"sqlite:///{tmp_path}/node.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    make_session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def db():
+        s = make_session()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    app = FastAPI()
+    app.include_router(objects.router)
+    app.dependency_overrides[get_db] = db
+    yield TestClient(app)
+    for f in _FACTORIES:
+        f.cache_clear()
+    engine.dispose()
+
+
+def _store(chunks):
+    store = factory.get_chunk_store()
+    hashes = []
+    for c in chunks:
+        h = hashlib.sha256(c).hexdigest()
+        store.write(h, c)
+        hashes.append(h)
+    return hashes
+
+
+@pytest.mark.parametrize(
+    "size_bytes, chunk_size",
+    [
+        (25, 0),  # would divide by zero on a ranged read
+        (25, -10),
+        (35, 10),  # needs four chunks
+        (15, 10),  # needs two: the third chunk is never reachable
+        (-1, 10),
+    ],
+)
+def test_fixed_manifest_must_match_its_chunks(client, size_bytes, chunk_size):
+    hashes = _store([b"a" * 10, b"b" * 10, b"c" * 5])
+    body = {"size_bytes": size_bytes, "chunk_size": chunk_size, "chunks": hashes}
+    r = client.put("/objects/obj/manifest", json=body)
+    assert r.status_code == 400
+    assert client.get("/objects/obj/manifest").status_code == 404
+
+
+def test_valid_fixed_manifest_serves_ranges(client):
+    hashes = _store([b"a" * 10, b"b" * 10, b"c" * 5])
+    r = client.put("/objects/obj/manifest", json={"size_bytes": 25, "chunk_size": 10, "chunks": hashes})
+    assert r.status_code == 200
+    r = client.get("/objects/obj", headers={"range": "bytes=8-21"})
+    assert r.status_code == 206 and r.content == b"aabbbbbbbbbbcc"
+
+    empty = client.put("/objects/empty/manifest", json={"size_bytes": 0, "chunk_size": 10, "chunks": []})
+    assert empty.status_code == 200
@@ -0,0 +1,43 @@
+import pytest
+from fastapi import HTTPException
+
+from src.api.objects import _locate, _parse_range
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),  # open-ended
+        ("bytes=-100", (900, 999)),  # suffix
+        ("bytes=-5000", (0, 999)),  # suffix longer than the object
+        ("bytes=990-5000", (990, 999)),  # end clamped to the object
+        ("BYTES = 5-6", (5, 6)),
+    ],
+)
+def test_satisfiable_ranges(header, expected):
+    assert _parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["items=0-1", "bytes=0-1,5-6", "bytes=abc", "bytes=5-2", "bytes=-0", "bytes=x-"],
+)
+def test_ignored_ranges(header):
+    assert _parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-3000"])
+def test_unsatisfiable_range_is_416(header):
+    with pytest.raises(HTTPException) as e:
+        _parse_range(header, 1000)
+    assert e.value.status_code == 416
+    assert e.value.headers["Content-Range"] == "bytes */1000"
+
+
+def test_locate_fixed_and_variable_chunks():
+    assert _locate(2500, 1000, None) == (2, 500)
+    starts = [0, 300, 1000]
+    assert _locate(0, 0, starts) == (0, 0)
+    assert _locate(999, 0, starts) == (1, 699)
+    assert _locate(1000, 0, starts) == (2, 0)
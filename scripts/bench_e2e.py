@@ -0,0 +1,342 @@
+"""
+End-to-end throughput benchmark: ingest -> download -> migrate -> verify.
+
+Starts two data-plane nodes and the control plane (with its JobRunner) as
+local uvicorn processes on free ports with temp data dirs, registers the
+nodes, then runs each phase against them:
+
+  ingest    POST /objects/{id}/ingest on node1 (streamed request bodies)
+  download  GET /objects/{id} from node1, sha256-checked
+  migrate   POST /jobs/migrate node1 -> node2, polled until every job finishes
+  verify    GET /objects/{id} from node2, sha256-checked
+
+Per phase it reports MB/s and chunks/s (logical object bytes / chunks), the
+p50/p99/max latency of the phase's unit of work (one request, or one job from
+submit to finish) and the peak RSS of every server process, sampled from
+/proc while the phase runs (Linux only; null elsewhere).
+
+Object contents are built from chunk-sized blocks; --dedup is the fraction of
+blocks drawn from a small shared pool, so that share of chunks dedupes across
+objects (exact for --chunker fixed, approximate for cdc).
+
+Run from the repo root (needs the data-plane and control-plane requirements):
+  python scripts/bench_e2e.py --objects 16 --size-mb 8 --chunk-kb 1024 --out bench.json
+  python scripts/bench_e2e.py --node-env CHUNK_COMPRESSION=zlib --cp-env MIGRATION_MODE=relay
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+
+ROOT = Path(__file__).resolve().parent.parent
+PIECE_BYTES = 256 * 1024
+RSS_SAMPLE_S = 0.02
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class Server:
+    def __init__(self, name: str, app_dir: Path, port: int, env: Dict[str, str]):
+        self.name = name
+        self.base = f"http://127.0.0.1:{port}"
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=app_dir,
+            env={**os.environ, "PYTHONPATH": ".", **env},
+        )
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+class RSSSampler:
+    """
+    Polls VmRSS of each server while a phase runs and keeps the maximum.
+    """
+
+    def __init__(self, servers: List[Server]):
+        self.servers = servers
+        self.peak: Dict[str, Optional[int]] = {s.name: None for s in servers}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            for s in self.servers:
+                rss = _rss_bytes(s.proc.pid)
+                if rss is not None and (self.peak[s.name] is None or rss > self.peak[s.name]):
+                    self.peak[s.name] = rss
+            if self._stop.wait(RSS_SAMPLE_S):
+                return
+
+    def report(self) -> Dict[str, Optional[float]]:
+        return {k: round(v / 2**20, 1) if v is not None else None for k, v in self.peak.items()}
+
+
+def _make_objects(n: int, size: int, block: int, dedup: float, seed: int) -> List[bytes]:
+    rng = random.Random(seed)
+    pool = [rng.randbytes(block) for _ in range(max(1, min(64, n * size // block // 8)))]
+    out = []
+    for _ in range(n):
+        parts, total = [], 0
+        while total < size:
+            b = rng.choice(pool) if rng.random() < dedup else rng.randbytes(block)
+            parts.append(b)
+            total += len(b)
+        out.append(b"".join(parts)[:size])
+    return out
+
+
+async def _wait_healthy(session: aiohttp.ClientSession, base: str, timeout_s: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base}/health") as r:
+                if r.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"{base} did not become healthy")
+
+
+async def _check(r: aiohttp.ClientResponse, what: str) -> None:
+    if r.status >= 300:
+        raise RuntimeError(f"{what} failed {r.status}: {await r.text()}")
+
+
+def _phase(name: str, nbytes: int, chunks: int, seconds: float, latencies: List[float], rss: RSSSampler) -> Dict:
+    return {
+        "phase": name,
+        "bytes": nbytes,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "mb_per_s": round(nbytes / seconds / 1e6, 2) if seconds else 0.0,
+        "chunks_per_s": round(chunks / seconds, 1) if seconds else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50), 2),
+            "p99": round(_percentile(latencies, 0.99), 2),
+            "max": round(max(latencies, default=0.0), 2),
+        },
+        "peak_rss_mb": rss.report(),
+    }
+
+
+async def _bounded(concurrency: int, coros) -> list:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def run(c):
+        async with sem:
+            return await c
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+async def _run(args, servers: List[Server]) -> List[Dict]:
+    node1, node2, cp = servers
+    ids = [f"bench-{i}" for i in range(args.objects)]
+    objects = _make_objects(args.objects, int(args.size_mb * 2**20), args.chunk_kb * 1024, args.dedup, args.seed)
+    digests = [hashlib.sha256(o).hexdigest() for o in objects]
+    total = sum(len(o) for o in objects)
+    headers = {"x-chunker": args.chunker, "x-chunk-size": str(args.chunk_kb * 1024)}
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=600)
+    phases = []
+
+    async with aiohttp.ClientSession(timeout=timeout) as s:
+        for srv in servers:
+            await _wait_healthy(s, srv.base)
+        for srv in (node1, node2):
+            async with s.post(f"{cp.base}/nodes/register", json={"name": srv.name, "base_url": srv.base}) as r:
+                await _check(r, "node register")
+
+        # --- ingest ---
+        chunk_counts: Dict[str, int] = {}
+
+        async def ingest(object_id: str, data: bytes) -> float:
+            async def body():
+                for i in range(0, len(data), PIECE_BYTES):
+                    yield data[i : i + PIECE_BYTES]
+
+            t0 = time.perf_counter()
+            async with s.post(f"{node1.base}/objects/{object_id}/ingest", data=body(), headers=headers) as r:
+                await _check(r, f"ingest {object_id}")
+                chunk_counts[object_id] = (await r.json())["chunks"]
+            return (time.perf_counter() - t0) * 1000
+
+        with RSSSampler(servers) as rss:
+            t0 = time.perf_counter()
+            lat = await _bounded(args.concurrency, (ingest(i, o) for i, o in zip(ids, objects)))
+            phases.append(_phase("ingest", total, sum(chunk_counts.values()), time.perf_counter() - t0, lat, rss))
+        chunks = sum(chunk_counts.values())
+
+        # --- download / verify ---
+        async def download(base: str, object_id: str, digest: str) -> float:
+            t0 = time.perf_counter()
+            h = hashlib.sha256()
+            async with s.get(f"{base}/objects/{object_id}") as r:
+                await _check(r, f"download {object_id}")
+                async for piece in r.content.iter_chunked(PIECE_BYTES):
+                    h.update(piece)
+            if h.hexdigest() != digest:
+                raise RuntimeError(f"{object_id} from {base}: content mismatch")
+            return (time.perf_counter() - t0) * 1000
+
+        with RSSSampler(servers) as rss:
+            t0 = time.perf_counter()
+            lat = await _bounded(args.concurrency, (download(node1.base, i, d) for i, d in zip(ids, digests)))
+            phases.append(_phase("download", total, chunks, time.perf_counter() - t0, lat, rss))
+
+        # --- migrate ---
+        async def migrate(object_id: str) -> float:
+            t0 = time.perf_counter()
+            body = {"src_node": node1.name, "dst_node": node2.name, "object_id": object_id}
+            async with s.post(f"{cp.base}/jobs/migrate", json=body) as r:
+                await _check(r, f"migrate {object_id}")
+                job_id = (await r.json())["job_id"]
+            while True:
+                async with s.get(f"{cp.base}/jobs/{job_id}") as r:
+                    await _check(r, f"job {job_id}")
+                    job = await r.json()
+                if job["status"] == "succeeded":
+                    return (time.perf_counter() - t0) * 1000
+                if job["status"] == "failed":
+                    raise RuntimeError(f"job {job_id} ({object_id}) failed: {job['last_error']}")
+                await asyncio.sleep(args.poll_ms / 1000)
+
+        with RSSSampler(servers) as rss:
+            t0 = time.perf_counter()
+            # every job is queued at once; the control plane's workers set the concurrency
+            lat = await asyncio.gather(*(migrate(i) for i in ids))
+            phases.append(_phase("migrate", total, chunks, time.perf_counter() - t0, lat, rss))
+
+        with RSSSampler(servers) as rss:
+            t0 = time.perf_counter()
+            lat = await _bounded(args.concurrency, (download(node2.base, i, d) for i, d in zip(ids, digests)))
+            phases.append(_phase("verify", total, chunks, time.perf_counter() - t0, lat, rss))
+
+    return phases
+
+
+def _env_pairs(pairs: List[str]) -> Dict[str, str]:
+    out = {}
+    for p in pairs:
+        k, sep, v = p.partition("=")
+        if not sep:
+            raise SystemExit(f"expected KEY=VALUE, got {p!r}")
+        out[k] = v
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--objects", type=int, default=8)
+    ap.add_argument("--size-mb", type=float, default=8, help="size of each object")
+    ap.add_argument("--chunk-kb", type=int, default=1024, help="fixed chunk size / cdc average size")
+    ap.add_argument("--chunker", choices=("fixed", "cdc"), default="fixed")
+    ap.add_argument("--dedup", type=float, default=0.0, help="fraction of blocks shared across objects (0..1)")
+    ap.add_argument("--concurrency", type=int, default=4, help="concurrent ingest/download requests")
+    ap.add_argument("--poll-ms", type=float, default=50, help="job status poll interval")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--node-env", action="append", default=[], metavar="KEY=VALUE", help="extra env for both nodes")
+    ap.add_argument("--cp-env", action="append", default=[], metavar="KEY=VALUE", help="extra env for the control plane")
+    ap.add_argument("--keep", action="store_true", help="keep the temp data dir")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-e2e-"))
+    node_env = _env_pairs(args.node_env)
+    servers = []
+    try:
+        for name in ("node1", "node2"):
+            servers.append(
+                Server(
+                    name,
+                    ROOT / "data-plane",
+                    _free_port(),
+                    {
+                        "DATABASE_URL": f"sqlite:///{tmp}/{name}.db",
+                        "CHUNK_STORE_ROOT": str(tmp / name / "blobs"),
+                        "NODE_NAME": name,
+                        **node_env,
+                    },
+                )
+            )
+        servers.append(
+            Server(
+                "control-plane",
+                ROOT / "control-plane",
+                _free_port(),
+                {"DATABASE_URL": f"sqlite:///{tmp}/control.db", **_env_pairs(args.cp_env)},
+            )
+        )
+        phases = asyncio.run(_run(args, servers))
+    finally:
+        for srv in servers:
+            srv.stop()
+        if not args.keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        "params": vars(args),
+        "env": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "phases": phases,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
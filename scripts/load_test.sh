@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+# End-to-end throughput benchmark (ingest/download/migrate/verify) against
+# local nodes + control plane started on free ports; prints a JSON report.
+# All arguments go to scripts/bench_e2e.py, e.g.
+#   scripts/load_test.sh --objects 16 --size-mb 8 --dedup 0.3 --out bench.json
+set -euo pipefail
+cd "$(dirname "$0")/.."
+exec "${PYTHON:-python}" scripts/bench_e2e.py "$@"